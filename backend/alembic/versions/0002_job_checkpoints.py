@@ -0,0 +1,30 @@
+"""job checkpoints
+
+Revision ID: 0002_job_checkpoints
+Revises: 0001_initial
+Create Date: 2024-02-01 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision = "0002_job_checkpoints"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("name", sa.String(length=100), primary_key=True),
+        sa.Column("last_success_date", sa.Date()),
+        sa.Column("created_at", mssql.DATETIMEOFFSET, server_default=sa.text("SYSDATETIMEOFFSET()"), nullable=False),
+        sa.Column("updated_at", mssql.DATETIMEOFFSET, server_default=sa.text("SYSDATETIMEOFFSET()"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_checkpoints")
@@ -0,0 +1,48 @@
+"""job runs and scheduler lock
+
+Revision ID: 0003_job_runs
+Revises: 0002_job_checkpoints
+Create Date: 2024-02-15 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision = "0003_job_runs"
+down_revision = "0002_job_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_runs",
+        sa.Column("id", mssql.UNIQUEIDENTIFIER, server_default=sa.text("NEWID()"), primary_key=True),
+        sa.Column("job_name", sa.String(length=100), nullable=False),
+        sa.Column("status", sa.String(length=20), server_default=sa.text("'QUEUED'"), nullable=False),
+        sa.Column("params", sa.Text()),
+        sa.Column("result", sa.Text()),
+        sa.Column("error", sa.Text()),
+        sa.Column("worker", sa.String(length=200)),
+        sa.Column("started_at", mssql.DATETIMEOFFSET),
+        sa.Column("finished_at", mssql.DATETIMEOFFSET),
+        sa.Column("duration_ms", sa.Integer()),
+        sa.Column("created_at", mssql.DATETIMEOFFSET, server_default=sa.text("SYSDATETIMEOFFSET()"), nullable=False),
+        sa.Column("updated_at", mssql.DATETIMEOFFSET, server_default=sa.text("SYSDATETIMEOFFSET()"), nullable=False),
+    )
+    op.create_index("ix_job_runs_status_created_at", "job_runs", ["status", "created_at"])
+
+    op.create_table(
+        "job_locks",
+        sa.Column("name", sa.String(length=100), primary_key=True),
+        sa.Column("owner", sa.String(length=200), nullable=False),
+        sa.Column("expires_at", mssql.DATETIMEOFFSET, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_locks")
+    op.drop_index("ix_job_runs_status_created_at", table_name="job_runs")
+    op.drop_table("job_runs")
@@ -0,0 +1,27 @@
+"""alert filter indexes
+
+Revision ID: 0004_alert_filter_indexes
+Revises: 0003_job_runs
+Create Date: 2024-03-01 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004_alert_filter_indexes"
+down_revision = "0003_job_runs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_alerts_status_due_date", "alerts", ["status", "due_date"])
+    op.create_index("ix_alerts_machine_id_status", "alerts", ["machine_id", "status"])
+    # Covered by the leading column of ix_alerts_status_due_date.
+    op.drop_index("ix_alerts_status", table_name="alerts")
+
+
+def downgrade() -> None:
+    op.create_index("ix_alerts_status", "alerts", ["status"])
+    op.drop_index("ix_alerts_machine_id_status", table_name="alerts")
+    op.drop_index("ix_alerts_status_due_date", table_name="alerts")
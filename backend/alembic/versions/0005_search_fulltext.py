@@ -0,0 +1,59 @@
+"""full-text search indexes
+
+Revision ID: 0005_search_fulltext
+Revises: 0004_alert_filter_indexes
+Create Date: 2024-03-10 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_search_fulltext"
+down_revision = "0004_alert_filter_indexes"
+branch_labels = None
+depends_on = None
+
+CATALOG = "ft_search"
+FULLTEXT_COLUMNS = {
+    "accounts": ["name", "account_number", "email"],
+    "contacts": ["first_name", "last_name", "display_name", "email"],
+    "locations": ["location_code", "name", "city"],
+    "machines": ["machine_number", "machine_name"],
+}
+
+
+def _create_index(table: str, columns: list) -> str:
+    return f"""
+    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('{table}'))
+    BEGIN
+        DECLARE @pk_{table} sysname = (
+            SELECT name FROM sys.indexes WHERE object_id = OBJECT_ID('{table}') AND is_primary_key = 1
+        );
+        EXEC('CREATE FULLTEXT INDEX ON {table} ({", ".join(columns)}) KEY INDEX ' + QUOTENAME(@pk_{table})
+            + ' ON {CATALOG} WITH CHANGE_TRACKING AUTO');
+    END;"""
+
+
+def upgrade() -> None:
+    # Full-text DDL cannot run inside a transaction, and the feature is
+    # optional on SQL Server; without it /search uses the in-process index.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1\nBEGIN\n"
+            f"    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = '{CATALOG}')"
+            f" CREATE FULLTEXT CATALOG {CATALOG};"
+            + "".join(_create_index(table, columns) for table, columns in FULLTEXT_COLUMNS.items())
+            + "\nEND"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in FULLTEXT_COLUMNS:
+            op.execute(
+                f"IF EXISTS (SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('{table}')) "
+                f"DROP FULLTEXT INDEX ON {table};"
+            )
+        op.execute(
+            f"IF EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = '{CATALOG}') DROP FULLTEXT CATALOG {CATALOG};"
+        )
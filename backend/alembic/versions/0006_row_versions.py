@@ -0,0 +1,30 @@
+"""rowversion columns for the changes feed
+
+Revision ID: 0006_row_versions
+Revises: 0005_search_fulltext
+Create Date: 2024-03-20 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision = "0006_row_versions"
+down_revision = "0005_search_fulltext"
+branch_labels = None
+depends_on = None
+
+TABLES = ("accounts", "contacts", "locations", "machines", "alerts")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column("row_version", mssql.ROWVERSION, nullable=False))
+        op.create_index(f"ix_{table}_row_version", table, ["row_version"])
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_row_version", table_name=table)
+        op.drop_column(table, "row_version")
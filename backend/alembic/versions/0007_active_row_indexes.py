@@ -0,0 +1,52 @@
+"""filtered indexes for live-row lists and Boomi lookups
+
+Revision ID: 0007_active_row_indexes
+Revises: 0006_row_versions
+Create Date: 2024-04-01 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007_active_row_indexes"
+down_revision = "0006_row_versions"
+branch_labels = None
+depends_on = None
+
+ACTIVE_INDEXES = [
+    ("ix_accounts_active_name", "accounts", ["name", "id"]),
+    ("ix_contacts_active_last_name", "contacts", ["last_name", "id"]),
+    ("ix_contacts_active_account_id_last_name", "contacts", ["account_id", "last_name", "id"]),
+    ("ix_locations_active_name", "locations", ["name", "id"]),
+    ("ix_locations_active_account_id_name", "locations", ["account_id", "name", "id"]),
+    ("ix_machines_active_machine_name", "machines", ["machine_name", "id"]),
+    ("ix_machines_active_account_id_machine_name", "machines", ["account_id", "machine_name", "id"]),
+]
+EXTERNAL_ID_TABLES = ("contacts", "locations", "machines")
+
+
+def upgrade() -> None:
+    for name, table, columns in ACTIVE_INDEXES:
+        op.create_index(
+            name,
+            table,
+            columns,
+            mssql_where=sa.text("is_deleted = 0"),
+            mssql_include=["updated_at"],
+        )
+    for table in EXTERNAL_ID_TABLES:
+        op.create_index(
+            f"ix_{table}_external_id",
+            table,
+            ["external_id"],
+            mssql_where=sa.text("external_id IS NOT NULL"),
+            mssql_include=["sync_hash"],
+        )
+
+
+def downgrade() -> None:
+    for table in EXTERNAL_ID_TABLES:
+        op.drop_index(f"ix_{table}_external_id", table_name=table)
+    for name, table, _ in ACTIVE_INDEXES:
+        op.drop_index(name, table_name=table)
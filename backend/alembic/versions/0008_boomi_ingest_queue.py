@@ -0,0 +1,54 @@
+"""boomi ingest queue
+
+Revision ID: 0008_boomi_ingest_queue
+Revises: 0007_active_row_indexes
+Create Date: 2024-04-10 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision = "0008_boomi_ingest_queue"
+down_revision = "0007_active_row_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "boomi_ingest_chunks",
+        sa.Column("id", sa.BigInteger(), sa.Identity(start=1, increment=1), primary_key=True),
+        sa.Column("batch_id", mssql.UNIQUEIDENTIFIER, nullable=False),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=20), server_default=sa.text("'QUEUED'"), nullable=False),
+        sa.Column("records", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("updated_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("skipped_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("error_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("error_results", sa.Text()),
+        sa.Column("attempts", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("error", sa.Text()),
+        sa.Column("worker", sa.String(length=200)),
+        sa.Column("available_at", mssql.DATETIMEOFFSET),
+        sa.Column("started_at", mssql.DATETIMEOFFSET),
+        sa.Column("finished_at", mssql.DATETIMEOFFSET),
+        sa.Column("created_at", mssql.DATETIMEOFFSET, server_default=sa.text("SYSDATETIMEOFFSET()"), nullable=False),
+        sa.Column("updated_at", mssql.DATETIMEOFFSET, server_default=sa.text("SYSDATETIMEOFFSET()"), nullable=False),
+    )
+    op.create_index(
+        "ix_boomi_ingest_chunks_status_id",
+        "boomi_ingest_chunks",
+        ["status", "id"],
+        mssql_include=["entity", "records"],
+    )
+    op.create_index("ix_boomi_ingest_chunks_batch_id", "boomi_ingest_chunks", ["batch_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_boomi_ingest_chunks_batch_id", table_name="boomi_ingest_chunks")
+    op.drop_index("ix_boomi_ingest_chunks_status_id", table_name="boomi_ingest_chunks")
+    op.drop_table("boomi_ingest_chunks")
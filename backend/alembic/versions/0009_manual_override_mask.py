@@ -0,0 +1,86 @@
+"""manual override bitmask
+
+Revision ID: 0009_manual_override_mask
+Revises: 0008_boomi_ingest_queue
+Create Date: 2024-04-20 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0009_manual_override_mask"
+down_revision = "0008_boomi_ingest_queue"
+branch_labels = None
+depends_on = None
+
+# Bit positions as of this revision (``OVERRIDABLE_COLUMNS`` on the models).
+OVERRIDABLE_COLUMNS = {
+    "accounts": (
+        "account_number",
+        "name",
+        "phone",
+        "email",
+        "website",
+        "language",
+        "is_solvable",
+        "billing_street",
+        "billing_house_number",
+        "billing_postal_code",
+        "billing_city",
+        "billing_country",
+    ),
+    "contacts": ("account_id", "first_name", "last_name", "display_name", "email", "phone", "role", "is_primary"),
+    "locations": (
+        "account_id",
+        "location_code",
+        "name",
+        "street",
+        "house_number",
+        "postal_code",
+        "city",
+        "country",
+        "geo_lat",
+        "geo_lng",
+    ),
+    "machines": (
+        "account_id",
+        "location_id",
+        "machine_name",
+        "machine_number",
+        "status",
+        "product_category",
+        "family_name",
+        "family_code",
+        "installation_date",
+        "warranty_months",
+        "warranty_end_date",
+        "warranty_type",
+    ),
+}
+
+
+def upgrade() -> None:
+    for table, columns in OVERRIDABLE_COLUMNS.items():
+        op.add_column(
+            table,
+            sa.Column("manual_override_mask", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        )
+        bits = ", ".join(f"('{name}', CAST({1 << position} AS BIGINT))" for position, name in enumerate(columns))
+        op.execute(
+            f"""
+            UPDATE t SET manual_override_mask = COALESCE((
+                SELECT SUM(DISTINCT c.bit)
+                FROM OPENJSON(t.manual_override_fields) AS j
+                JOIN (VALUES {bits}) AS c(name, bit) ON c.name = j.[value]
+            ), 0)
+            FROM {table} AS t
+            WHERE ISJSON(t.manual_override_fields) = 1
+              AND LEFT(LTRIM(t.manual_override_fields), 1) = '['
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in OVERRIDABLE_COLUMNS:
+        op.drop_column(table, "manual_override_mask", mssql_drop_default=True)
@@ -0,0 +1,23 @@
+"""ingest chunks waiting for parents
+
+Revision ID: 0010_ingest_waiting_ids
+Revises: 0009_manual_override_mask
+Create Date: 2024-04-27 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0010_ingest_waiting_ids"
+down_revision = "0009_manual_override_mask"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("boomi_ingest_chunks", sa.Column("waiting_external_ids", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("boomi_ingest_chunks", "waiting_external_ids")
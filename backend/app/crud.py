@@ -1,27 +1,38 @@
-import json
-from datetime import datetime
-from typing import Any, Dict, Optional, Tuple, Type
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
 
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 
 from . import models
+from .db import commit_keeping
+from .services.entity_cache import get_entity_cache
+from .services.sync_cache import get_sync_index
+from .utils.bulk import chunked
+from .utils.metrics import REGISTRY
+from .utils.overrides import override_bits
+from .utils.pagination import CountCache, paginate
+from .utils.projection import columns_for
+from .utils.time import today
 
+BOOMI_UPSERTS = REGISTRY.counter(
+    "boomi_upserts_total",
+    "Boomi upserts by entity and outcome (created, updated, skipped, error).",
+    ("model", "outcome"),
+)
 
-def _parse_manual_overrides(record: Any) -> set:
-    if not record or not record.manual_override_fields:
-        return set()
-    try:
-        data = json.loads(record.manual_override_fields)
-        if isinstance(data, list):
-            return set(data)
-    except json.JSONDecodeError:
-        return set()
-    return set()
+_alert_counts = CountCache(float(os.getenv("ALERT_COUNT_TTL_SECONDS", "30")))
 
 
 def _apply_manual_overrides(record: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
-    overrides = _parse_manual_overrides(record)
-    return {key: value for key, value in payload.items() if key not in overrides}
+    """``payload`` without the columns the record's ``manual_override_mask`` protects."""
+    mask = record.manual_override_mask if record else 0
+    if not mask:
+        return dict(payload)
+    bits = override_bits(type(record).OVERRIDABLE_COLUMNS)
+    return {key: value for key, value in payload.items() if not mask & bits.get(key, 0)}
 
 
 def _sync_metadata(payload: Dict[str, Any], sync_hash: str) -> Dict[str, Any]:
@@ -31,111 +42,293 @@ def _sync_metadata(payload: Dict[str, Any], sync_hash: str) -> Dict[str, Any]:
     return payload
 
 
-def list_accounts(db: Session, search: Optional[str] = None):
+def _read_through(db: Session, model: Type[Any], record_id: str, load: Callable[[], Any]):
+    """Serve ``get_*`` from the entity cache, falling back to ``load`` on a miss."""
+    cache = get_entity_cache(model)
+    if cache is None:
+        return load()
+    record = cache.get(db, record_id)
+    if record is not None:
+        return record
+    generation = cache.generation()
+    record = load()
+    if record is not None:
+        cache.put(record, generation)
+    return record
+
+
+def _project(query, model: Type[Any], fields: Optional[Sequence[str]], *keys: Any):
+    """Select only ``fields`` (plus the pagination ``keys``) as plain rows instead of ORM instances."""
+    if not fields:
+        return query
+    return query.with_entities(*columns_for(model, fields, keys))
+
+
+def _table_version(db: Session, model: Type[Any]) -> Tuple[Any, ...]:
+    """Marker that changes whenever a row of ``model``'s table is written, for list ETags.
+
+    On SQL Server this is the newest ``row_version``, a single seek on
+    ``ix_<table>_row_version``. While ``MIN_ACTIVE_ROWVERSION()`` is at or
+    below it, an open transaction may still commit rows under that maximum,
+    so the horizon becomes part of the marker until it moves past. Backends
+    without row versions fall back to ``COUNT(*)``/``MAX(updated_at)`` over
+    the table.
+    """
+    if db.get_bind().dialect.name == "mssql":
+        newest, horizon = db.execute(select(func.max(model.row_version), func.min_active_rowversion())).one()
+        if newest is None:
+            return (model.__tablename__, 0)
+        if horizon is not None and horizon <= newest:
+            return (model.__tablename__, newest.hex(), horizon.hex())
+        return (model.__tablename__, newest.hex())
+    count, last_updated = db.query(func.count(model.id), func.max(model.updated_at)).one()
+    return (model.__tablename__, count, last_updated)
+
+
+def _list_version(db: Session, *tables: Type[Any]) -> Tuple[Any, ...]:
+    return tuple(part for model in tables for part in _table_version(db, model))
+
+
+def list_accounts(
+    db: Session,
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    sort_column, id_column = models.Account.name, models.Account.id
+    query = _project(_accounts_query(db, search), models.Account, fields, sort_column, id_column)
+    return paginate(query, sort_column, id_column, cursor, limit)
+
+
+def _accounts_query(db: Session, search: Optional[str] = None):
     query = db.query(models.Account).filter(models.Account.is_deleted == False)  # noqa: E712
     if search:
         query = query.filter(models.Account.name.ilike(f"%{search}%"))
-    return query.order_by(models.Account.name).all()
+    return query
+
+
+def list_accounts_version(db: Session):
+    return _list_version(db, models.Account)
 
 
 def get_account(db: Session, account_id: str):
-    return db.query(models.Account).filter(models.Account.id == account_id, models.Account.is_deleted == False).first()  # noqa: E712
+    return _read_through(
+        db,
+        models.Account,
+        account_id,
+        lambda: db.query(models.Account).filter(models.Account.id == account_id, models.Account.is_deleted == False).first(),  # noqa: E712
+    )
 
 
 def create_account(db: Session, data: Dict[str, Any]):
     account = models.Account(**data)
     db.add(account)
-    db.commit()
-    db.refresh(account)
+    commit_keeping(db, account)
     return account
 
 
 def update_account(db: Session, account: models.Account, data: Dict[str, Any]):
     for key, value in data.items():
         setattr(account, key, value)
-    db.commit()
-    db.refresh(account)
+    commit_keeping(db, account)
     return account
 
 
-def list_contacts(db: Session, account_id: Optional[str] = None):
+def get_account_overview(db: Session, account_id: str, limit: int) -> Optional[Dict[str, Any]]:
+    """Everything the account page shows, read in one session.
+
+    Each section is capped at ``limit`` rows and all totals come from a single
+    statement of scalar subqueries. The sections go through the ``list_*``
+    queries rather than ``selectinload``, which cannot cap a collection and
+    would skip the soft-delete filters and derived machine fields.
+    """
+    account = get_account(db, account_id)
+    if not account:
+        return None
+    contacts, _ = list_contacts(db, account_id, limit)
+    locations, _ = list_locations(db, account_id, limit)
+    machines, _ = list_machines(db, account_id, limit)
+    alerts, _ = list_alerts(db, "OPEN", limit, account_id=account_id)
+
+    def _count(model: Any):
+        return (
+            select(func.count(model.id))
+            .where(model.account_id == account_id, model.is_deleted == False)  # noqa: E712
+            .scalar_subquery()
+        )
+
+    open_alerts = (
+        select(func.count(models.Alert.id))
+        .join(models.Machine, models.Alert.machine_id == models.Machine.id)
+        .where(
+            models.Machine.account_id == account_id,
+            models.Machine.is_deleted == False,  # noqa: E712
+            models.Alert.status == "OPEN",
+        )
+        .scalar_subquery()
+    )
+    counts = db.execute(
+        select(
+            _count(models.Contact).label("contacts"),
+            _count(models.Location).label("locations"),
+            _count(models.Machine).label("machines"),
+            open_alerts.label("open_alerts"),
+        )
+    ).one()
+    return {
+        "account": account,
+        "contacts": contacts,
+        "locations": locations,
+        "machines": machines,
+        "open_alerts": alerts,
+        "counts": dict(counts._mapping),
+    }
+
+
+def list_contacts(
+    db: Session,
+    account_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    sort_column, id_column = models.Contact.last_name, models.Contact.id
+    query = _project(_contacts_query(db, account_id), models.Contact, fields, sort_column, id_column)
+    return paginate(query, sort_column, id_column, cursor, limit)
+
+
+def _contacts_query(db: Session, account_id: Optional[str] = None):
     query = db.query(models.Contact).filter(models.Contact.is_deleted == False)  # noqa: E712
     if account_id:
         query = query.filter(models.Contact.account_id == account_id)
-    return query.order_by(models.Contact.last_name).all()
+    return query
+
+
+def list_contacts_version(db: Session):
+    return _list_version(db, models.Contact)
 
 
 def get_contact(db: Session, contact_id: str):
-    return db.query(models.Contact).filter(models.Contact.id == contact_id, models.Contact.is_deleted == False).first()  # noqa: E712
+    return _read_through(
+        db,
+        models.Contact,
+        contact_id,
+        lambda: db.query(models.Contact).filter(models.Contact.id == contact_id, models.Contact.is_deleted == False).first(),  # noqa: E712
+    )
 
 
 def create_contact(db: Session, data: Dict[str, Any]):
     contact = models.Contact(**data)
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    commit_keeping(db, contact)
     return contact
 
 
 def update_contact(db: Session, contact: models.Contact, data: Dict[str, Any]):
     for key, value in data.items():
         setattr(contact, key, value)
-    db.commit()
-    db.refresh(contact)
+    commit_keeping(db, contact)
     return contact
 
 
-def list_locations(db: Session, account_id: Optional[str] = None):
+def list_locations(
+    db: Session,
+    account_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    sort_column, id_column = models.Location.name, models.Location.id
+    query = _project(_locations_query(db, account_id), models.Location, fields, sort_column, id_column)
+    return paginate(query, sort_column, id_column, cursor, limit)
+
+
+def _locations_query(db: Session, account_id: Optional[str] = None):
     query = db.query(models.Location).filter(models.Location.is_deleted == False)  # noqa: E712
     if account_id:
         query = query.filter(models.Location.account_id == account_id)
-    return query.order_by(models.Location.name).all()
+    return query
+
+
+def list_locations_version(db: Session):
+    return _list_version(db, models.Location)
 
 
 def get_location(db: Session, location_id: str):
-    return db.query(models.Location).filter(models.Location.id == location_id, models.Location.is_deleted == False).first()  # noqa: E712
+    return _read_through(
+        db,
+        models.Location,
+        location_id,
+        lambda: db.query(models.Location).filter(models.Location.id == location_id, models.Location.is_deleted == False).first(),  # noqa: E712
+    )
 
 
 def create_location(db: Session, data: Dict[str, Any]):
     location = models.Location(**data)
     db.add(location)
-    db.commit()
-    db.refresh(location)
+    commit_keeping(db, location)
     return location
 
 
 def update_location(db: Session, location: models.Location, data: Dict[str, Any]):
     for key, value in data.items():
         setattr(location, key, value)
-    db.commit()
-    db.refresh(location)
+    commit_keeping(db, location)
     return location
 
 
-def list_machines(db: Session, account_id: Optional[str] = None):
+def list_machines(
+    db: Session,
+    account_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    sort_column, id_column = models.Machine.machine_name, models.Machine.id
+    keys = [sort_column, id_column]
+    if fields and "warranty_end_date" in fields:
+        # Derived from these when not stored; see schemas.derive_warranty_end_date.
+        keys += [models.Machine.installation_date, models.Machine.warranty_months]
+    query = _project(_machines_query(db, account_id), models.Machine, fields, *keys)
+    return paginate(query, sort_column, id_column, cursor, limit)
+
+
+def _machines_query(db: Session, account_id: Optional[str] = None):
     query = db.query(models.Machine).filter(models.Machine.is_deleted == False)  # noqa: E712
     if account_id:
         query = query.filter(models.Machine.account_id == account_id)
-    return query.order_by(models.Machine.machine_name).all()
+    return query
+
+
+def list_machines_version(db: Session):
+    return _list_version(db, models.Machine)
+
+
+def export_machines_query(db: Session, account_id: Optional[str] = None):
+    return _machines_query(db, account_id).order_by(models.Machine.machine_name, models.Machine.id)
 
 
 def get_machine(db: Session, machine_id: str):
-    return db.query(models.Machine).filter(models.Machine.id == machine_id, models.Machine.is_deleted == False).first()  # noqa: E712
+    return _read_through(
+        db,
+        models.Machine,
+        machine_id,
+        lambda: db.query(models.Machine).filter(models.Machine.id == machine_id, models.Machine.is_deleted == False).first(),  # noqa: E712
+    )
 
 
 def create_machine(db: Session, data: Dict[str, Any]):
     machine = models.Machine(**data)
     db.add(machine)
-    db.commit()
-    db.refresh(machine)
+    commit_keeping(db, machine)
     return machine
 
 
 def update_machine(db: Session, machine: models.Machine, data: Dict[str, Any]):
     for key, value in data.items():
         setattr(machine, key, value)
-    db.commit()
-    db.refresh(machine)
+    commit_keeping(db, machine)
     return machine
 
 
@@ -150,64 +343,303 @@ def get_alert_rule(db: Session, rule_id: str):
 def create_alert_rule(db: Session, data: Dict[str, Any]):
     rule = models.AlertRule(**data)
     db.add(rule)
-    db.commit()
-    db.refresh(rule)
+    commit_keeping(db, rule)
     return rule
 
 
 def update_alert_rule(db: Session, rule: models.AlertRule, data: Dict[str, Any]):
     for key, value in data.items():
         setattr(rule, key, value)
-    db.commit()
-    db.refresh(rule)
+    commit_keeping(db, rule)
     return rule
 
 
-def list_alerts(db: Session, status: Optional[str] = None):
+def _alerts_query(
+    db: Session,
+    status: Optional[str] = None,
+    account_id: Optional[str] = None,
+    machine_id: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    due_before: Optional[date] = None,
+    due_after: Optional[date] = None,
+    snoozed: Optional[bool] = None,
+):
     query = db.query(models.Alert)
     if status:
         query = query.filter(models.Alert.status == status)
-    return query.order_by(models.Alert.alert_date.desc()).all()
+    if account_id:
+        query = query.join(models.Machine, models.Alert.machine_id == models.Machine.id).filter(
+            models.Machine.account_id == account_id,
+            models.Machine.is_deleted == False,  # noqa: E712
+        )
+    if machine_id:
+        query = query.filter(models.Alert.machine_id == machine_id)
+    if alert_type:
+        query = query.filter(models.Alert.alert_type == alert_type)
+    if assigned_to:
+        query = query.filter(models.Alert.assigned_to == assigned_to)
+    if due_before:
+        query = query.filter(models.Alert.due_date <= due_before)
+    if due_after:
+        query = query.filter(models.Alert.due_date >= due_after)
+    if snoozed is not None:
+        current = today()
+        if snoozed:
+            query = query.filter(models.Alert.snooze_until > current)
+        else:
+            query = query.filter(or_(models.Alert.snooze_until.is_(None), models.Alert.snooze_until <= current))
+    return query
+
+
+def list_alerts(
+    db: Session,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    **filters: Any,
+):
+    sort_column, id_column = models.Alert.alert_date, models.Alert.id
+    query = _project(_alerts_query(db, status, **filters), models.Alert, fields, sort_column, id_column)
+    return paginate(query, sort_column, id_column, cursor, limit, descending=True)
+
+
+def list_alerts_version(db: Session, account_id: Optional[str] = None, **filters: Any):
+    # The account filter goes through machines, so reassigning a machine changes the list too.
+    return _list_version(db, models.Alert, models.Machine) if account_id else _list_version(db, models.Alert)
+
+
+def count_alerts(db: Session, status: Optional[str] = None, **filters: Any) -> int:
+    """Total for the alerts inbox, cached for ``ALERT_COUNT_TTL_SECONDS``."""
+    return _alert_counts.get_or_compute(
+        ("alerts", status, tuple(sorted(filters.items()))),
+        lambda: _alerts_query(db, status, **filters).with_entities(func.count(models.Alert.id)).scalar() or 0,
+    )
+
+
+def export_alerts_query(db: Session, status: Optional[str] = None, **filters: Any):
+    return _alerts_query(db, status, **filters).order_by(models.Alert.alert_date.desc(), models.Alert.id.desc())
 
 
 def get_alert(db: Session, alert_id: str):
-    return db.query(models.Alert).filter(models.Alert.id == alert_id).first()
+    return _read_through(
+        db,
+        models.Alert,
+        alert_id,
+        lambda: db.query(models.Alert).filter(models.Alert.id == alert_id).first(),
+    )
 
 
 def update_alert(db: Session, alert: models.Alert, data: Dict[str, Any]):
     for key, value in data.items():
         setattr(alert, key, value)
-    db.commit()
-    db.refresh(alert)
+    commit_keeping(db, alert)
+    _alert_counts.clear()
     return alert
 
 
+def _apply_boomi_update(record: Any, payload: Dict[str, Any], sync_hash: str) -> None:
+    update_payload = _apply_manual_overrides(record, payload)
+    update_payload.pop("last_modified", None)
+    update_payload = _sync_metadata(update_payload, sync_hash)
+    for key, value in update_payload.items():
+        setattr(record, key, value)
+
+
+def _new_boomi_record(model: Type[Any], payload: Dict[str, Any], sync_hash: str) -> Any:
+    create_payload = payload.copy()
+    create_payload.pop("last_modified", None)
+    create_payload = _sync_metadata(create_payload, sync_hash)
+    return model(**create_payload)
+
+
+# Parents Boomi may reference by their external id instead of our internal one.
+EXTERNAL_REFERENCES = (
+    ("account_external_id", "account_id", models.Account),
+    ("location_external_id", "location_id", models.Location),
+)
+
+
+def resolve_external_references(
+    db: Session,
+    payloads: Sequence[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Optional[str]]]:
+    """Copies of ``payloads`` with ``account_external_id``/``location_external_id`` swapped for internal ids.
+
+    Ids come from the parent's sync index when it knows the external id; the
+    rest are looked up with one ``IN (...)`` query per parent table and
+    remembered. Also returns, per payload, the first reference that could not
+    be resolved (``None`` when all were), as its parent may not exist yet.
+    """
+    resolved = [dict(payload) for payload in payloads]
+    unresolved: List[Optional[str]] = [None] * len(resolved)
+    for reference_key, id_key, parent in EXTERNAL_REFERENCES:
+        wanted = {payload[reference_key] for payload in resolved if payload.get(reference_key)}
+        if not wanted:
+            continue
+        index = get_sync_index(parent)
+        ids: Dict[str, str] = {}
+        for external_id in wanted:
+            cached = index.get(external_id)
+            if cached:
+                ids[external_id] = cached[0]
+        for chunk in chunked(sorted(wanted - set(ids)), 1000):
+            rows = db.query(parent.external_id, parent.id, parent.sync_hash, parent.last_synced_at).filter(
+                parent.external_id.in_(chunk)
+            )
+            for external_id, record_id, sync_hash, synced_at in rows:
+                ids[external_id] = str(record_id)
+                index.put(external_id, record_id, sync_hash, synced_at)
+        for position, payload in enumerate(resolved):
+            external_id = payload.pop(reference_key, None)
+            if not external_id:
+                continue
+            if external_id in ids:
+                payload[id_key] = ids[external_id]
+            elif unresolved[position] is None:
+                unresolved[position] = f"{reference_key} {external_id} not found"
+    return resolved, unresolved
+
+
+def _is_unchanged(current_hash: Optional[str], sync_hash: str) -> bool:
+    return current_hash is not None and current_hash == sync_hash
+
+
 def boomi_upsert(
     db: Session,
     model: Type[Any],
     payload: Dict[str, Any],
     sync_hash: str,
-) -> Tuple[Any, bool]:
+) -> Tuple[str, bool]:
+    """Create or update the record with ``payload["external_id"]``.
+
+    Returns ``(record_id, skipped)``. Unchanged payloads are answered from the
+    sync hash cache without touching the database when possible.
+    """
+    record_id, status = _boomi_upsert(db, model, payload, sync_hash)
+    BOOMI_UPSERTS.inc(model=model.__tablename__, outcome=status)
+    return record_id, status == "skipped"
+
+
+def _boomi_upsert(db: Session, model: Type[Any], payload: Dict[str, Any], sync_hash: str) -> Tuple[str, str]:
     external_id = payload.get("external_id")
     if not external_id:
         raise ValueError("external_id is required")
+    index = get_sync_index(model)
+    cached = index.get(external_id)
+    if cached and _is_unchanged(cached[1], sync_hash):
+        return cached[0], "skipped"
     record = db.query(model).filter(model.external_id == external_id).first()
     if record:
-        if payload.get("last_modified") and record.sync_hash == sync_hash:
-            return record, True
-        update_payload = _apply_manual_overrides(record, payload)
-        update_payload.pop("last_modified", None)
-        update_payload = _sync_metadata(update_payload, sync_hash)
-        for key, value in update_payload.items():
-            setattr(record, key, value)
-        db.commit()
-        db.refresh(record)
-        return record, False
-    create_payload = payload.copy()
-    create_payload.pop("last_modified", None)
-    create_payload = _sync_metadata(create_payload, sync_hash)
-    record = model(**create_payload)
+        if _is_unchanged(record.sync_hash, sync_hash):
+            index.put(external_id, record.id, record.sync_hash, record.last_synced_at)
+            return str(record.id), "skipped"
+        _apply_boomi_update(record, payload, sync_hash)
+        commit_keeping(db, record)
+        index.put(external_id, record.id, record.sync_hash, record.last_synced_at)
+        return str(record.id), "updated"
+    record = _new_boomi_record(model, payload, sync_hash)
     db.add(record)
-    db.commit()
-    db.refresh(record)
-    return record, False
+    commit_keeping(db, record)
+    index.put(external_id, record.id, record.sync_hash, record.last_synced_at)
+    return str(record.id), "created"
+
+
+def boomi_bulk_upsert(
+    db: Session,
+    model: Type[Any],
+    items: List[Tuple[Dict[str, Any], str]],
+) -> List[Dict[str, Any]]:
+    """Upsert a chunk of ``(payload, sync_hash)`` pairs in one transaction.
+
+    Payloads the sync hash cache already knows as unchanged are skipped up
+    front; the remaining existing records are resolved with a single
+    ``IN (...)`` lookup on ``external_id`` and all inserts/updates are flushed
+    together. If the database rejects the chunk (a constraint, or a value a
+    column cannot hold) it is rolled back and replayed record by record so
+    only the offending payloads are reported as errors. Returns one ``{"status", "id", "error"}`` dict per item, in order.
+    """
+    results = _boomi_bulk_upsert(db, model, items)
+    _count_boomi_outcomes(model, results)
+    return results
+
+
+def _boomi_bulk_upsert(
+    db: Session,
+    model: Type[Any],
+    items: List[Tuple[Dict[str, Any], str]],
+) -> List[Dict[str, Any]]:
+    index = get_sync_index(model)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    to_write = []
+    for position, (payload, sync_hash) in enumerate(items):
+        cached = index.get(payload["external_id"])
+        if cached and _is_unchanged(cached[1], sync_hash):
+            results[position] = {"status": "skipped", "id": cached[0], "error": None}
+        else:
+            to_write.append(position)
+    if not to_write:
+        return results
+    external_ids = list({items[position][0]["external_id"] for position in to_write})
+    existing = {
+        record.external_id: record
+        for record in db.query(model).filter(model.external_id.in_(external_ids))
+    }
+    pending = []
+    for position in to_write:
+        payload, sync_hash = items[position]
+        record = existing.get(payload["external_id"])
+        if record is None:
+            record = _new_boomi_record(model, payload, sync_hash)
+            db.add(record)
+            existing[payload["external_id"]] = record
+            pending.append((position, record, "created"))
+        elif _is_unchanged(record.sync_hash, sync_hash):
+            pending.append((position, record, "skipped"))
+        else:
+            _apply_boomi_update(record, payload, sync_hash)
+            pending.append((position, record, "updated"))
+    try:
+        db.flush()
+        written = [
+            (position, record.external_id, str(record.id), record.sync_hash, record.last_synced_at, status)
+            for position, record, status in pending
+        ]
+        db.commit()
+    except DBAPIError as exc:
+        db.rollback()
+        if exc.connection_invalidated:
+            raise
+        for position in to_write:
+            payload, sync_hash = items[position]
+            results[position] = _boomi_upsert_isolated(db, model, payload, sync_hash)
+        return results
+    for position, external_id, record_id, record_hash, synced_at, status in written:
+        index.put(external_id, record_id, record_hash, synced_at)
+        results[position] = {"status": status, "id": record_id, "error": None}
+    return results
+
+
+def _count_boomi_outcomes(model: Type[Any], results: List[Dict[str, Any]]) -> None:
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    for status, count in counts.items():
+        BOOMI_UPSERTS.inc(count, model=model.__tablename__, outcome=status)
+
+
+def _boomi_upsert_isolated(
+    db: Session,
+    model: Type[Any],
+    payload: Dict[str, Any],
+    sync_hash: str,
+) -> Dict[str, Any]:
+    try:
+        record_id, status = _boomi_upsert(db, model, payload, sync_hash)
+    except DBAPIError as exc:
+        db.rollback()
+        if exc.connection_invalidated:
+            raise
+        return {"status": "error", "id": None, "error": str(exc.orig)}
+    return {"status": status, "id": record_id, "error": None}
@@ -1,6 +1,19 @@
 import os
+import time
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url
+from typing import Any
+
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+
+from app.utils.metrics import REGISTRY
+
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
 
 
 def get_database_url() -> str:
@@ -10,11 +23,65 @@ def get_database_url() -> str:
     )
 
 
-engine = create_engine(get_database_url(), pool_pre_ping=True)
+class TimedQueuePool(QueuePool):
+    """``QueuePool`` that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _engine_options(url: str) -> dict:
+    # SQLite keeps its own default pools (in-memory databases need a single connection).
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {"poolclass": TimedQueuePool}
+
+
+engine = create_engine(get_database_url(), pool_pre_ping=True, **_engine_options(get_database_url()))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _pool_stat(read):
+    def collect():
+        return {(): read(engine.pool)} if isinstance(engine.pool, QueuePool) else {}
+
+    return collect
+
+
+REGISTRY.gauge("db_pool_size", "Configured size of the connection pool.", collect=_pool_stat(lambda pool: pool.size()))
+REGISTRY.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    collect=_pool_stat(lambda pool: pool.checkedout()),
+)
+REGISTRY.gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size.",
+    collect=_pool_stat(lambda pool: max(pool.overflow(), 0)),
+)
+
+
+def commit_keeping(db: Session, *records: Any) -> None:
+    """Commit without expiring ``records``: they sit out the commit detached and are added back.
+
+    Their server-generated values already came back with the flush
+    (``eager_defaults``), so callers can keep reading them without the
+    SELECT a refresh would cost. Everything else still expires on commit.
+    """
+    db.flush()
+    kept = [record for record in records if record in db]
+    for record in kept:
+        db.expunge(record)
+    db.commit()
+    for record in kept:
+        db.add(record)
+
+
 def get_session():
     db = SessionLocal()
     try:
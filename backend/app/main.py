@@ -1,38 +1,82 @@
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import (
     accounts,
     alerts,
     alert_rules,
+    changes,
     contacts,
     integrations_boomi,
     jobs,
     locations,
     machines,
+    metrics,
+    monitoring,
+    search,
 )
+from app.services import query_stats
+from app.services.idempotency import IdempotencyMiddleware
+from app.services.ingest_queue import ingest_workers
+from app.services.request_metrics import RequestMetricsMiddleware
+from app.services.scheduler import scheduler, scheduler_enabled
+from app.services.search_index import start_search_warmup
+from app.services.sync_cache import start_warmup
+from app.utils.etags import ETAG_HEADER
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("machine-mgmt")
 
 app = FastAPI(title="Machine Management POC")
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        NEXT_CURSOR_HEADER,
+        ETAG_HEADER,
+        query_stats.QUERY_COUNT_HEADER,
+        query_stats.SERVER_TIMING_HEADER,
+    ],
 )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info("%s %s", request.method, request.url.path)
-    response = await call_next(request)
-    logger.info("%s %s -> %s", request.method, request.url.path, response.status_code)
-    return response
+@app.on_event("startup")
+def start_scheduler():
+    if scheduler_enabled():
+        scheduler.start()
+
+
+@app.on_event("startup")
+def warm_sync_cache():
+    start_warmup()
+
+
+@app.on_event("startup")
+def warm_search_index():
+    start_search_warmup()
+
+
+@app.on_event("startup")
+def start_ingest_workers():
+    ingest_workers.start()
+
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    scheduler.stop()
+
+
+@app.on_event("shutdown")
+def stop_ingest_workers():
+    ingest_workers.stop()
 
 
 app.include_router(accounts.router, prefix="/accounts", tags=["accounts"])
@@ -43,3 +87,7 @@ app.include_router(alert_rules.router, prefix="/alert_rules", tags=["alert_rules
 app.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 app.include_router(integrations_boomi.router, prefix="/integrations/boomi", tags=["integrations"])
+app.include_router(changes.router, prefix="/changes", tags=["changes"])
+app.include_router(search.router, prefix="/search", tags=["search"])
+app.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
+app.include_router(metrics.router, prefix="/metrics", tags=["monitoring"])
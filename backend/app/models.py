@@ -1,15 +1,20 @@
 import uuid
+from typing import Tuple
+
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
     DateTime,
+    FetchedValue,
     ForeignKey,
     Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    event,
     func,
     text,
 )
@@ -17,9 +22,14 @@ from sqlalchemy.dialects import mssql
 from sqlalchemy.orm import relationship
 
 from .db import Base
+from .utils.overrides import encode_override_mask
 
 
 class TimestampMixin:
+    # Server-generated values come back in the INSERT/UPDATE itself
+    # (OUTPUT INSERTED.* / RETURNING) instead of a follow-up SELECT.
+    __mapper_args__ = {"eager_defaults": True}
+
     created_at = Column(
         mssql.DATETIMEOFFSET,
         nullable=False,
@@ -29,18 +39,49 @@ class TimestampMixin:
         mssql.DATETIMEOFFSET,
         nullable=False,
         server_default=func.sysdatetimeoffset(),
-        server_onupdate=func.sysdatetimeoffset(),
+        onupdate=func.sysdatetimeoffset(),
     )
 
 
+class ManualOverrideMixin:
+    # Bit i of manual_override_mask protects OVERRIDABLE_COLUMNS[i] from Boomi
+    # updates. The mask is stored, so only ever append to these tuples.
+    OVERRIDABLE_COLUMNS: Tuple[str, ...] = ()
+
+
 class SoftDeleteMixin:
     is_deleted = Column(Boolean, nullable=False, server_default=text("0"))
 
 
-class Account(Base, TimestampMixin, SoftDeleteMixin):
+class RowVersionMixin:
+    # SQL Server bumps the database-wide rowversion on every insert/update;
+    # the /changes feed reads rows in that order.
+    row_version = Column(
+        mssql.ROWVERSION,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+
+
+class Account(Base, TimestampMixin, SoftDeleteMixin, RowVersionMixin, ManualOverrideMixin):
     __tablename__ = "accounts"
+    OVERRIDABLE_COLUMNS = (
+        "account_number",
+        "name",
+        "phone",
+        "email",
+        "website",
+        "language",
+        "is_solvable",
+        "billing_street",
+        "billing_house_number",
+        "billing_postal_code",
+        "billing_city",
+        "billing_country",
+    )
 
-    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, server_default=text("NEWID()"))
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
     account_number = Column(String(50), nullable=False, unique=True)
     name = Column(String(200), nullable=False)
     phone = Column(String(50))
@@ -58,16 +99,27 @@ class Account(Base, TimestampMixin, SoftDeleteMixin):
     last_synced_at = Column(mssql.DATETIMEOFFSET)
     sync_hash = Column(String(64))
     manual_override_fields = Column(Text)
+    manual_override_mask = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
 
     contacts = relationship("Contact", back_populates="account", cascade="all, delete-orphan")
     locations = relationship("Location", back_populates="account", cascade="all, delete-orphan")
     machines = relationship("Machine", back_populates="account", cascade="all, delete-orphan")
 
 
-class Contact(Base, TimestampMixin, SoftDeleteMixin):
+class Contact(Base, TimestampMixin, SoftDeleteMixin, RowVersionMixin, ManualOverrideMixin):
     __tablename__ = "contacts"
+    OVERRIDABLE_COLUMNS = (
+        "account_id",
+        "first_name",
+        "last_name",
+        "display_name",
+        "email",
+        "phone",
+        "role",
+        "is_primary",
+    )
 
-    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, server_default=text("NEWID()"))
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
     account_id = Column(mssql.UNIQUEIDENTIFIER, ForeignKey("accounts.id"), nullable=False)
     first_name = Column(String(100))
     last_name = Column(String(100))
@@ -81,14 +133,27 @@ class Contact(Base, TimestampMixin, SoftDeleteMixin):
     last_synced_at = Column(mssql.DATETIMEOFFSET)
     sync_hash = Column(String(64))
     manual_override_fields = Column(Text)
+    manual_override_mask = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
 
     account = relationship("Account", back_populates="contacts")
 
 
-class Location(Base, TimestampMixin, SoftDeleteMixin):
+class Location(Base, TimestampMixin, SoftDeleteMixin, RowVersionMixin, ManualOverrideMixin):
     __tablename__ = "locations"
+    OVERRIDABLE_COLUMNS = (
+        "account_id",
+        "location_code",
+        "name",
+        "street",
+        "house_number",
+        "postal_code",
+        "city",
+        "country",
+        "geo_lat",
+        "geo_lng",
+    )
 
-    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, server_default=text("NEWID()"))
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
     account_id = Column(mssql.UNIQUEIDENTIFIER, ForeignKey("accounts.id"), nullable=False)
     location_code = Column(String(50), nullable=False, unique=True)
     name = Column(String(200))
@@ -104,15 +169,30 @@ class Location(Base, TimestampMixin, SoftDeleteMixin):
     last_synced_at = Column(mssql.DATETIMEOFFSET)
     sync_hash = Column(String(64))
     manual_override_fields = Column(Text)
+    manual_override_mask = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
 
     account = relationship("Account", back_populates="locations")
     machines = relationship("Machine", back_populates="location")
 
 
-class Machine(Base, TimestampMixin, SoftDeleteMixin):
+class Machine(Base, TimestampMixin, SoftDeleteMixin, RowVersionMixin, ManualOverrideMixin):
     __tablename__ = "machines"
+    OVERRIDABLE_COLUMNS = (
+        "account_id",
+        "location_id",
+        "machine_name",
+        "machine_number",
+        "status",
+        "product_category",
+        "family_name",
+        "family_code",
+        "installation_date",
+        "warranty_months",
+        "warranty_end_date",
+        "warranty_type",
+    )
 
-    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, server_default=text("NEWID()"))
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
     account_id = Column(mssql.UNIQUEIDENTIFIER, ForeignKey("accounts.id"), nullable=False)
     location_id = Column(mssql.UNIQUEIDENTIFIER, ForeignKey("locations.id"), nullable=True)
     machine_name = Column(String(200), nullable=False)
@@ -130,16 +210,25 @@ class Machine(Base, TimestampMixin, SoftDeleteMixin):
     last_synced_at = Column(mssql.DATETIMEOFFSET)
     sync_hash = Column(String(64))
     manual_override_fields = Column(Text)
+    manual_override_mask = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
 
     account = relationship("Account", back_populates="machines")
     location = relationship("Location", back_populates="machines")
     alerts = relationship("Alert", back_populates="machine", cascade="all, delete-orphan")
 
 
+def _sync_override_mask(target, value, oldvalue, initiator):
+    target.manual_override_mask = encode_override_mask(type(target).OVERRIDABLE_COLUMNS, value)
+
+
+for _model in (Account, Contact, Location, Machine):
+    event.listen(_model.manual_override_fields, "set", _sync_override_mask)
+
+
 class AlertRule(Base, TimestampMixin):
     __tablename__ = "alert_rules"
 
-    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, server_default=text("NEWID()"))
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
     name = Column(String(100), nullable=False)
     trigger = Column(String(50), nullable=False)
     offset_days = Column(Integer, nullable=False)
@@ -147,13 +236,13 @@ class AlertRule(Base, TimestampMixin):
     channels = Column(String(50))
 
 
-class Alert(Base, TimestampMixin):
+class Alert(Base, TimestampMixin, RowVersionMixin):
     __tablename__ = "alerts"
     __table_args__ = (
         UniqueConstraint("machine_id", "alert_type", "alert_date", name="uq_alerts_machine_type_date"),
     )
 
-    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, server_default=text("NEWID()"))
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
     machine_id = Column(mssql.UNIQUEIDENTIFIER, ForeignKey("machines.id"), nullable=False)
     alert_type = Column(String(50), nullable=False)
     alert_date = Column(Date, nullable=False)
@@ -166,6 +255,66 @@ class Alert(Base, TimestampMixin):
     machine = relationship("Machine", back_populates="alerts")
 
 
+class JobCheckpoint(Base, TimestampMixin):
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String(100), primary_key=True)
+    last_success_date = Column(Date)
+
+
+class JobRun(Base, TimestampMixin):
+    __tablename__ = "job_runs"
+
+    id = Column(mssql.UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4, server_default=text("NEWID()"))
+    job_name = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, server_default=text("'QUEUED'"))
+    params = Column(Text)
+    result = Column(Text)
+    error = Column(Text)
+    worker = Column(String(200))
+    started_at = Column(mssql.DATETIMEOFFSET)
+    finished_at = Column(mssql.DATETIMEOFFSET)
+    duration_ms = Column(Integer)
+
+
+class JobLock(Base):
+    __tablename__ = "job_locks"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(200), nullable=False)
+    expires_at = Column(mssql.DATETIMEOFFSET, nullable=False)
+
+
+class IngestChunk(Base, TimestampMixin):
+    """Up to ``BOOMI_BULK_CHUNK_SIZE`` validated Boomi records waiting for an ingest worker.
+
+    ``id`` is an identity column, so it gives the order the chunks were accepted in.
+    ``waiting_external_ids`` lists the records a chunk holds back until their
+    parents arrive; such a chunk only holds up newer records with those ids.
+    """
+
+    __tablename__ = "boomi_ingest_chunks"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    batch_id = Column(mssql.UNIQUEIDENTIFIER, nullable=False)
+    entity = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, server_default=text("'QUEUED'"))
+    records = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_count = Column(Integer, nullable=False, server_default=text("0"))
+    updated_count = Column(Integer, nullable=False, server_default=text("0"))
+    skipped_count = Column(Integer, nullable=False, server_default=text("0"))
+    error_count = Column(Integer, nullable=False, server_default=text("0"))
+    error_results = Column(Text)
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    error = Column(Text)
+    worker = Column(String(200))
+    available_at = Column(mssql.DATETIMEOFFSET)
+    started_at = Column(mssql.DATETIMEOFFSET)
+    finished_at = Column(mssql.DATETIMEOFFSET)
+    waiting_external_ids = Column(Text)
+
+
 Index("ix_accounts_external_id", Account.external_id)
 Index("ix_contacts_account_id", Contact.account_id)
 Index("ix_locations_account_id", Location.account_id)
@@ -173,5 +322,88 @@ Index("ix_machines_account_id", Machine.account_id)
 Index("ix_machines_location_id", Machine.location_id)
 Index("ix_machines_machine_number", Machine.machine_number)
 Index("ix_machines_warranty_end_date", Machine.warranty_end_date)
-Index("ix_alerts_status", Alert.status)
+Index("ix_alerts_status_due_date", Alert.status, Alert.due_date)
+Index("ix_alerts_machine_id_status", Alert.machine_id, Alert.status)
 Index("ix_alerts_due_date", Alert.due_date)
+Index("ix_job_runs_status_created_at", JobRun.status, JobRun.created_at)
+Index("ix_boomi_ingest_chunks_status_id", IngestChunk.status, IngestChunk.id, mssql_include=["entity", "records"])
+Index("ix_boomi_ingest_chunks_batch_id", IngestChunk.batch_id)
+Index("ix_accounts_row_version", Account.row_version)
+
+# Filtered on live rows to match the list_* filter + sort shapes; updated_at is
+# included so the list ETag aggregate is answered from the index alone.
+Index(
+    "ix_accounts_active_name",
+    Account.name,
+    Account.id,
+    mssql_where=Account.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+Index(
+    "ix_contacts_active_last_name",
+    Contact.last_name,
+    Contact.id,
+    mssql_where=Contact.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+Index(
+    "ix_contacts_active_account_id_last_name",
+    Contact.account_id,
+    Contact.last_name,
+    Contact.id,
+    mssql_where=Contact.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+Index(
+    "ix_locations_active_name",
+    Location.name,
+    Location.id,
+    mssql_where=Location.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+Index(
+    "ix_locations_active_account_id_name",
+    Location.account_id,
+    Location.name,
+    Location.id,
+    mssql_where=Location.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+Index(
+    "ix_machines_active_machine_name",
+    Machine.machine_name,
+    Machine.id,
+    mssql_where=Machine.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+Index(
+    "ix_machines_active_account_id_machine_name",
+    Machine.account_id,
+    Machine.machine_name,
+    Machine.id,
+    mssql_where=Machine.is_deleted == False,  # noqa: E712
+    mssql_include=["updated_at"],
+)
+# Boomi upserts look records up by external_id regardless of is_deleted.
+Index(
+    "ix_contacts_external_id",
+    Contact.external_id,
+    mssql_where=Contact.external_id.isnot(None),
+    mssql_include=["sync_hash"],
+)
+Index(
+    "ix_locations_external_id",
+    Location.external_id,
+    mssql_where=Location.external_id.isnot(None),
+    mssql_include=["sync_hash"],
+)
+Index(
+    "ix_machines_external_id",
+    Machine.external_id,
+    mssql_where=Machine.external_id.isnot(None),
+    mssql_include=["sync_hash"],
+)
+Index("ix_contacts_row_version", Contact.row_version)
+Index("ix_locations_row_version", Location.row_version)
+Index("ix_machines_row_version", Machine.row_version)
+Index("ix_alerts_row_version", Alert.row_version)
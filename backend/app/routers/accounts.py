@@ -1,27 +1,65 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.db import get_session
+from app.utils.etags import entity_etag, etag_matches, list_etag, not_modified, set_etag
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.projection import json_response, parse_fields, rows_to_dicts
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Account])
-def list_accounts(search: Optional[str] = None, db: Session = Depends(get_session)):
-    return crud.list_accounts(db, search)
+def list_accounts(
+    request: Request,
+    search: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    etag = list_etag(request, *crud.list_accounts_version(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        names = parse_fields(fields, schemas.Account)
+        rows, next_cursor = crud.list_accounts(db, search, limit, cursor, fields=names)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response = json_response(rows_to_dicts(rows, names))
+    set_etag(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 
 @router.get("/{account_id}", response_model=schemas.Account)
-def get_account(account_id: str, db: Session = Depends(get_session)):
+def get_account(account_id: str, request: Request, response: Response, db: Session = Depends(get_session)):
     account = crud.get_account(db, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
+    etag = entity_etag(account)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return account
 
 
+@router.get("/{account_id}/overview", response_model=schemas.AccountOverview)
+def get_account_overview(
+    account_id: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_session),
+):
+    overview = crud.get_account_overview(db, account_id, limit)
+    if not overview:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return overview
+
+
 @router.post("/", response_model=schemas.Account)
 def create_account(payload: schemas.AccountCreate, db: Session = Depends(get_session)):
     return crud.create_account(db, payload.dict())
@@ -1,24 +1,57 @@
-from typing import List, Optional
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.db import get_session
+from app.utils.etags import entity_etag, etag_matches, list_etag, not_modified, set_etag
+from app.utils.projection import json_response, parse_fields, rows_to_dicts
+from app.utils.streaming import export_response
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.Alert])
-def list_alerts(status: Optional[str] = None, db: Session = Depends(get_session)):
-    return crud.list_alerts(db, status)
+@router.get("/", response_model=schemas.AlertsInboxResponse)
+def list_alerts(
+    request: Request,
+    filters: schemas.AlertFilters = Depends(),
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    etag = list_etag(request, *crud.list_alerts_version(db, **filters.dict()))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        names = parse_fields(fields, schemas.Alert)
+        rows, next_cursor = crud.list_alerts(db, limit=limit, cursor=cursor, fields=names, **filters.dict())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    total = crud.count_alerts(db, **filters.dict())
+    response = json_response({"items": rows_to_dicts(rows, names), "total": total, "next_cursor": next_cursor})
+    set_etag(response, etag)
+    return response
+
+
+@router.get("/export")
+def export_alerts(
+    filters: schemas.AlertFilters = Depends(),
+    format: str = Query(default="ndjson", pattern="^(ndjson|json)$"),
+):
+    return export_response(lambda db: crud.export_alerts_query(db, **filters.dict()), schemas.Alert, format, "alerts")
 
 
 @router.get("/{alert_id}", response_model=schemas.Alert)
-def get_alert(alert_id: str, db: Session = Depends(get_session)):
+def get_alert(alert_id: str, request: Request, response: Response, db: Session = Depends(get_session)):
     alert = crud.get_alert(db, alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
+    etag = entity_etag(alert)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return alert
 
 
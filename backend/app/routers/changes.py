@@ -0,0 +1,24 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.db import get_session
+from app.services.changes import ChangesUnsupported, get_changes
+
+router = APIRouter()
+
+
+@router.get("/", response_model=schemas.ChangesResponse)
+def list_changes(
+    since: Optional[str] = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_session),
+):
+    try:
+        return get_changes(db, since, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except ChangesUnsupported as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
@@ -1,24 +1,50 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.db import get_session
+from app.utils.etags import entity_etag, etag_matches, list_etag, not_modified, set_etag
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.projection import json_response, parse_fields, rows_to_dicts
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Contact])
-def list_contacts(account_id: Optional[str] = None, db: Session = Depends(get_session)):
-    return crud.list_contacts(db, account_id)
+def list_contacts(
+    request: Request,
+    account_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    etag = list_etag(request, *crud.list_contacts_version(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        names = parse_fields(fields, schemas.Contact)
+        rows, next_cursor = crud.list_contacts(db, account_id, limit, cursor, fields=names)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response = json_response(rows_to_dicts(rows, names))
+    set_etag(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 
 @router.get("/{contact_id}", response_model=schemas.Contact)
-def get_contact(contact_id: str, db: Session = Depends(get_session)):
+def get_contact(contact_id: str, request: Request, response: Response, db: Session = Depends(get_session)):
     contact = crud.get_contact(db, contact_id)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    etag = entity_etag(contact)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return contact
 
 
@@ -1,117 +1,384 @@
-from typing import Any, Dict
+import json
+import os
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Tuple, Type
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.db import get_session
+from app.services import ingest_queue, reconciliation
+from app.services.ingest_queue import ingest_workers
 from app.utils.hashing import sha256_payload
 
 router = APIRouter()
 
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+ACCOUNT_FIELDS = {
+    "external_id",
+    "account_number",
+    "name",
+    "phone",
+    "email",
+    "website",
+    "language",
+    "is_solvable",
+    "billing_street",
+    "billing_house_number",
+    "billing_postal_code",
+    "billing_city",
+    "billing_country",
+    "manual_override_fields",
+    "last_modified",
+}
+CONTACT_FIELDS = {
+    "external_id",
+    "account_id",
+    "account_external_id",
+    "first_name",
+    "last_name",
+    "display_name",
+    "email",
+    "phone",
+    "role",
+    "is_primary",
+    "manual_override_fields",
+    "last_modified",
+}
+LOCATION_FIELDS = {
+    "external_id",
+    "account_id",
+    "account_external_id",
+    "location_code",
+    "name",
+    "street",
+    "house_number",
+    "postal_code",
+    "city",
+    "country",
+    "geo_lat",
+    "geo_lng",
+    "manual_override_fields",
+    "last_modified",
+}
+MACHINE_FIELDS = {
+    "external_id",
+    "account_id",
+    "account_external_id",
+    "location_id",
+    "location_external_id",
+    "machine_name",
+    "machine_number",
+    "status",
+    "product_category",
+    "family_name",
+    "family_code",
+    "installation_date",
+    "warranty_months",
+    "warranty_end_date",
+    "warranty_type",
+    "manual_override_fields",
+    "last_modified",
+}
+
+
+def get_bulk_chunk_size() -> int:
+    return int(os.getenv("BOOMI_BULK_CHUNK_SIZE", "500"))
+
 
 def _filter_payload(payload: Dict[str, Any], allowed: set) -> Dict[str, Any]:
     return {key: value for key, value in payload.items() if key in allowed}
 
 
-def _upsert(model, payload: Dict[str, Any], db: Session):
-    sync_hash = sha256_payload(payload)
-    record, skipped = crud.boomi_upsert(db, model, payload, sync_hash)
-    return schemas.UpsertResponse(status="upserted", id=str(record.id), skipped=skipped)
+def _normalize(schema: Type[BaseModel], filtered: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce values through the entity schema so equal content always hashes equally.
 
+    Dates become ``date`` objects, booleans and numbers get their proper
+    types, and values derived by validators (a machine's
+    ``warranty_end_date``) are kept.
+    """
+    parsed = schema(**filtered)
+    normalized = parsed.dict(exclude_unset=True)
+    for key, value in parsed.dict().items():
+        if key not in normalized and value != schema.__fields__[key].default:
+            normalized[key] = value
+    if "last_modified" in filtered:
+        normalized["last_modified"] = filtered["last_modified"]
+    for reference_key, _, _ in crud.EXTERNAL_REFERENCES:
+        if filtered.get(reference_key):
+            normalized[reference_key] = str(filtered[reference_key])
+    return normalized
 
-@router.post("/accounts:upsert", response_model=schemas.UpsertResponse)
-def upsert_account(payload: Dict[str, Any], db: Session = Depends(get_session)):
-    allowed = {
-        "external_id",
-        "account_number",
-        "name",
-        "phone",
-        "email",
-        "website",
-        "language",
-        "is_solvable",
-        "billing_street",
-        "billing_house_number",
-        "billing_postal_code",
-        "billing_city",
-        "billing_country",
-        "manual_override_fields",
-        "last_modified",
-    }
+
+ENTITIES = {
+    "accounts": (models.Account, ACCOUNT_FIELDS, schemas.AccountBase),
+    "contacts": (models.Contact, CONTACT_FIELDS, schemas.ContactBase),
+    "locations": (models.Location, LOCATION_FIELDS, schemas.LocationBase),
+    "machines": (models.Machine, MACHINE_FIELDS, schemas.MachineBase),
+}
+
+
+def _prepare(entity: str, payload: Any) -> Dict[str, Any]:
+    """Filter and normalize one Boomi payload; raises ``ValueError`` when it is unusable."""
+    if not isinstance(payload, dict):
+        raise ValueError("record must be a JSON object")
+    _, allowed, schema = ENTITIES[entity]
     filtered = _filter_payload(payload, allowed)
-    if "external_id" not in filtered:
-        raise HTTPException(status_code=400, detail="external_id is required")
-    return _upsert(models.Account, filtered, db)
+    if not filtered.get("external_id"):
+        raise ValueError("external_id is required")
+    return _normalize(schema, filtered)
+
+
+def _check_capacity(db: Session) -> None:
+    try:
+        ingest_queue.check_capacity(db)
+    except ingest_queue.QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+def _accepted(batch_id: uuid.UUID, records: int, errors: List[schemas.BulkUpsertResult]) -> JSONResponse:
+    body = schemas.IngestBatchAccepted(
+        batch_id=str(batch_id),
+        status=ingest_queue.CHUNK_STATUS_QUEUED,
+        records=records,
+        errors=len(errors),
+        results=errors,
+    )
+    return JSONResponse(status_code=202, content=jsonable_encoder(body))
+
+
+def _upsert(entity: str, payload: Dict[str, Any], db: Session):
+    queued = ingest_queue.ingest_async()
+    if queued:
+        _check_capacity(db)
+    try:
+        prepared = _prepare(entity, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    sync_hash = sha256_payload(prepared)
+    if queued:
+        batch_id = uuid.uuid4()
+        ingest_queue.add_chunk(db, batch_id, entity, [(0, prepared, sync_hash)], [])
+        db.commit()
+        ingest_workers.wake()
+        return _accepted(batch_id, 1, [])
+    (prepared,), (unresolved,) = crud.resolve_external_references(db, [prepared])
+    if unresolved:
+        raise HTTPException(status_code=400, detail=unresolved)
+    record_id, skipped = crud.boomi_upsert(db, ENTITIES[entity][0], prepared, sync_hash)
+    return schemas.UpsertResponse(status="upserted", id=record_id, skipped=skipped)
+
+
+async def _iter_records(request: Request) -> AsyncIterator[Any]:
+    """Yield records from a JSON array body or, incrementally, from an NDJSON stream.
+
+    Lines that are not valid JSON are yielded as the ``ValueError`` they raise
+    so they can be reported per record instead of failing the whole request.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_line(line)
+        if buffer.strip():
+            yield _parse_line(buffer)
+        return
+    try:
+        body = json.loads(await request.body())
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for record in body:
+        yield record
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        return ValueError(f"invalid JSON: {exc.msg}")
+
+
+def _prepare_chunk(
+    entity: str, chunk: List[Tuple[int, Any]]
+) -> Tuple[List[Tuple[int, Dict[str, Any], str]], Dict[int, schemas.BulkUpsertResult]]:
+    """Split a chunk into ``(index, prepared, sync_hash)`` items and per-index validation errors."""
+    items = []
+    errors: Dict[int, schemas.BulkUpsertResult] = {}
+    for index, raw in chunk:
+        external_id = raw.get("external_id") if isinstance(raw, dict) else None
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            prepared = _prepare(entity, raw)
+        except ValueError as exc:
+            errors[index] = schemas.BulkUpsertResult(
+                index=index, external_id=external_id, status="error", error=str(exc)
+            )
+            continue
+        items.append((index, prepared, sha256_payload(prepared)))
+    return items, errors
+
+
+def _process_chunk(db: Session, entity: str, chunk: List[Tuple[int, Any]]) -> List[schemas.BulkUpsertResult]:
+    items, results = _prepare_chunk(entity, chunk)
+    resolved, unresolved = crud.resolve_external_references(db, [prepared for _, prepared, _ in items])
+    ready = []
+    for (index, _, sync_hash), prepared, missing in zip(items, resolved, unresolved):
+        if missing:
+            results[index] = schemas.BulkUpsertResult(
+                index=index, external_id=prepared["external_id"], status="error", error=missing
+            )
+        else:
+            ready.append((index, prepared, sync_hash))
+    if ready:
+        pairs = [(prepared, sync_hash) for _, prepared, sync_hash in ready]
+        outcomes = crud.boomi_bulk_upsert(db, ENTITIES[entity][0], pairs)
+        for (index, prepared, _), outcome in zip(ready, outcomes):
+            results[index] = schemas.BulkUpsertResult(index=index, external_id=prepared["external_id"], **outcome)
+    return [results[index] for index, _ in chunk]
+
+
+def _enqueue_chunk(
+    db: Session, entity: str, batch_id: uuid.UUID, chunk: List[Tuple[int, Any]]
+) -> List[schemas.BulkUpsertResult]:
+    items, errors = _prepare_chunk(entity, chunk)
+    ingest_queue.add_chunk(db, batch_id, entity, items, [error.dict() for error in errors.values()])
+    return list(errors.values())
+
+
+async def _enqueue_bulk(entity: str, request: Request, db: Session) -> JSONResponse:
+    """Validate the body chunk by chunk into the ingest queue; nothing is visible to workers before the commit."""
+    await run_in_threadpool(_check_capacity, db)
+    batch_id = uuid.uuid4()
+    chunk_size = get_bulk_chunk_size()
+    errors: List[schemas.BulkUpsertResult] = []
+    chunk: List[Tuple[int, Any]] = []
+    index = 0
+    async for record in _iter_records(request):
+        chunk.append((index, record))
+        index += 1
+        if len(chunk) >= chunk_size:
+            errors.extend(await run_in_threadpool(_enqueue_chunk, db, entity, batch_id, chunk))
+            chunk = []
+    if chunk or index == 0:
+        errors.extend(await run_in_threadpool(_enqueue_chunk, db, entity, batch_id, chunk))
+    await run_in_threadpool(db.commit)
+    ingest_workers.wake()
+    return _accepted(batch_id, index, errors)
+
+
+async def _bulk_upsert(entity: str, request: Request, db: Session):
+    if ingest_queue.ingest_async():
+        return await _enqueue_bulk(entity, request, db)
+    chunk_size = get_bulk_chunk_size()
+    results: List[schemas.BulkUpsertResult] = []
+    chunk: List[Tuple[int, Any]] = []
+    index = 0
+    async for record in _iter_records(request):
+        chunk.append((index, record))
+        index += 1
+        if len(chunk) >= chunk_size:
+            results.extend(await run_in_threadpool(_process_chunk, db, entity, chunk))
+            chunk = []
+    if chunk:
+        results.extend(await run_in_threadpool(_process_chunk, db, entity, chunk))
+    counts = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+    for result in results:
+        counts[result.status] += 1
+    return schemas.BulkUpsertResponse(
+        created=counts["created"],
+        updated=counts["updated"],
+        skipped=counts["skipped"],
+        errors=counts["error"],
+        results=results,
+    )
 
 
-@router.post("/contacts:upsert", response_model=schemas.UpsertResponse)
+QUEUED_RESPONSES = {202: {"model": schemas.IngestBatchAccepted}, 429: {"description": "Ingest queue is full"}}
+
+
+@router.get("/batches/{batch_id}", response_model=schemas.IngestBatch)
+def get_ingest_batch(batch_id: str, db: Session = Depends(get_session)):
+    batch = ingest_queue.get_batch(db, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+@router.post("/accounts:upsert", response_model=schemas.UpsertResponse, responses=QUEUED_RESPONSES)
+def upsert_account(payload: Dict[str, Any], db: Session = Depends(get_session)):
+    return _upsert("accounts", payload, db)
+
+
+@router.post("/contacts:upsert", response_model=schemas.UpsertResponse, responses=QUEUED_RESPONSES)
 def upsert_contact(payload: Dict[str, Any], db: Session = Depends(get_session)):
-    allowed = {
-        "external_id",
-        "account_id",
-        "first_name",
-        "last_name",
-        "display_name",
-        "email",
-        "phone",
-        "role",
-        "is_primary",
-        "manual_override_fields",
-        "last_modified",
-    }
-    filtered = _filter_payload(payload, allowed)
-    if "external_id" not in filtered:
-        raise HTTPException(status_code=400, detail="external_id is required")
-    return _upsert(models.Contact, filtered, db)
+    return _upsert("contacts", payload, db)
 
 
-@router.post("/locations:upsert", response_model=schemas.UpsertResponse)
+@router.post("/locations:upsert", response_model=schemas.UpsertResponse, responses=QUEUED_RESPONSES)
 def upsert_location(payload: Dict[str, Any], db: Session = Depends(get_session)):
-    allowed = {
-        "external_id",
-        "account_id",
-        "location_code",
-        "name",
-        "street",
-        "house_number",
-        "postal_code",
-        "city",
-        "country",
-        "geo_lat",
-        "geo_lng",
-        "manual_override_fields",
-        "last_modified",
-    }
-    filtered = _filter_payload(payload, allowed)
-    if "external_id" not in filtered:
-        raise HTTPException(status_code=400, detail="external_id is required")
-    return _upsert(models.Location, filtered, db)
+    return _upsert("locations", payload, db)
 
 
-@router.post("/machines:upsert", response_model=schemas.UpsertResponse)
+@router.post("/machines:upsert", response_model=schemas.UpsertResponse, responses=QUEUED_RESPONSES)
 def upsert_machine(payload: Dict[str, Any], db: Session = Depends(get_session)):
-    allowed = {
-        "external_id",
-        "account_id",
-        "location_id",
-        "machine_name",
-        "machine_number",
-        "status",
-        "product_category",
-        "family_name",
-        "family_code",
-        "installation_date",
-        "warranty_months",
-        "warranty_end_date",
-        "warranty_type",
-        "manual_override_fields",
-        "last_modified",
-    }
-    filtered = _filter_payload(payload, allowed)
-    if "external_id" not in filtered:
-        raise HTTPException(status_code=400, detail="external_id is required")
-    machine_payload = schemas.MachineBase(**filtered).dict(exclude_unset=True)
-    if "last_modified" in filtered:
-        machine_payload["last_modified"] = filtered["last_modified"]
-    return _upsert(models.Machine, machine_payload, db)
+    return _upsert("machines", payload, db)
+
+
+@router.post("/accounts:bulkUpsert", response_model=schemas.BulkUpsertResponse, responses=QUEUED_RESPONSES)
+async def bulk_upsert_accounts(request: Request, db: Session = Depends(get_session)):
+    return await _bulk_upsert("accounts", request, db)
+
+
+@router.post("/contacts:bulkUpsert", response_model=schemas.BulkUpsertResponse, responses=QUEUED_RESPONSES)
+async def bulk_upsert_contacts(request: Request, db: Session = Depends(get_session)):
+    return await _bulk_upsert("contacts", request, db)
+
+
+@router.post("/locations:bulkUpsert", response_model=schemas.BulkUpsertResponse, responses=QUEUED_RESPONSES)
+async def bulk_upsert_locations(request: Request, db: Session = Depends(get_session)):
+    return await _bulk_upsert("locations", request, db)
+
+
+@router.post("/machines:bulkUpsert", response_model=schemas.BulkUpsertResponse, responses=QUEUED_RESPONSES)
+async def bulk_upsert_machines(request: Request, db: Session = Depends(get_session)):
+    return await _bulk_upsert("machines", request, db)
+
+
+def _reconcile(entity: str, request: schemas.ReconcileRequest, db: Session):
+    try:
+        return reconciliation.reconcile(db, entity, [bucket.dict() for bucket in request.buckets])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/accounts:reconcile", response_model=schemas.ReconcileResponse)
+def reconcile_accounts(request: schemas.ReconcileRequest, db: Session = Depends(get_session)):
+    return _reconcile("accounts", request, db)
+
+
+@router.post("/contacts:reconcile", response_model=schemas.ReconcileResponse)
+def reconcile_contacts(request: schemas.ReconcileRequest, db: Session = Depends(get_session)):
+    return _reconcile("contacts", request, db)
+
+
+@router.post("/locations:reconcile", response_model=schemas.ReconcileResponse)
+def reconcile_locations(request: schemas.ReconcileRequest, db: Session = Depends(get_session)):
+    return _reconcile("locations", request, db)
+
+
+@router.post("/machines:reconcile", response_model=schemas.ReconcileResponse)
+def reconcile_machines(request: schemas.ReconcileRequest, db: Session = Depends(get_session)):
+    return _reconcile("machines", request, db)
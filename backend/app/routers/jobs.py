@@ -1,15 +1,60 @@
-from fastapi import APIRouter, Depends
+import json
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from app import models
 from app.db import get_session
-from app.schemas import AlertGenerationResult
-from app.services.alert_generation import generate_alerts_for_today
+from app.schemas import JobRun, JobRunAccepted
+from app.services.alert_generation import ALERT_GENERATION_JOB, get_max_range_days
+from app.services.jobs import enqueue_job, get_job_run
+from app.services.scheduler import scheduler
 from app.utils.time import today
 
 router = APIRouter()
 
 
-@router.post("/generate-alerts", response_model=AlertGenerationResult)
-def generate_alerts(db: Session = Depends(get_session)):
-    result = generate_alerts_for_today(db, today())
-    return AlertGenerationResult(**result)
+def _to_schema(run: models.JobRun) -> JobRun:
+    return JobRun(
+        id=str(run.id),
+        job_name=run.job_name,
+        status=run.status,
+        params=json.loads(run.params) if run.params else None,
+        result=json.loads(run.result) if run.result else None,
+        error=run.error,
+        worker=run.worker,
+        created_at=run.created_at,
+        started_at=run.started_at,
+        finished_at=run.finished_at,
+        duration_ms=run.duration_ms,
+    )
+
+
+@router.post("/generate-alerts", response_model=JobRunAccepted, status_code=202)
+def generate_alerts(
+    from_date: Optional[date] = Query(default=None, alias="from"),
+    to_date: Optional[date] = Query(default=None, alias="to"),
+    db: Session = Depends(get_session),
+):
+    params = {}
+    if from_date is not None or to_date is not None:
+        to_date = to_date or today()
+        from_date = from_date or to_date
+        if from_date > to_date:
+            raise HTTPException(status_code=400, detail="from must be on or before to")
+        if (to_date - from_date).days + 1 > get_max_range_days():
+            raise HTTPException(status_code=400, detail=f"Range exceeds {get_max_range_days()} days")
+        params = {"from_date": from_date.isoformat(), "to_date": to_date.isoformat()}
+    run = enqueue_job(db, ALERT_GENERATION_JOB, params)
+    scheduler.wake()
+    return JobRunAccepted(job_id=str(run.id), status=run.status)
+
+
+@router.get("/{job_id}", response_model=JobRun)
+def get_job(job_id: str, db: Session = Depends(get_session)):
+    run = get_job_run(db, job_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_schema(run)
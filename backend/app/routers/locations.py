@@ -1,24 +1,50 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.db import get_session
+from app.utils.etags import entity_etag, etag_matches, list_etag, not_modified, set_etag
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.projection import json_response, parse_fields, rows_to_dicts
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Location])
-def list_locations(account_id: Optional[str] = None, db: Session = Depends(get_session)):
-    return crud.list_locations(db, account_id)
+def list_locations(
+    request: Request,
+    account_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    etag = list_etag(request, *crud.list_locations_version(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        names = parse_fields(fields, schemas.Location)
+        rows, next_cursor = crud.list_locations(db, account_id, limit, cursor, fields=names)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response = json_response(rows_to_dicts(rows, names))
+    set_etag(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
 
 
 @router.get("/{location_id}", response_model=schemas.Location)
-def get_location(location_id: str, db: Session = Depends(get_session)):
+def get_location(location_id: str, request: Request, response: Response, db: Session = Depends(get_session)):
     location = crud.get_location(db, location_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
+    etag = entity_etag(location)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return location
 
 
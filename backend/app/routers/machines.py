@@ -1,24 +1,66 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.db import get_session
+from app.utils.etags import entity_etag, etag_matches, list_etag, not_modified, set_etag
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.projection import json_response, parse_fields, rows_to_dicts
+from app.utils.streaming import export_response
 
 router = APIRouter()
 
+# Fields schemas.Machine computes on validation, which projected rows skip.
+MACHINE_DERIVED_FIELDS = {
+    "warranty_end_date": lambda row: schemas.derive_warranty_end_date(
+        row.installation_date, row.warranty_months, row.warranty_end_date
+    ),
+}
+
 
 @router.get("/", response_model=List[schemas.Machine])
-def list_machines(account_id: Optional[str] = None, db: Session = Depends(get_session)):
-    return crud.list_machines(db, account_id)
+def list_machines(
+    request: Request,
+    account_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    etag = list_etag(request, *crud.list_machines_version(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        names = parse_fields(fields, schemas.Machine)
+        rows, next_cursor = crud.list_machines(db, account_id, limit, cursor, fields=names)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response = json_response(rows_to_dicts(rows, names, MACHINE_DERIVED_FIELDS))
+    set_etag(response, etag)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@router.get("/export")
+def export_machines(
+    account_id: Optional[str] = None,
+    format: str = Query(default="ndjson", pattern="^(ndjson|json)$"),
+):
+    return export_response(lambda db: crud.export_machines_query(db, account_id), schemas.Machine, format, "machines")
 
 
 @router.get("/{machine_id}", response_model=schemas.Machine)
-def get_machine(machine_id: str, db: Session = Depends(get_session)):
+def get_machine(machine_id: str, request: Request, response: Response, db: Session = Depends(get_session)):
     machine = crud.get_machine(db, machine_id)
     if not machine:
         raise HTTPException(status_code=404, detail="Machine not found")
+    etag = entity_etag(machine)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return machine
 
 
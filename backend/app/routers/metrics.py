@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+
+from app.utils.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter()
+
+
+@router.get("")
+def get_metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
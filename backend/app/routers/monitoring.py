@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from app.services.entity_cache import cache_stats as entity_cache_stats
+from app.services.idempotency import store_stats as idempotency_stats
+from app.services.search_index import index_stats
+from app.services.sync_cache import cache_stats
+
+router = APIRouter()
+
+
+@router.get("/caches")
+def get_cache_stats():
+    return {
+        "sync_hash": cache_stats(),
+        "entities": entity_cache_stats(),
+        "search": index_stats(),
+        "idempotency": idempotency_stats(),
+    }
@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.db import get_session
+from app.services import search_index
+
+router = APIRouter()
+
+
+@router.get("/", response_model=schemas.SearchResponse)
+def search(
+    q: str = Query(min_length=1, max_length=200),
+    entity: Optional[List[str]] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_session),
+):
+    unknown = set(entity or ()) - set(search_index.ENTITY_NAMES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown entity: {', '.join(sorted(unknown))}")
+    backend, items = search_index.search(db, q, limit, entity)
+    return schemas.SearchResponse(backend=backend, items=items)
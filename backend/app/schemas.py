@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from dateutil.relativedelta import relativedelta
 from pydantic import BaseModel, Field, root_validator
@@ -115,6 +115,15 @@ class Location(LocationBase):
         orm_mode = True
 
 
+def derive_warranty_end_date(
+    installation_date: Optional[date], warranty_months: Optional[int], warranty_end_date: Optional[date]
+) -> Optional[date]:
+    """The stored end date, or installation date plus the warranty length when none is stored."""
+    if not warranty_end_date and installation_date and warranty_months is not None:
+        return installation_date + relativedelta(months=int(warranty_months))
+    return warranty_end_date
+
+
 class MachineBase(BaseModel):
     account_id: Optional[str] = None
     location_id: Optional[str] = None
@@ -137,10 +146,9 @@ class MachineBase(BaseModel):
     @root_validator
     def compute_warranty_end_date(cls, values):
         installation_date = values.get("installation_date")
-        warranty_months = values.get("warranty_months")
-        warranty_end_date = values.get("warranty_end_date")
-        if not warranty_end_date and installation_date and warranty_months is not None:
-            values["warranty_end_date"] = installation_date + relativedelta(months=int(warranty_months))
+        values["warranty_end_date"] = derive_warranty_end_date(
+            installation_date, values.get("warranty_months"), values.get("warranty_end_date")
+        )
         if installation_date and values.get("warranty_end_date"):
             if values["warranty_end_date"] < installation_date:
                 raise ValueError("warranty_end_date must be >= installation_date")
@@ -217,10 +225,42 @@ class Alert(AlertBase):
         orm_mode = True
 
 
+class AlertFilters(BaseModel):
+    status: Optional[str] = None
+    account_id: Optional[str] = None
+    machine_id: Optional[str] = None
+    alert_type: Optional[str] = None
+    assigned_to: Optional[str] = None
+    due_before: Optional[date] = None
+    due_after: Optional[date] = None
+    snoozed: Optional[bool] = None
+
+
 class AlertGenerationResult(BaseModel):
     created: int
     skipped: int
     evaluated: int
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+
+
+class JobRunAccepted(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobRun(BaseModel):
+    id: str
+    job_name: str
+    status: str
+    params: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    worker: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
 
 
 class UpsertResponse(BaseModel):
@@ -229,6 +269,115 @@ class UpsertResponse(BaseModel):
     skipped: bool
 
 
+class BulkUpsertResult(BaseModel):
+    index: int
+    external_id: Optional[str] = None
+    status: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkUpsertResponse(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    errors: int
+    results: List[BulkUpsertResult]
+
+
+class IngestBatchAccepted(BaseModel):
+    batch_id: str
+    status: str
+    records: int
+    errors: int
+    results: List[BulkUpsertResult] = []
+
+
+class IngestBatch(BaseModel):
+    batch_id: str
+    entity: str
+    status: str
+    records: int
+    created: int
+    updated: int
+    skipped: int
+    errors: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    results: List[BulkUpsertResult]
+
+
+class ReconcileBucket(BaseModel):
+    prefix: str = Field(..., max_length=4)
+    count: int = Field(..., ge=0)
+    digest: str = Field(..., min_length=64, max_length=64)
+    items: Optional[Dict[str, Optional[str]]] = None
+
+
+class ReconcileRequest(BaseModel):
+    buckets: List[ReconcileBucket]
+
+
+class ReconcileBucketDigest(BaseModel):
+    prefix: str
+    count: int
+    digest: str
+
+
+class ReconcileResponse(BaseModel):
+    matched: int
+    split: List[ReconcileBucketDigest]
+    send_items: List[str]
+    resend: List[str]
+    stale: List[str]
+    leaf_size: int
+
+
 class AlertsInboxResponse(BaseModel):
     items: List[Alert]
     total: int
+    next_cursor: Optional[str] = None
+
+
+class AccountOverviewCounts(BaseModel):
+    contacts: int
+    locations: int
+    machines: int
+    open_alerts: int
+
+
+class AccountOverview(BaseModel):
+    account: Account
+    contacts: List[Contact]
+    locations: List[Location]
+    machines: List[Machine]
+    open_alerts: List[Alert]
+    counts: AccountOverviewCounts
+
+
+class SearchHit(BaseModel):
+    entity: str
+    id: str
+    account_id: Optional[str] = None
+    label: Optional[str] = None
+    score: float
+
+
+class SearchResponse(BaseModel):
+    backend: str
+    items: List[SearchHit]
+
+
+class ChangeItem(BaseModel):
+    entity: str
+    id: str
+    version: int
+    deleted: bool
+    data: Optional[Any] = None
+
+
+class ChangesResponse(BaseModel):
+    items: List[ChangeItem]
+    next_token: str
+    has_more: bool
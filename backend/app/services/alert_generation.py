@@ -1,50 +1,184 @@
+import os
 from datetime import date, timedelta
+from typing import Any, Iterator, Optional, Tuple
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, insert, literal, literal_column, select
 from sqlalchemy.orm import Session
 
 from app import models
+from app.utils.metrics import REGISTRY
 
 
 ALERT_TYPE_EXPIRING = "WARRANTY_EXPIRING"
 ALERT_TYPE_EXPIRED = "WARRANTY_EXPIRED"
 ALERT_TYPE_DUE = "WARRANTY_DUE"
 
+ALERT_UNIQUE_KEY = ("machine_id", "alert_type", "alert_date")
+ALERT_GENERATION_JOB = "generate_alerts"
 
-def generate_alerts_for_today(db: Session, today: date) -> dict:
-    rules = db.query(models.AlertRule).filter(models.AlertRule.enabled == True).all()  # noqa: E712
-    machines = (
-        db.query(models.Machine)
-        .filter(models.Machine.warranty_end_date.isnot(None), models.Machine.is_deleted == False)  # noqa: E712
-        .all()
+GENERATED_ALERTS = REGISTRY.counter(
+    "alert_generation_alerts_total",
+    "Alerts considered by alert generation, by outcome (created, or skipped as already existing).",
+    ("outcome",),
+)
+
+
+def get_batch_days() -> int:
+    return int(os.getenv("ALERT_GENERATION_BATCH_DAYS", "7"))
+
+
+def get_max_range_days() -> int:
+    return int(os.getenv("ALERT_GENERATION_MAX_RANGE_DAYS", "366"))
+
+
+def get_catch_up_days() -> int:
+    return int(os.getenv("ALERT_CATCH_UP_MAX_DAYS", "31"))
+
+
+def alert_type_for_offset(offset_days: int) -> str:
+    if offset_days < 0:
+        return ALERT_TYPE_EXPIRING
+    if offset_days == 0:
+        return ALERT_TYPE_DUE
+    return ALERT_TYPE_EXPIRED
+
+
+def _eligible_machine_filter():
+    return (
+        models.Machine.warranty_end_date.isnot(None),
+        models.Machine.is_deleted == False,  # noqa: E712
     )
+
+
+def get_last_success_date(db: Session) -> Optional[date]:
+    checkpoint = db.get(models.JobCheckpoint, ALERT_GENERATION_JOB)
+    return checkpoint.last_success_date if checkpoint else None
+
+
+def _record_success(db: Session, start: date, end: date, contiguous_only: bool = True) -> None:
+    """Advance the checkpoint to ``end``, by default only over a window contiguous with it."""
+    checkpoint = db.get(models.JobCheckpoint, ALERT_GENERATION_JOB)
+    if checkpoint is None:
+        db.add(models.JobCheckpoint(name=ALERT_GENERATION_JOB, last_success_date=end))
+    elif checkpoint.last_success_date is None or not contiguous_only:
+        checkpoint.last_success_date = max(end, checkpoint.last_success_date or end)
+    elif start <= checkpoint.last_success_date + timedelta(days=1) and end > checkpoint.last_success_date:
+        checkpoint.last_success_date = end
+    db.commit()
+
+
+def _date_windows(start: date, end: date, days: int) -> Iterator[Tuple[date, date]]:
+    while start <= end:
+        window_end = min(end, start + timedelta(days=days - 1))
+        yield start, window_end
+        start = window_end + timedelta(days=1)
+
+
+def _add_days(dialect: str, value: Any, days: int) -> Any:
+    if dialect == "mssql":
+        return func.dateadd(literal_column("day"), days, value)
+    if dialect == "sqlite":
+        return func.date(value, f"{days:+d} days")
+    return value + days
+
+
+def _insert_for_rule(db: Session, rule: models.AlertRule, start: date, end: date) -> Tuple[int, int]:
+    """Insert the rule's missing alerts dated ``start``..``end`` with one ``INSERT ... SELECT``; ``(created, skipped)``."""
+    alert_type = alert_type_for_offset(rule.offset_days)
+    offset = timedelta(days=rule.offset_days)
+    in_window = (
+        *_eligible_machine_filter(),
+        models.Machine.warranty_end_date >= start - offset,
+        models.Machine.warranty_end_date <= end - offset,
+    )
+    matching = db.query(func.count(models.Machine.id)).filter(*in_window).scalar() or 0
+    if not matching:
+        return 0, 0
+    alert_date = _add_days(db.get_bind().dialect.name, models.Machine.warranty_end_date, rule.offset_days)
+    existing = models.Alert.__table__.alias("existing")
+    already_alerted = (
+        select(literal(1))
+        .select_from(existing)
+        .where(
+            existing.c.machine_id == models.Machine.id,
+            existing.c.alert_type == alert_type,
+            existing.c.alert_date == alert_date,
+        )
+        .with_hint(existing, "WITH (UPDLOCK, HOLDLOCK)", "mssql")
+        .exists()
+    )
+    candidates = select(
+        models.Machine.id,
+        literal(alert_type),
+        alert_date,
+        models.Machine.warranty_end_date,
+        literal("OPEN"),
+    ).where(*in_window, ~already_alerted)
+    statement = insert(models.Alert).from_select(
+        ["machine_id", "alert_type", "alert_date", "due_date", "status"],
+        candidates,
+        # Python-side defaults would be evaluated once for the whole
+        # statement; every row needs its own NEWID().
+        include_defaults=False,
+    )
+    inserted = db.execute(statement).rowcount
+    return inserted, matching - inserted
+
+
+def _generate(db: Session, start: date, end: date, batch_days: Optional[int]) -> dict:
+    batch_days = batch_days or get_batch_days()
+    rules = db.query(models.AlertRule).filter(models.AlertRule.enabled == True).all()  # noqa: E712
+    eligible = db.query(func.count(models.Machine.id)).filter(*_eligible_machine_filter()).scalar() or 0
     created = 0
     skipped = 0
-    evaluated = 0
-    for rule in rules:
-        for machine in machines:
-            evaluated += 1
-            target_date = machine.warranty_end_date + timedelta(days=rule.offset_days)
-            if target_date != today:
-                continue
-            if rule.offset_days < 0:
-                alert_type = ALERT_TYPE_EXPIRING
-            elif rule.offset_days == 0:
-                alert_type = ALERT_TYPE_DUE
-            else:
-                alert_type = ALERT_TYPE_EXPIRED
-            alert = models.Alert(
-                machine_id=machine.id,
-                alert_type=alert_type,
-                alert_date=today,
-                due_date=machine.warranty_end_date,
-                status="OPEN",
-            )
-            db.add(alert)
-            try:
-                db.commit()
-                created += 1
-            except IntegrityError:
-                db.rollback()
-                skipped += 1
-    return {"created": created, "skipped": skipped, "evaluated": evaluated}
+    for window_start, window_end in _date_windows(start, end, batch_days):
+        for rule in rules:
+            inserted, existing = _insert_for_rule(db, rule, window_start, window_end)
+            created += inserted
+            skipped += existing
+        db.commit()
+    GENERATED_ALERTS.inc(created, outcome="created")
+    GENERATED_ALERTS.inc(skipped, outcome="skipped")
+    return {
+        "created": created,
+        "skipped": skipped,
+        "evaluated": eligible * len(rules),
+        "from_date": start,
+        "to_date": end,
+    }
+
+
+def generate_alerts_for_range(db: Session, start: date, end: date, batch_days: Optional[int] = None) -> dict:
+    """Create every alert due between ``start`` and ``end`` (inclusive).
+
+    The range is cut into windows of ``ALERT_GENERATION_BATCH_DAYS`` and each
+    window is committed on its own. Per window, each rule is one
+    ``INSERT ... SELECT`` over a range scan of ``ix_machines_warranty_end_date``
+    on ``[start - offset_days, end - offset_days]``, dated
+    ``warranty_end_date + offset_days``, that skips alerts already present
+    with ``WHERE NOT EXISTS`` on ``uq_alerts_machine_type_date``. On success
+    the ``generate_alerts`` checkpoint is advanced to ``end`` when the window
+    is contiguous with it.
+    """
+    result = _generate(db, start, end, batch_days)
+    _record_success(db, start, end)
+    return result
+
+
+def generate_alerts_for_today(db: Session, today: date, batch_days: Optional[int] = None) -> dict:
+    return generate_alerts_for_range(db, today, today, batch_days)
+
+
+def generate_missed_alerts(db: Session, today: date, batch_days: Optional[int] = None) -> dict:
+    """Backfill every day since the last successful run, up to and including ``today``.
+
+    The window is capped at ``ALERT_CATCH_UP_MAX_DAYS`` so a long outage does
+    not turn into an unbounded scan; the checkpoint moves to ``today`` either way.
+    """
+    start = today
+    last_success = get_last_success_date(db)
+    if last_success is not None and last_success < today:
+        start = max(last_success + timedelta(days=1), today - timedelta(days=get_catch_up_days() - 1))
+    result = _generate(db, start, today, batch_days)
+    _record_success(db, start, today, contiguous_only=False)
+    return result
@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+
+CHANGE_FEED = (
+    ("accounts", models.Account, schemas.Account),
+    ("contacts", models.Contact, schemas.Contact),
+    ("locations", models.Location, schemas.Location),
+    ("machines", models.Machine, schemas.Machine),
+    ("alerts", models.Alert, schemas.Alert),
+)
+
+
+class ChangesUnsupported(Exception):
+    def __init__(self, dialect: str):
+        super().__init__(f"The changes feed needs SQL Server rowversion columns, not available on {dialect}")
+        self.dialect = dialect
+
+
+def _to_version(value: bytes) -> int:
+    return int.from_bytes(value, "big")
+
+
+def _to_rowversion(version: int) -> bytes:
+    return version.to_bytes(8, "big")
+
+
+def decode_token(token: Optional[str]) -> int:
+    if not token:
+        return 0
+    try:
+        version = int(token)
+    except ValueError:
+        raise ValueError("Invalid token")
+    if not 0 <= version < 2**64:
+        raise ValueError("Invalid token")
+    return version
+
+
+def _horizon(db: Session) -> bytes:
+    """``MIN_ACTIVE_ROWVERSION()``, the lowest version an open transaction may still commit."""
+    dialect = db.get_bind().dialect.name
+    if dialect != "mssql":
+        raise ChangesUnsupported(dialect)
+    return db.execute(select(func.min_active_rowversion())).scalar()
+
+
+def get_changes(db: Session, token: Optional[str], limit: int) -> Dict[str, Any]:
+    """Rows of every synced entity written after ``token``, in write order.
+
+    ``row_version`` is a database-wide counter, so one number positions the
+    reader across all tables. Only versions below ``MIN_ACTIVE_ROWVERSION()``
+    are returned: a still-open transaction can never commit a row behind
+    the token a client has already been given. Soft-deleted rows are
+    returned as tombstones without data. Other backends do not maintain
+    ``row_version`` and raise ``ChangesUnsupported``.
+    """
+    since = decode_token(token)
+    horizon = _horizon(db)
+    changes: List[Tuple[int, str, Any, Any]] = []
+    for name, model, schema in CHANGE_FEED:
+        rows = (
+            db.query(model)
+            .filter(model.row_version > _to_rowversion(since), model.row_version < horizon)
+            .order_by(model.row_version)
+            .limit(limit + 1)
+            .all()
+        )
+        changes.extend((_to_version(row.row_version), name, schema, row) for row in rows)
+    changes.sort(key=lambda change: change[0])
+    page = changes[:limit]
+    items = []
+    for version, name, schema, row in page:
+        deleted = bool(getattr(row, "is_deleted", False))
+        items.append(
+            {
+                "entity": name,
+                "id": str(row.id),
+                "version": version,
+                "deleted": deleted,
+                "data": None if deleted else schema.from_orm(row),
+            }
+        )
+    next_version = page[-1][0] if page else since
+    return {"items": items, "next_token": str(next_version), "has_more": len(changes) > limit}
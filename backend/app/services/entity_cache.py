@@ -0,0 +1,278 @@
+import base64
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import models
+from app.utils.disk_store import DiskStore
+
+logger = logging.getLogger("machine-mgmt.entity-cache")
+
+CACHED_MODELS = (models.Account, models.Contact, models.Location, models.Machine, models.Alert)
+
+
+def cache_enabled() -> bool:
+    return os.getenv("ENTITY_CACHE_ENABLED", "1") == "1"
+
+
+def get_max_entries() -> int:
+    return int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "10000"))
+
+
+def get_ttl_seconds() -> float:
+    return float(os.getenv("ENTITY_CACHE_TTL_SECONDS", "30"))
+
+
+def get_shared_path() -> Optional[str]:
+    return os.getenv("ENTITY_CACHE_PATH") or None
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[Dict[str, Any]]: ...
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class LocalBackend:
+    """In-process LRU whose entries expire after their TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SharedBackend(CacheBackend, Protocol):
+    def generation(self, name: str) -> str: ...
+
+    def bump(self, name: str) -> None: ...
+
+    def set_if_generation(
+        self, key: str, value: Dict[str, Any], ttl_seconds: float, name: str, generation: str
+    ) -> bool: ...
+
+
+class DiskBackend:
+    """Shared tier on a ``DiskStore`` file, so workers on one host see each other's invalidations.
+
+    Next to the rows it keeps a write generation per table. A row read
+    before another worker's write committed carries the old generation and
+    is refused by ``set_if_generation``.
+    """
+
+    def __init__(self, store: DiskStore):
+        self.store = store
+
+    @staticmethod
+    def _generation_key(name: str) -> str:
+        return f"{name}:generation"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.store.get(key)
+        if raw is None:
+            return None
+        expires_at, payload = raw.split(" ", 1)
+        if float(expires_at) <= time.time():
+            self.store.delete(key)
+            return None
+        return pickle.loads(base64.b64decode(payload))
+
+    def _encode(self, value: Dict[str, Any], ttl_seconds: float) -> str:
+        payload = base64.b64encode(pickle.dumps(value)).decode("ascii")
+        return f"{time.time() + ttl_seconds} {payload}"
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        self.store.set(key, self._encode(value, ttl_seconds))
+
+    def set_if_generation(
+        self, key: str, value: Dict[str, Any], ttl_seconds: float, name: str, generation: str
+    ) -> bool:
+        return self.store.set_if(key, self._encode(value, ttl_seconds), self._generation_key(name), generation)
+
+    def generation(self, name: str) -> str:
+        return self.store.get(self._generation_key(name)) or "0"
+
+    def bump(self, name: str) -> None:
+        self.store.increment(self._generation_key(name))
+
+    def delete(self, key: str) -> None:
+        self.store.delete(key)
+
+
+class EntityCache:
+    """Read-through cache of one table's rows, keyed by primary key.
+
+    Rows are cached as plain column snapshots and handed back to the caller's
+    session with ``Session.merge(load=False)``, so a cache hit behaves like a
+    loaded instance, including for updates. Any committed change to the
+    table drops the row again; a read that raced with such a change is not
+    cached. With a shared tier, it is the only one consulted, and its
+    per-table generation catches races with writes in other workers.
+    Without one, the cache is per process and another worker's write can be
+    served stale for up to the TTL.
+    """
+
+    def __init__(self, model: Any, local: LocalBackend, shared: Optional[SharedBackend], ttl_seconds: float):
+        self.model = model
+        self.name = model.__tablename__
+        self.local = local
+        self.shared = shared
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, record_id: Any) -> Optional[str]:
+        try:
+            return f"{self.name}:{uuid.UUID(str(record_id))}"
+        except ValueError:
+            return None
+
+    def generation(self) -> Any:
+        if self.shared is not None:
+            return self.shared.generation(self.name)
+        return self._generation
+
+    def get(self, db: Session, record_id: Any) -> Optional[Any]:
+        key = self._key(record_id)
+        if key is None:
+            return None
+        if self.shared is not None:
+            state = self.shared.get(key)
+        else:
+            state = self.local.get(key)
+        with self._lock:
+            if state is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self.shared is not None:
+                self.shared_hits += 1
+        record = self.model(**state)
+        make_transient_to_detached(record)
+        return db.merge(record, load=False)
+
+    def put(self, record: Any, generation: Any) -> None:
+        """Cache ``record`` unless the table changed since ``generation`` was read."""
+        key = self._key(record.id)
+        if key is None:
+            return
+        state = {attr.key: getattr(record, attr.key) for attr in inspect(self.model).column_attrs}
+        if self.shared is not None:
+            self.shared.set_if_generation(key, state, self.ttl_seconds, self.name, generation)
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+        self.local.set(key, state, self.ttl_seconds)
+
+    def invalidate(self, record_id: Any) -> None:
+        key = self._key(record_id)
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+        if self.shared is not None:
+            self.shared.bump(self.name)
+        if key is None:
+            return
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.local),
+                "max_entries": self.local.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.local.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def _build_caches() -> Dict[Any, EntityCache]:
+    path = get_shared_path()
+    shared = DiskBackend(DiskStore(path, table="entity_cache")) if path else None
+    return {
+        model: EntityCache(model, LocalBackend(get_max_entries()), shared, get_ttl_seconds())
+        for model in CACHED_MODELS
+    }
+
+
+ENTITY_CACHES = _build_caches()
+
+
+def get_entity_cache(model: Any) -> Optional[EntityCache]:
+    if not cache_enabled():
+        return None
+    return ENTITY_CACHES.get(model)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_writes(session: Session, flush_context: Any) -> None:
+    changed = session.info.setdefault("entity_cache_pending", set())
+    for record in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(record) in ENTITY_CACHES:
+            changed.add((type(record), record.id))
+            # Drop the row right away too, so this transaction's other reads miss.
+            ENTITY_CACHES[type(record)].invalidate(record.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_writes(session: Session) -> None:
+    for model, record_id in session.info.pop("entity_cache_pending", ()):
+        ENTITY_CACHES[model].invalidate(record_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session: Session) -> None:
+    session.info.pop("entity_cache_pending", None)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {cache.name: cache.stats() for cache in ENTITY_CACHES.values()}
@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger("machine-mgmt.idempotency")
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Outcomes that say nothing about the request itself; a retry should run again.
+TRANSIENT_STATUSES = {408, 409, 429}
+
+IDEMPOTENT_REQUESTS = REGISTRY.counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key by outcome (stored, replayed, not_stored, in_progress, mismatch, rejected).",
+    ("outcome",),
+)
+
+
+def get_ttl_seconds() -> float:
+    return float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+
+def get_max_keys() -> int:
+    return int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+
+def get_max_response_bytes() -> int:
+    return int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", "1048576"))
+
+
+def get_wait_seconds() -> float:
+    return float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+
+
+def get_path_prefixes() -> Tuple[str, ...]:
+    raw = os.getenv("IDEMPOTENCY_PATH_PREFIXES", "/integrations/boomi/")
+    return tuple(prefix.strip() for prefix in raw.split(",") if prefix.strip())
+
+
+class StoredResponse(NamedTuple):
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    fingerprint: str
+
+
+class Entry:
+    """One key: in flight until ``done`` is set, then either a stored response or gone."""
+
+    __slots__ = ("done", "response", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.done = asyncio.Event()
+        self.response: Optional[StoredResponse] = None
+        self.expires_at = expires_at
+
+
+class StoreFull(Exception):
+    def __init__(self, in_flight: int):
+        super().__init__(f"{in_flight} requests with an {IDEMPOTENCY_KEY_HEADER} are in progress")
+        self.in_flight = in_flight
+
+
+class IdempotencyStore:
+    """Bounded, TTL-evicted map of ``(method, path, key) -> Entry``.
+
+    Only touched from the event loop, so it needs no lock. Entries live in
+    insertion order and share one TTL, which keeps eviction to scanning
+    from the front. The store is per process; retries that land on another
+    worker process are not deduplicated.
+    """
+
+    def __init__(self, max_keys: int, ttl_seconds: float):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Entry]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, now: float) -> bool:
+        """Drop expired responses, and the oldest ones while full; whether a slot is free.
+
+        Entries still in flight are never dropped: a duplicate arriving
+        meanwhile has to find them to wait instead of running again.
+        Completed entries are moved to the end when they finish, so they
+        are in expiry order.
+        """
+        excess = len(self._entries) - self.max_keys + 1
+        stale = []
+        for key, entry in self._entries.items():
+            if not entry.done.is_set():
+                continue
+            if entry.expires_at > now and len(stale) >= excess:
+                break
+            stale.append(key)
+        for key in stale:
+            del self._entries[key]
+        self.evictions += len(stale)
+        return len(self._entries) < self.max_keys
+
+    def begin(self, key: Tuple[str, str, str]) -> Tuple[Entry, bool]:
+        """The key's entry and whether the caller now owns it (and must ``finish`` it).
+
+        Raises ``StoreFull`` when every slot belongs to a request in flight.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and (not entry.done.is_set() or entry.expires_at > now):
+            return entry, False
+        self._entries.pop(key, None)
+        if not self._evict(now):
+            raise StoreFull(len(self._entries))
+        entry = Entry(now + self.ttl_seconds)
+        self._entries[key] = entry
+        return entry, True
+
+    def finish(self, key: Tuple[str, str, str], entry: Entry, response: Optional[StoredResponse]) -> None:
+        if response is None:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        else:
+            entry.response = response
+            entry.expires_at = time.monotonic() + self.ttl_seconds
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        entry.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        in_flight = sum(1 for entry in self._entries.values() if not entry.done.is_set())
+        return {
+            "entries": len(self._entries),
+            "in_flight": in_flight,
+            "max_keys": self.max_keys,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+        }
+
+
+store = IdempotencyStore(get_max_keys(), get_ttl_seconds())
+
+
+def store_stats() -> Dict[str, Any]:
+    return store.stats()
+
+
+async def _send_json(send: Send, status: int, detail: str, headers: Optional[Dict[str, str]] = None) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    raw_headers.extend((name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items())
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for a repeated ``Idempotency-Key`` instead of running the request again.
+
+    Applies to unsafe methods under ``IDEMPOTENCY_PATH_PREFIXES``. The
+    request body is fingerprinted as the endpoint consumes it, so streamed
+    bulk bodies are never buffered; a response is only stored when the whole
+    body was read, the status is not a transient one, and the response fits
+    in ``IDEMPOTENCY_MAX_RESPONSE_BYTES``. A duplicate that arrives while the
+    original is still running waits for it; if the original was not stored,
+    the duplicate runs itself.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.prefixes = get_path_prefixes()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = Headers(scope=scope).get(IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        key = (scope["method"], scope["path"], idempotency_key)
+        while True:
+            try:
+                entry, owner = store.begin(key)
+            except StoreFull as exc:
+                IDEMPOTENT_REQUESTS.inc(outcome="rejected")
+                logger.warning("Idempotency store full: %s", exc)
+                await _send_json(send, 429, "Too many requests in progress, retry shortly", {"Retry-After": "1"})
+                return
+            if owner:
+                break
+            try:
+                await asyncio.wait_for(entry.done.wait(), get_wait_seconds())
+            except asyncio.TimeoutError:
+                IDEMPOTENT_REQUESTS.inc(outcome="in_progress")
+                await _send_json(
+                    send,
+                    409,
+                    f"A request with this {IDEMPOTENCY_KEY_HEADER} is still in progress",
+                    {"Retry-After": str(int(get_wait_seconds()))},
+                )
+                return
+            if entry.response is not None:
+                await self._replay(entry.response, receive, send)
+                return
+
+        try:
+            response = await self._run(scope, receive, send)
+        except BaseException:
+            store.finish(key, entry, None)
+            raise
+        store.finish(key, entry, response)
+        IDEMPOTENT_REQUESTS.inc(outcome="stored" if response is not None else "not_stored")
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send) -> Optional[StoredResponse]:
+        digest = hashlib.sha256()
+        body_complete = False
+        status = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        max_bytes = get_max_response_bytes()
+
+        async def fingerprinting_receive() -> Message:
+            nonlocal body_complete
+            message = await receive()
+            if message["type"] == "http.request":
+                digest.update(message.get("body", b""))
+                body_complete = not message.get("more_body", False)
+            return message
+
+        async def capturing_send(message: Message) -> None:
+            nonlocal status, headers, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and size <= max_bytes:
+                body = message.get("body", b"")
+                size += len(body)
+                chunks.append(body)
+            await send(message)
+
+        await self.app(scope, fingerprinting_receive, capturing_send)
+        if not body_complete or status >= 500 or status in TRANSIENT_STATUSES or size > max_bytes:
+            return None
+        return StoredResponse(status, headers, b"".join(chunks), digest.hexdigest())
+
+    @staticmethod
+    async def _replay(response: StoredResponse, receive: Receive, send: Send) -> None:
+        digest = hashlib.sha256()
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            digest.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        if digest.hexdigest() != response.fingerprint:
+            IDEMPOTENT_REQUESTS.inc(outcome="mismatch")
+            logger.warning("%s reused with a different body", IDEMPOTENCY_KEY_HEADER)
+            await _send_json(send, 422, f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request body")
+            return
+        IDEMPOTENT_REQUESTS.inc(outcome="replayed")
+        headers = response.headers + [(REPLAYED_HEADER.lower().encode("latin-1"), b"true")]
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
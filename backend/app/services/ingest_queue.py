@@ -0,0 +1,475 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, exists, func, or_, update
+from sqlalchemy.orm import Session, aliased
+
+from app import crud, models
+from app.db import SessionLocal
+from app.services.jobs import utcnow
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger("machine-mgmt.ingest")
+
+CHUNK_STATUS_QUEUED = "QUEUED"
+CHUNK_STATUS_RUNNING = "RUNNING"
+CHUNK_STATUS_SUCCEEDED = "SUCCEEDED"
+CHUNK_STATUS_FAILED = "FAILED"
+PENDING_STATUSES = (CHUNK_STATUS_QUEUED, CHUNK_STATUS_RUNNING)
+
+HOUSEKEEPING_INTERVAL_SECONDS = 60
+
+INGEST_MODELS = {
+    model.__tablename__: model for model in (models.Account, models.Contact, models.Location, models.Machine)
+}
+
+# A chunk waits until every older chunk of its own entity or of a parent entity
+# is done: updates to one record keep their order and children never overtake
+# the accounts/locations they reference. Chunks that only hold records waiting
+# for a parent are the exception; newer chunks go ahead and keep back just the
+# records with the same external ids (see ``_held_external_ids``).
+ENTITY_PARENTS = {
+    "accounts": (),
+    "contacts": ("accounts",),
+    "locations": ("accounts",),
+    "machines": ("accounts", "locations"),
+}
+
+INGEST_CHUNKS = REGISTRY.counter(
+    "boomi_ingest_chunks_total",
+    "Ingest chunks finished by entity and status.",
+    ("entity", "status"),
+)
+INGEST_REJECTED = REGISTRY.counter("boomi_ingest_rejected_total", "Boomi requests refused with 429 (queue full).")
+INGEST_QUEUED_RECORDS = REGISTRY.gauge(
+    "boomi_ingest_queued_records",
+    "Records waiting in the ingest queue at the last capacity check.",
+)
+
+
+def ingest_async() -> bool:
+    return os.getenv("BOOMI_INGEST_ASYNC", "1") == "1"
+
+
+def get_worker_count() -> int:
+    return int(os.getenv("BOOMI_INGEST_WORKERS", "2"))
+
+
+def get_max_queued_records() -> int:
+    return int(os.getenv("BOOMI_INGEST_MAX_QUEUED_RECORDS", "50000"))
+
+
+def get_retry_after_seconds() -> int:
+    return int(os.getenv("BOOMI_INGEST_RETRY_AFTER_SECONDS", "30"))
+
+
+def get_poll_interval() -> float:
+    return float(os.getenv("BOOMI_INGEST_POLL_SECONDS", "5"))
+
+
+def get_max_attempts() -> int:
+    return int(os.getenv("BOOMI_INGEST_MAX_ATTEMPTS", "3"))
+
+
+def get_run_timeout_seconds() -> int:
+    return int(os.getenv("BOOMI_INGEST_RUN_TIMEOUT_SECONDS", "600"))
+
+
+def get_reference_wait_seconds() -> int:
+    return int(os.getenv("BOOMI_REFERENCE_WAIT_SECONDS", "900"))
+
+
+def get_retention_hours() -> int:
+    return int(os.getenv("BOOMI_INGEST_RETENTION_HOURS", "168"))
+
+
+class QueueFull(Exception):
+    def __init__(self, queued: int, retry_after: int):
+        super().__init__(f"Ingest queue is full ({queued} records waiting)")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+def queued_records(db: Session) -> int:
+    return (
+        db.query(func.coalesce(func.sum(models.IngestChunk.records), 0))
+        .filter(models.IngestChunk.status.in_(PENDING_STATUSES))
+        .scalar()
+    )
+
+
+def check_capacity(db: Session) -> None:
+    """Raise ``QueueFull`` while more than ``BOOMI_INGEST_MAX_QUEUED_RECORDS`` records wait."""
+    queued = queued_records(db)
+    INGEST_QUEUED_RECORDS.set(queued)
+    if queued >= get_max_queued_records():
+        INGEST_REJECTED.inc()
+        raise QueueFull(queued, get_retry_after_seconds())
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def add_chunk(
+    db: Session,
+    batch_id: uuid.UUID,
+    entity: str,
+    items: List[Tuple[int, Dict[str, Any], str]],
+    errors: List[Dict[str, Any]],
+) -> None:
+    """Stage ``(index, prepared payload, sync_hash)`` items of one batch; the caller commits.
+
+    Records that already failed validation are stored as the chunk's first
+    error results, so the batch reports them with everything else.
+    """
+    chunk = models.IngestChunk(
+        batch_id=batch_id,
+        entity=entity,
+        status=CHUNK_STATUS_QUEUED if items else CHUNK_STATUS_SUCCEEDED,
+        records=len(items) + len(errors),
+        payload=json.dumps([list(item) for item in items], default=_json_default, separators=(",", ":")),
+        error_count=len(errors),
+        error_results=json.dumps(errors) if errors else None,
+        finished_at=None if items else utcnow(),
+    )
+    db.add(chunk)
+    db.flush()
+    db.expunge(chunk)
+
+
+def _restore_types(model: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn ISO strings back into ``date``/``datetime`` for the model's temporal columns."""
+    columns = model.__table__.columns
+    for key, value in payload.items():
+        if not isinstance(value, str) or key not in columns:
+            continue
+        python_type = columns[key].type.python_type
+        if python_type is date:
+            payload[key] = date.fromisoformat(value)
+        elif python_type is datetime:
+            payload[key] = datetime.fromisoformat(value)
+    return payload
+
+
+def claim_next_chunk(db: Session, worker: str) -> Optional[models.IngestChunk]:
+    """Move the oldest runnable chunk to RUNNING for ``worker``, like ``jobs.claim_next_run``.
+
+    Chunks waiting out a retry still hold up newer chunks of their entity and
+    its children; otherwise the retried chunk would overwrite whatever a newer
+    chunk wrote to the same records. Chunks waiting for a parent do not.
+    """
+    chunk = models.IngestChunk
+    older = aliased(models.IngestChunk)
+    while True:
+        now = utcnow()
+        blocked = exists().where(
+            older.id < chunk.id,
+            older.status.in_(PENDING_STATUSES),
+            older.waiting_external_ids.is_(None),
+            or_(
+                *(
+                    and_(chunk.entity == entity, older.entity.in_((entity,) + parents))
+                    for entity, parents in ENTITY_PARENTS.items()
+                )
+            ),
+        )
+        chunk_id = (
+            db.query(chunk.id)
+            .filter(
+                chunk.status == CHUNK_STATUS_QUEUED,
+                or_(chunk.available_at.is_(None), chunk.available_at <= now),
+                ~blocked,
+            )
+            .order_by(chunk.id)
+            .limit(1)
+            .scalar()
+        )
+        if chunk_id is None:
+            db.rollback()
+            return None
+        claimed = db.execute(
+            update(chunk)
+            .where(chunk.id == chunk_id, chunk.status == CHUNK_STATUS_QUEUED)
+            .values(status=CHUNK_STATUS_RUNNING, worker=worker, started_at=now, attempts=chunk.attempts + 1)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.query(chunk).populate_existing().filter(chunk.id == chunk_id).one()
+
+
+def _accepted_for(chunk: models.IngestChunk) -> timedelta:
+    created_at = chunk.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return utcnow() - created_at
+
+
+def _defer(chunk: models.IngestChunk, items: List[List[Any]]) -> None:
+    """Put the chunk back in the queue holding only ``items``, for another try after two polls.
+
+    The chunk keeps its ``created_at``, which bounds how long its records wait
+    for their parents. It records their external ids, so newer chunks only
+    wait for it on those records. A deferral is not a failed attempt.
+    """
+    chunk.payload = json.dumps(items, separators=(",", ":"))
+    chunk.status = CHUNK_STATUS_QUEUED
+    chunk.available_at = utcnow() + timedelta(seconds=get_poll_interval() * 2)
+    chunk.attempts = 0
+    chunk.waiting_external_ids = json.dumps(sorted({item[1].get("external_id") for item in items} - {None}))
+
+
+def _held_external_ids(db: Session, chunk: models.IngestChunk) -> Set[str]:
+    """External ids that older chunks of the same entity still hold back for a parent.
+
+    Newer versions of those records wait behind them, so an update is never
+    overwritten by an older one that arrives late.
+    """
+    rows = (
+        db.query(models.IngestChunk.waiting_external_ids)
+        .filter(
+            models.IngestChunk.id < chunk.id,
+            models.IngestChunk.entity == chunk.entity,
+            models.IngestChunk.status.in_(PENDING_STATUSES),
+            models.IngestChunk.waiting_external_ids.isnot(None),
+        )
+        .all()
+    )
+    return {external_id for (waiting,) in rows for external_id in json.loads(waiting)}
+
+
+def process_chunk(db: Session, chunk: models.IngestChunk) -> None:
+    """Upsert the chunk's records through ``crud.boomi_bulk_upsert`` and record the outcome.
+
+    Records whose ``account_external_id``/``location_external_id`` does not
+    resolve yet stay queued in this chunk until the parent arrives, for at
+    most ``BOOMI_REFERENCE_WAIT_SECONDS`` after the batch was accepted, and so
+    do records an older chunk still holds back under the same external id. A chunk
+    whose transaction fails outright is retried with a growing delay until
+    ``BOOMI_INGEST_MAX_ATTEMPTS``; per-record constraint errors are reported
+    in the batch instead.
+    """
+    model = INGEST_MODELS[chunk.entity]
+    errors = json.loads(chunk.error_results) if chunk.error_results else []
+    try:
+        items = json.loads(chunk.payload)
+        held = _held_external_ids(db, chunk)
+        resolved, unresolved = crud.resolve_external_references(db, [payload for _, payload, _ in items])
+        may_wait = _accepted_for(chunk).total_seconds() < get_reference_wait_seconds()
+        ready, waiting = [], []
+        for item, payload, missing in zip(items, resolved, unresolved):
+            if payload.get("external_id") in held:
+                waiting.append(item)
+            elif missing is None:
+                ready.append((item, _restore_types(model, payload)))
+            elif may_wait:
+                waiting.append(item)
+            else:
+                errors.append(
+                    {"index": item[0], "external_id": payload.get("external_id"), "status": "error", "error": missing}
+                )
+        outcomes = crud.boomi_bulk_upsert(db, model, [(payload, item[2]) for item, payload in ready]) if ready else []
+    except Exception as exc:  # noqa: BLE001 - recorded on the chunk
+        logger.exception("Ingest chunk %s (%s) failed", chunk.id, chunk.entity)
+        db.rollback()
+        chunk.error = str(exc)
+        if chunk.attempts >= get_max_attempts():
+            chunk.status = CHUNK_STATUS_FAILED
+            chunk.finished_at = utcnow()
+            chunk.waiting_external_ids = None
+        else:
+            chunk.status = CHUNK_STATUS_QUEUED
+            chunk.available_at = utcnow() + timedelta(seconds=get_poll_interval() * 2**chunk.attempts)
+        db.commit()
+        if chunk.status == CHUNK_STATUS_FAILED:
+            INGEST_CHUNKS.inc(entity=chunk.entity, status=chunk.status)
+        return
+    counts = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+    for (item, payload), outcome in zip(ready, outcomes):
+        counts[outcome["status"]] += 1
+        if outcome["status"] == "error":
+            errors.append(
+                {
+                    "index": item[0],
+                    "external_id": payload.get("external_id"),
+                    "status": "error",
+                    "error": outcome["error"],
+                }
+            )
+    chunk.created_count += counts["created"]
+    chunk.updated_count += counts["updated"]
+    chunk.skipped_count += counts["skipped"]
+    chunk.error_count = len(errors)
+    chunk.error_results = json.dumps(errors) if errors else None
+    chunk.error = None
+    if waiting:
+        _defer(chunk, waiting)
+        db.commit()
+        return
+    chunk.status = CHUNK_STATUS_SUCCEEDED
+    chunk.finished_at = utcnow()
+    chunk.waiting_external_ids = None
+    db.commit()
+    INGEST_CHUNKS.inc(entity=chunk.entity, status=chunk.status)
+
+
+def requeue_abandoned_chunks(db: Session) -> int:
+    """Put chunks left RUNNING by a crashed worker back in the queue, or fail them after the last attempt."""
+    cutoff = utcnow() - timedelta(seconds=get_run_timeout_seconds())
+    abandoned = (models.IngestChunk.status == CHUNK_STATUS_RUNNING, models.IngestChunk.started_at < cutoff)
+    failed = db.execute(
+        update(models.IngestChunk)
+        .where(*abandoned, models.IngestChunk.attempts >= get_max_attempts())
+        .values(status=CHUNK_STATUS_FAILED, error="Abandoned by worker", finished_at=utcnow())
+    ).rowcount
+    requeued = db.execute(
+        update(models.IngestChunk).where(*abandoned).values(status=CHUNK_STATUS_QUEUED, error="Abandoned by worker")
+    ).rowcount
+    db.commit()
+    return failed + requeued
+
+
+def purge_finished_chunks(db: Session) -> int:
+    cutoff = utcnow() - timedelta(hours=get_retention_hours())
+    result = db.execute(
+        delete(models.IngestChunk).where(
+            models.IngestChunk.status.in_((CHUNK_STATUS_SUCCEEDED, CHUNK_STATUS_FAILED)),
+            models.IngestChunk.finished_at < cutoff,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def _batch_status(statuses: List[str]) -> str:
+    if CHUNK_STATUS_FAILED in statuses:
+        return CHUNK_STATUS_FAILED
+    if CHUNK_STATUS_RUNNING in statuses:
+        return CHUNK_STATUS_RUNNING
+    if CHUNK_STATUS_QUEUED in statuses:
+        return CHUNK_STATUS_QUEUED
+    return CHUNK_STATUS_SUCCEEDED
+
+
+def get_batch(db: Session, batch_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        batch_uuid = uuid.UUID(batch_id)
+    except ValueError:
+        return None
+    chunks = (
+        db.query(models.IngestChunk)
+        .populate_existing()
+        .filter(models.IngestChunk.batch_id == batch_uuid)
+        .order_by(models.IngestChunk.id)
+        .all()
+    )
+    if not chunks:
+        return None
+    results = []
+    for chunk in chunks:
+        if chunk.error_results:
+            results.extend(json.loads(chunk.error_results))
+    finished = [chunk.finished_at for chunk in chunks]
+    return {
+        "batch_id": str(batch_uuid),
+        "entity": chunks[0].entity,
+        "status": _batch_status([chunk.status for chunk in chunks]),
+        "records": sum(chunk.records for chunk in chunks),
+        "created": sum(chunk.created_count for chunk in chunks),
+        "updated": sum(chunk.updated_count for chunk in chunks),
+        "skipped": sum(chunk.skipped_count for chunk in chunks),
+        "errors": sum(chunk.error_count for chunk in chunks),
+        "error": next((chunk.error for chunk in chunks if chunk.status == CHUNK_STATUS_FAILED), None),
+        "created_at": chunks[0].created_at,
+        "finished_at": max(finished) if all(finished) else None,
+        "results": sorted(results, key=lambda result: result["index"]),
+    }
+
+
+class IngestWorkers:
+    """Pool of threads draining ``boomi_ingest_chunks``.
+
+    Every worker process runs ``BOOMI_INGEST_WORKERS`` of them; claims are
+    conditional updates, so any number of processes can share the queue.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = get_poll_interval()
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._last_housekeeping = 0.0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for number in range(get_worker_count()):
+            thread = threading.Thread(target=self._loop, args=(number,), name=f"boomi-ingest-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self._threads:
+            logger.info("Started %s ingest workers as %s", len(self._threads), self.worker_id)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.wake()
+        for thread in self._threads:
+            thread.join(timeout=self.poll_interval)
+        self._threads = []
+
+    def wake(self) -> None:
+        with self._wake:
+            self._wake.notify_all()
+
+    def _loop(self, number: int) -> None:
+        worker = f"{self.worker_id}:{number}"
+        while not self._stop.is_set():
+            try:
+                if number == 0:
+                    self._housekeeping()
+                self.drain(worker)
+            except Exception:  # noqa: BLE001 - keep the worker alive
+                logger.exception("Ingest worker %s failed", worker)
+            with self._wake:
+                self._wake.wait(self.poll_interval)
+
+    def _housekeeping(self) -> None:
+        if time.monotonic() - self._last_housekeeping < HOUSEKEEPING_INTERVAL_SECONDS:
+            return
+        self._last_housekeeping = time.monotonic()
+        db = self.session_factory()
+        try:
+            requeue_abandoned_chunks(db)
+            purge_finished_chunks(db)
+        finally:
+            db.close()
+
+    def drain(self, worker: str) -> int:
+        processed = 0
+        db = self.session_factory()
+        try:
+            while not self._stop.is_set():
+                chunk = claim_next_chunk(db, worker)
+                if chunk is None:
+                    break
+                process_chunk(db, chunk)
+                db.expunge_all()
+                processed += 1
+        finally:
+            db.close()
+        return processed
+
+
+ingest_workers = IngestWorkers()
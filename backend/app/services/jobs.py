@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import commit_keeping
+from app.services.alert_generation import (
+    ALERT_GENERATION_JOB,
+    generate_alerts_for_range,
+    generate_missed_alerts,
+    get_last_success_date,
+)
+from app.utils.metrics import REGISTRY
+from app.utils.time import today
+
+logger = logging.getLogger("machine-mgmt.jobs")
+
+JOB_STATUS_QUEUED = "QUEUED"
+JOB_STATUS_RUNNING = "RUNNING"
+JOB_STATUS_SUCCEEDED = "SUCCEEDED"
+JOB_STATUS_FAILED = "FAILED"
+
+JobFunction = Callable[[Session, Dict[str, Any]], Dict[str, Any]]
+DueCheck = Callable[[Session, datetime], bool]
+
+JOBS: Dict[str, JobFunction] = {}
+SCHEDULES: Dict[str, DueCheck] = {}
+
+JOB_RUNS = REGISTRY.counter("job_runs_total", "Finished job runs by job and status.", ("job", "status"))
+JOB_RUN_SECONDS = REGISTRY.histogram(
+    "job_run_duration_seconds",
+    "Duration of job runs.",
+    ("job",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+)
+
+
+def get_run_timeout_seconds() -> int:
+    return int(os.getenv("JOB_RUN_TIMEOUT_SECONDS", "3600"))
+
+
+def get_retry_backoff_seconds() -> int:
+    return int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "900"))
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def register_job(name: str, is_due: Optional[DueCheck] = None):
+    """Register ``func(db, params) -> dict`` as a job, optionally scheduled by ``is_due(db, now)``."""
+
+    def decorator(func: JobFunction) -> JobFunction:
+        JOBS[name] = func
+        if is_due is not None:
+            SCHEDULES[name] = is_due
+        return func
+
+    return decorator
+
+
+def enqueue_job(db: Session, job_name: str, params: Optional[Dict[str, Any]] = None) -> models.JobRun:
+    if job_name not in JOBS:
+        raise ValueError(f"Unknown job {job_name}")
+    run = models.JobRun(
+        job_name=job_name,
+        status=JOB_STATUS_QUEUED,
+        params=json.dumps(params or {}, default=str),
+    )
+    db.add(run)
+    commit_keeping(db, run)
+    return run
+
+
+def get_job_run(db: Session, run_id: str) -> Optional[models.JobRun]:
+    return db.query(models.JobRun).populate_existing().filter(models.JobRun.id == run_id).first()
+
+
+def has_pending_run(db: Session, job_name: str) -> bool:
+    return (
+        db.query(models.JobRun.id)
+        .filter(
+            models.JobRun.job_name == job_name,
+            models.JobRun.status.in_([JOB_STATUS_QUEUED, JOB_STATUS_RUNNING]),
+        )
+        .first()
+        is not None
+    )
+
+
+def has_recent_failure(db: Session, job_name: str) -> bool:
+    cutoff = utcnow() - timedelta(seconds=get_retry_backoff_seconds())
+    return (
+        db.query(models.JobRun.id)
+        .filter(
+            models.JobRun.job_name == job_name,
+            models.JobRun.status == JOB_STATUS_FAILED,
+            models.JobRun.finished_at >= cutoff,
+        )
+        .first()
+        is not None
+    )
+
+
+def is_schedule_due(db: Session, job_name: str, now: datetime) -> bool:
+    if job_name not in SCHEDULES:
+        return False
+    if has_pending_run(db, job_name) or has_recent_failure(db, job_name):
+        return False
+    return SCHEDULES[job_name](db, now)
+
+
+def fail_abandoned_runs(db: Session) -> int:
+    """Mark runs left RUNNING by a crashed worker as failed."""
+    cutoff = utcnow() - timedelta(seconds=get_run_timeout_seconds())
+    result = db.execute(
+        update(models.JobRun)
+        .where(models.JobRun.status == JOB_STATUS_RUNNING, models.JobRun.started_at < cutoff)
+        .values(status=JOB_STATUS_FAILED, error="Abandoned by worker", finished_at=utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+
+def claim_next_run(db: Session, worker: str) -> Optional[models.JobRun]:
+    """Atomically move the oldest queued run to RUNNING for ``worker``.
+
+    The conditional UPDATE makes the claim safe even if two workers briefly
+    both believe they are the leader.
+    """
+    while True:
+        run_id = (
+            db.query(models.JobRun.id)
+            .filter(models.JobRun.status == JOB_STATUS_QUEUED)
+            .order_by(models.JobRun.created_at)
+            .limit(1)
+            .scalar()
+        )
+        if run_id is None:
+            db.rollback()
+            return None
+        claimed = db.execute(
+            update(models.JobRun)
+            .where(models.JobRun.id == run_id, models.JobRun.status == JOB_STATUS_QUEUED)
+            .values(status=JOB_STATUS_RUNNING, worker=worker, started_at=utcnow())
+        ).rowcount
+        db.commit()
+        if claimed:
+            return get_job_run(db, run_id)
+
+
+def execute_run(db: Session, run: models.JobRun) -> models.JobRun:
+    started = time.perf_counter()
+    try:
+        params = json.loads(run.params) if run.params else {}
+        result = JOBS[run.job_name](db, params)
+    except Exception as exc:  # noqa: BLE001 - recorded on the run
+        logger.exception("Job %s (%s) failed", run.job_name, run.id)
+        db.rollback()
+        run.status = JOB_STATUS_FAILED
+        run.error = str(exc)
+    else:
+        run.status = JOB_STATUS_SUCCEEDED
+        run.result = json.dumps(result, default=str)
+    run.finished_at = utcnow()
+    elapsed = time.perf_counter() - started
+    run.duration_ms = int(elapsed * 1000)
+    db.commit()
+    JOB_RUNS.inc(job=run.job_name, status=run.status)
+    JOB_RUN_SECONDS.observe(elapsed, job=run.job_name)
+    logger.info("Job %s (%s) %s in %sms", run.job_name, run.id, run.status, run.duration_ms)
+    return run
+
+
+def _generate_alerts_due(db: Session, now: datetime) -> bool:
+    run_at = os.getenv("ALERT_GENERATION_RUN_AT", "02:00")
+    hour, minute = (int(part) for part in run_at.split(":"))
+    if (now.hour, now.minute) < (hour, minute):
+        return False
+    last_success = get_last_success_date(db)
+    return last_success is None or last_success < today()
+
+
+@register_job(ALERT_GENERATION_JOB, is_due=_generate_alerts_due)
+def run_generate_alerts(db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    if params.get("from_date") and params.get("to_date"):
+        start = date.fromisoformat(params["from_date"])
+        end = date.fromisoformat(params["to_date"])
+        return generate_alerts_for_range(db, start, end)
+    return generate_missed_alerts(db, today())
@@ -0,0 +1,155 @@
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("machine-mgmt.sql")
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(\?|%s)(\s*,\s*(\?|%s))*\s*\)")
+_STATEMENT_LOG_LENGTH = 500
+
+
+def query_stats_enabled() -> bool:
+    return os.getenv("QUERY_STATS_ENABLED", "1") == "1"
+
+
+def query_stats_headers_enabled() -> bool:
+    return os.getenv("QUERY_STATS_HEADERS", "0") == "1"
+
+
+def get_slow_query_ms() -> float:
+    return float(os.getenv("SLOW_QUERY_MS", "200"))
+
+
+def get_repeated_query_threshold() -> int:
+    return int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with whitespace collapsed and expanded ``IN (?, ?, ...)`` lists folded to ``(?)``."""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _truncate(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    if len(statement) <= _STATEMENT_LOG_LENGTH:
+        return statement
+    return statement[:_STATEMENT_LOG_LENGTH] + "..."
+
+
+class QueryStats:
+    """SQL statements run on behalf of one request.
+
+    One instance is bound to the request's context; the engine listeners
+    below add to it from whichever thread runs the route.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.db_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run more than ``threshold`` times, most frequent first (likely N+1s)."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def log_fields(self) -> Dict[str, Any]:
+        return {
+            "db_queries": self.count,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "db_slowest_ms": round(self.slowest_seconds * 1000, 1),
+            "duration_ms": round(self.elapsed_seconds() * 1000, 1),
+        }
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            QUERY_COUNT_HEADER: str(self.count),
+            SERVER_TIMING_HEADER: (
+                f'db;dur={self.db_seconds * 1000:.1f};desc="{self.count} queries", '
+                f"db-slowest;dur={self.slowest_seconds * 1000:.1f}, "
+                f"app;dur={self.elapsed_seconds() * 1000:.1f}"
+            ),
+        }
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def start_request() -> Tuple[QueryStats, contextvars.Token]:
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def report_repeated(stats: QueryStats, method: str, path: str) -> None:
+    for shape, count in stats.repeated(get_repeated_query_threshold()):
+        logger.warning(
+            "Possible N+1 in %s %s: statement ran %s times: %s",
+            method,
+            path,
+            count,
+            _truncate(shape),
+            extra={"db_repeated_count": count, "db_repeated_statement": shape},
+        )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop()
+    if not query_stats_enabled():
+        return
+    seconds = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    threshold_ms = get_slow_query_ms()
+    if threshold_ms >= 0 and seconds * 1000 >= threshold_ms:
+        logger.warning(
+            "Slow query (%.1f ms): %s",
+            seconds * 1000,
+            _truncate(statement),
+            extra={"db_ms": round(seconds * 1000, 1), "db_statement": statement},
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
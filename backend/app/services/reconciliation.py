@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import SessionLocal
+from app.utils.bulk import chunked
+
+logger = logging.getLogger("machine-mgmt.reconciliation")
+
+RECONCILED_MODELS = {
+    model.__tablename__: model for model in (models.Account, models.Contact, models.Location, models.Machine)
+}
+
+# Buckets are prefixes of sha256(external_id) in hex; four characters gives
+# 65536 leaves, a handful of records each at 500k rows.
+MAX_DEPTH = 4
+HEX_DIGITS = "0123456789abcdef"
+
+
+def get_leaf_size() -> int:
+    return int(os.getenv("RECONCILE_LEAF_SIZE", "64"))
+
+
+def get_snapshot_seconds() -> float:
+    return float(os.getenv("RECONCILE_SNAPSHOT_SECONDS", "300"))
+
+
+def get_max_buckets() -> int:
+    return int(os.getenv("RECONCILE_MAX_BUCKETS", "4096"))
+
+
+def bucket_of(external_id: str) -> str:
+    return hashlib.sha256(external_id.encode("utf-8")).hexdigest()[:MAX_DEPTH]
+
+
+def item_digest(external_id: str, sync_hash: Optional[str]) -> int:
+    return int.from_bytes(hashlib.sha256(f"{external_id}\n{sync_hash or ''}".encode("utf-8")).digest(), "big")
+
+
+def format_digest(value: int) -> str:
+    return f"{value:064x}"
+
+
+class BucketDigest(NamedTuple):
+    count: int
+    digest: int
+
+
+class Snapshot:
+    """``(count, XOR of item digests)`` for every bucket prefix, plus the external ids of each leaf.
+
+    XOR makes a bucket's digest the combination of its children's, so all
+    levels come out of one pass over the ``external_id``/``sync_hash`` index.
+    """
+
+    def __init__(self, rows: Any):
+        self.built_at = time.monotonic()
+        counts: Dict[str, int] = {}
+        digests: Dict[str, int] = {}
+        self.leaves: Dict[str, List[str]] = {}
+        for external_id, sync_hash in rows:
+            leaf = bucket_of(external_id)
+            digest = item_digest(external_id, sync_hash)
+            self.leaves.setdefault(leaf, []).append(external_id)
+            for depth in range(MAX_DEPTH + 1):
+                prefix = leaf[:depth]
+                counts[prefix] = counts.get(prefix, 0) + 1
+                digests[prefix] = digests.get(prefix, 0) ^ digest
+        self.buckets = {prefix: BucketDigest(counts[prefix], digests[prefix]) for prefix in counts}
+
+    def bucket(self, prefix: str) -> BucketDigest:
+        return self.buckets.get(prefix, BucketDigest(0, 0))
+
+    def external_ids(self, prefix: str) -> List[str]:
+        if len(prefix) == MAX_DEPTH:
+            return list(self.leaves.get(prefix, ()))
+        return [external_id for leaf, ids in self.leaves.items() if leaf.startswith(prefix) for external_id in ids]
+
+
+_snapshots: Dict[str, Snapshot] = {}
+_locks = {name: threading.Lock() for name in RECONCILED_MODELS}
+
+
+def _live_synced(model: Any):
+    return model.external_id.isnot(None), model.is_deleted == False  # noqa: E712
+
+
+def get_snapshot(model: Any) -> Snapshot:
+    """The model's snapshot, rebuilt once it is older than ``RECONCILE_SNAPSHOT_SECONDS``.
+
+    One reconciliation walk takes a few requests; they all compare against
+    the same snapshot, and leaves are always checked against fresh rows.
+    """
+    name = model.__tablename__
+    with _locks[name]:
+        snapshot = _snapshots.get(name)
+        if snapshot is not None and time.monotonic() - snapshot.built_at < get_snapshot_seconds():
+            return snapshot
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            rows = db.query(model.external_id, model.sync_hash).filter(*_live_synced(model)).yield_per(10000)
+            snapshot = Snapshot(rows)
+        finally:
+            db.close()
+        _snapshots[name] = snapshot
+        logger.info(
+            "Built %s reconciliation snapshot of %s records in %.1fs",
+            name,
+            snapshot.bucket("").count,
+            time.perf_counter() - started,
+        )
+        return snapshot
+
+
+def _validate_prefix(prefix: str) -> str:
+    prefix = prefix.lower()
+    if len(prefix) > MAX_DEPTH or any(char not in HEX_DIGITS for char in prefix):
+        raise ValueError(f"Invalid bucket prefix {prefix!r}: up to {MAX_DEPTH} hex digits")
+    return prefix
+
+
+def _compare_items(
+    db: Session,
+    model: Any,
+    snapshot: Snapshot,
+    prefix: str,
+    items: Dict[str, Optional[str]],
+) -> Tuple[List[str], List[str]]:
+    """``(resend, stale)`` for one bucket, checked against the current rows rather than the snapshot."""
+    candidates = set(snapshot.external_ids(prefix))
+    candidates.update(external_id for external_id in items if bucket_of(external_id).startswith(prefix))
+    current: Dict[str, Optional[str]] = {}
+    for chunk in chunked(sorted(candidates), 1000):
+        rows = db.query(model.external_id, model.sync_hash).filter(*_live_synced(model), model.external_id.in_(chunk))
+        current.update(rows)
+    client = {external_id: sync_hash for external_id, sync_hash in items.items() if external_id in candidates}
+    resend = sorted(
+        external_id
+        for external_id, sync_hash in client.items()
+        if external_id not in current or current[external_id] != sync_hash
+    )
+    stale = sorted(external_id for external_id in current if external_id not in client)
+    return resend, stale
+
+
+def reconcile(db: Session, entity: str, buckets: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compare the caller's bucket digests with ours and say where they diverge.
+
+    Matching buckets are done. A diverging bucket that came with its
+    ``items`` (``external_id -> sync_hash``) is resolved into ids to
+    ``resend`` and ids we hold that the caller does not (``stale``). A
+    diverging bucket without items is answered with our digests of its 16
+    children, or, once it is small or at full depth, with a request to send
+    its items. Raises ``ValueError`` for malformed buckets.
+    """
+    if len(buckets) > get_max_buckets():
+        raise ValueError(f"At most {get_max_buckets()} buckets per request")
+    model = RECONCILED_MODELS[entity]
+    snapshot = get_snapshot(model)
+    leaf_size = get_leaf_size()
+    matched = 0
+    split: List[Dict[str, Any]] = []
+    send_items: List[str] = []
+    resend: List[str] = []
+    stale: List[str] = []
+    for bucket in buckets:
+        prefix = _validate_prefix(bucket["prefix"])
+        ours = snapshot.bucket(prefix)
+        if ours.count == bucket["count"] and format_digest(ours.digest) == bucket["digest"].lower():
+            matched += 1
+            continue
+        if bucket.get("items") is not None:
+            bucket_resend, bucket_stale = _compare_items(db, model, snapshot, prefix, bucket["items"])
+            resend.extend(bucket_resend)
+            stale.extend(bucket_stale)
+        elif len(prefix) == MAX_DEPTH or max(ours.count, bucket["count"]) <= leaf_size:
+            send_items.append(prefix)
+        else:
+            for digit in HEX_DIGITS:
+                child = snapshot.bucket(prefix + digit)
+                split.append({"prefix": prefix + digit, "count": child.count, "digest": format_digest(child.digest)})
+    return {
+        "matched": matched,
+        "split": split,
+        "send_items": send_items,
+        "resend": resend,
+        "stale": stale,
+        "leaf_size": leaf_size,
+    }
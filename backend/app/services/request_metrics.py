@@ -0,0 +1,90 @@
+import logging
+import os
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import query_stats
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger("machine-mgmt.requests")
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Request latency by method, route template and status code.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled.")
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def get_slow_request_ms() -> float:
+    return float(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route (``/machines/{machine_id}``), so metrics do not explode per id."""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """Times every HTTP request into ``http_request_duration_seconds`` and binds its ``QueryStats``.
+
+    A plain ASGI middleware rather than ``@app.middleware("http")``, so
+    responses are not re-wrapped and streamed bodies pass straight through.
+    Requests are logged at DEBUG, or at WARNING when slower than
+    ``SLOW_REQUEST_MS``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats, token = query_stats.start_request()
+        headers_enabled = query_stats.query_stats_headers_enabled()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if headers_enabled:
+                    MutableHeaders(scope=message).update(stats.headers())
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            query_stats.end_request(token)
+            self._record(scope, status, stats)
+
+    @staticmethod
+    def _record(scope: Scope, status: int, stats: query_stats.QueryStats) -> None:
+        elapsed = stats.elapsed_seconds()
+        method = scope["method"]
+        route = route_template(scope)
+        REQUEST_SECONDS.observe(elapsed, method=method, route=route, status=str(status))
+        query_stats.report_repeated(stats, method, scope["path"])
+        slow = elapsed * 1000 >= get_slow_request_ms()
+        if not slow and not logger.isEnabledFor(logging.DEBUG):
+            return
+        fields = stats.log_fields()
+        logger.log(
+            logging.WARNING if slow else logging.DEBUG,
+            "%s %s -> %s (%s ms, %s queries, %s ms in db)",
+            method,
+            scope["path"],
+            status,
+            fields["duration_ms"],
+            fields["db_queries"],
+            fields["db_ms"],
+            extra={"method": method, "path": scope["path"], "route": route, "status": status, **fields},
+        )
@@ -0,0 +1,164 @@
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import SessionLocal
+from app.services import jobs
+
+logger = logging.getLogger("machine-mgmt.scheduler")
+
+SCHEDULER_LOCK = "scheduler"
+
+
+def scheduler_enabled() -> bool:
+    return os.getenv("JOB_SCHEDULER_ENABLED", "1") == "1"
+
+
+def get_poll_interval() -> float:
+    return float(os.getenv("JOB_SCHEDULER_POLL_SECONDS", "30"))
+
+
+def get_lease_seconds() -> int:
+    return int(os.getenv("JOB_SCHEDULER_LEASE_SECONDS", "120"))
+
+
+def acquire_lease(db: Session, name: str, owner: str, lease_seconds: int) -> bool:
+    """Take or renew the ``job_locks`` row ``name`` for ``owner``.
+
+    The row is claimed when it is free, already ours or expired. Only the
+    holder of the lease runs jobs, so scaling out uvicorn workers does not
+    run the same job twice.
+    """
+    now = jobs.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    renewed = db.execute(
+        update(models.JobLock)
+        .where(
+            models.JobLock.name == name,
+            (models.JobLock.owner == owner) | (models.JobLock.expires_at < now),
+        )
+        .values(owner=owner, expires_at=expires_at)
+    ).rowcount
+    if renewed:
+        db.commit()
+        return True
+    db.add(models.JobLock(name=name, owner=owner, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def release_lease(db: Session, name: str, owner: str) -> None:
+    db.query(models.JobLock).filter(models.JobLock.name == name, models.JobLock.owner == owner).delete()
+    db.commit()
+
+
+class Scheduler:
+    """Background thread that enqueues scheduled jobs and drains the job queue.
+
+    Every worker process runs one, but only the lease holder does any work;
+    the others just keep trying to take the lease over in case it expires.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = get_poll_interval()
+        self.lease_seconds = get_lease_seconds()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Job scheduler started as %s", self.worker_id)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=self.poll_interval)
+        self._thread = None
+        db = self.session_factory()
+        try:
+            release_lease(db, SCHEDULER_LOCK, self.worker_id)
+        finally:
+            db.close()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:  # noqa: BLE001 - keep the scheduler alive
+                logger.exception("Job scheduler tick failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def tick(self) -> None:
+        db = self.session_factory()
+        try:
+            if not acquire_lease(db, SCHEDULER_LOCK, self.worker_id, self.lease_seconds):
+                return
+            jobs.fail_abandoned_runs(db)
+            now = jobs.utcnow()
+            for job_name in list(jobs.SCHEDULES):
+                if jobs.is_schedule_due(db, job_name, now):
+                    jobs.enqueue_job(db, job_name)
+            while not self._stop.is_set():
+                run = jobs.claim_next_run(db, self.worker_id)
+                if run is None:
+                    break
+                with self._heartbeat():
+                    jobs.execute_run(db, run)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _heartbeat(self) -> Iterator[None]:
+        """Keep renewing the lease from a side thread while a job runs.
+
+        Jobs can run far longer than the lease; without renewal another
+        worker would take it over and start draining the queue concurrently.
+        """
+        done = threading.Event()
+
+        def renew() -> None:
+            while not done.wait(self.lease_seconds / 3):
+                db = self.session_factory()
+                try:
+                    if not acquire_lease(db, SCHEDULER_LOCK, self.worker_id, self.lease_seconds):
+                        logger.warning("Job scheduler %s lost its lease during a run", self.worker_id)
+                except Exception:  # noqa: BLE001 - retried on the next beat
+                    logger.exception("Job scheduler lease renewal failed")
+                finally:
+                    db.close()
+
+        thread = threading.Thread(target=renew, name="job-scheduler-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+
+scheduler = Scheduler()
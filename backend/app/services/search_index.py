@@ -0,0 +1,431 @@
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import SessionLocal, engine
+
+logger = logging.getLogger("machine-mgmt.search")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchEntity(NamedTuple):
+    name: str
+    model: Any
+    fields: Tuple[str, ...]
+    label_sql: str
+
+
+SEARCH_ENTITIES = (
+    SearchEntity("accounts", models.Account, ("name", "account_number", "email"), "t.name"),
+    SearchEntity(
+        "contacts",
+        models.Contact,
+        ("first_name", "last_name", "display_name", "email"),
+        "COALESCE(t.display_name, CONCAT(t.first_name, ' ', t.last_name))",
+    ),
+    SearchEntity("locations", models.Location, ("location_code", "name", "city"), "COALESCE(t.name, t.location_code)"),
+    SearchEntity("machines", models.Machine, ("machine_number", "machine_name"), "t.machine_name"),
+)
+ENTITIES_BY_MODEL = {entity.model: entity for entity in SEARCH_ENTITIES}
+ENTITY_NAMES = tuple(entity.name for entity in SEARCH_ENTITIES)
+
+
+def get_search_backend_setting() -> str:
+    return os.getenv("SEARCH_BACKEND", "auto")
+
+
+def get_refresh_seconds() -> float:
+    return float(os.getenv("SEARCH_REFRESH_SECONDS", "30"))
+
+
+def get_refresh_overlap_seconds() -> float:
+    return float(os.getenv("SEARCH_REFRESH_OVERLAP_SECONDS", "60"))
+
+
+def normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(value: str) -> List[str]:
+    return _WORD.findall(normalize(value))
+
+
+def _trigrams(token: str, prefix: bool, whole_word: bool = False) -> Set[str]:
+    """Trigrams of ``token``; with ``prefix`` the word start is padded so short prefixes still match."""
+    if prefix:
+        token = f"  {token} " if whole_word else f"  {token}"
+    return {token[i : i + 3] for i in range(len(token) - 2)}
+
+
+def _label(entity: str, record: Any) -> str:
+    if entity == "contacts":
+        return record.display_name or " ".join(filter(None, (record.first_name, record.last_name)))
+    if entity == "locations":
+        return record.name or record.location_code
+    if entity == "machines":
+        return record.machine_name
+    return record.name
+
+
+def _account_id(entity: str, record: Any) -> Optional[str]:
+    account_id = record.id if entity == "accounts" else record.account_id
+    return str(account_id) if account_id else None
+
+
+class _Doc(NamedTuple):
+    entity: str
+    id: str
+    account_id: Optional[str]
+    label: str
+    words: Tuple[str, ...]
+
+
+class TrigramIndex:
+    """In-process trigram index over the searchable fields of all entities.
+
+    Words are indexed with their start padded (``"  ma"``, ``" mac"``...), so
+    a query token matches word prefixes of any length; tokens of three or
+    more characters also match inside words as a fallback. Documents are
+    numbered internally to keep the posting sets small.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._docs: Dict[int, _Doc] = {}
+        self._numbers: Dict[Tuple[str, str], int] = {}
+        self._prefix_postings: Dict[str, Set[int]] = {}
+        self._infix_postings: Dict[str, Set[int]] = {}
+        self._next_number = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(
+        self,
+        entity: str,
+        record_id: str,
+        account_id: Optional[str],
+        label: str,
+        values: Iterable[Optional[str]],
+        replace: bool = True,
+    ) -> None:
+        words = tuple(dict.fromkeys(word for value in values if value for word in tokenize(value)))
+        with self._lock:
+            key = (entity, record_id)
+            if key in self._numbers:
+                if not replace:
+                    return
+                self._remove_locked(key)
+            number = self._next_number
+            self._next_number += 1
+            self._numbers[key] = number
+            self._docs[number] = _Doc(entity, record_id, account_id, label or "", words)
+            for word in words:
+                for gram in _trigrams(word, prefix=True, whole_word=True):
+                    self._prefix_postings.setdefault(gram, set()).add(number)
+                for gram in _trigrams(word, prefix=False):
+                    self._infix_postings.setdefault(gram, set()).add(number)
+
+    def remove(self, entity: str, record_id: str) -> None:
+        with self._lock:
+            self._remove_locked((entity, record_id))
+
+    def _remove_locked(self, key: Tuple[str, str]) -> None:
+        number = self._numbers.pop(key, None)
+        if number is None:
+            return
+        doc = self._docs.pop(number)
+        for word in doc.words:
+            for postings, prefix in ((self._prefix_postings, True), (self._infix_postings, False)):
+                for gram in _trigrams(word, prefix, whole_word=True):
+                    bucket = postings.get(gram)
+                    if bucket is not None:
+                        bucket.discard(number)
+                        if not bucket:
+                            del postings[gram]
+
+    def _candidates(self, tokens: Sequence[str], prefix: bool) -> Set[int]:
+        postings = self._prefix_postings if prefix else self._infix_postings
+        grams = set()
+        for token in tokens:
+            grams |= _trigrams(token, prefix)
+        buckets = sorted((postings.get(gram, set()) for gram in grams), key=len)
+        if not buckets or not buckets[0]:
+            return set()
+        result = set(buckets[0])
+        for bucket in buckets[1:]:
+            result &= bucket
+            if not result:
+                break
+        return result
+
+    @staticmethod
+    def _score(doc: _Doc, tokens: Sequence[str], query: str) -> float:
+        score = 0.0
+        for token in tokens:
+            if token in doc.words:
+                score += 3
+            elif any(word.startswith(token) for word in doc.words):
+                score += 2
+            elif any(token in word for word in doc.words):
+                score += 1
+            else:
+                return 0.0
+        if " ".join(tokenize(doc.label)) == query:
+            score += 5
+        return score
+
+    def search(self, query: str, limit: int, entities: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        normalized_query = " ".join(tokens)
+        with self._lock:
+            candidates = self._candidates(tokens, prefix=True)
+            if len(candidates) < limit and all(len(token) >= 3 for token in tokens):
+                candidates |= self._candidates(tokens, prefix=False)
+            # Every candidate is scored and only the best ``limit`` are kept;
+            # ties go to the shorter label, then to the row indexed first.
+            best: List[Tuple[float, int, int, _Doc]] = []
+            for number in candidates:
+                doc = self._docs[number]
+                if entities and doc.entity not in entities:
+                    continue
+                score = self._score(doc, tokens, normalized_query)
+                if not score:
+                    continue
+                entry = (score, -len(doc.label), -number, doc)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry[:3] > best[0][:3]:
+                    heapq.heapreplace(best, entry)
+        return [
+            {"entity": doc.entity, "id": doc.id, "account_id": doc.account_id, "label": doc.label, "score": score}
+            for score, _, _, doc in sorted(best, key=lambda entry: entry[:3], reverse=True)
+        ]
+
+    def add_record(self, entity: SearchEntity, record: Any, replace: bool = True) -> None:
+        if getattr(record, "is_deleted", False):
+            self.remove(entity.name, str(record.id))
+            return
+        self.add(
+            entity.name,
+            str(record.id),
+            _account_id(entity.name, record),
+            _label(entity.name, record),
+            (getattr(record, field) for field in entity.fields),
+            replace=replace,
+        )
+
+
+search_index = TrigramIndex()
+_state = {"backend": None, "index_enabled": False}
+_state_lock = threading.Lock()
+
+
+def _fulltext_ready() -> bool:
+    if engine.dialect.name != "mssql":
+        return False
+    tables = ", ".join(f"OBJECT_ID('{entity.model.__tablename__}')" for entity in SEARCH_ENTITIES)
+    with engine.connect() as connection:
+        indexed = connection.execute(
+            text(f"SELECT COUNT(*) FROM sys.fulltext_indexes WHERE object_id IN ({tables})")
+        ).scalar()
+    return indexed == len(SEARCH_ENTITIES)
+
+
+def get_backend() -> str:
+    """``fulltext`` when SQL Server full-text indexes exist (or are forced), otherwise ``trigram``."""
+    with _state_lock:
+        if _state["backend"] is None:
+            setting = get_search_backend_setting()
+            if setting in ("fulltext", "trigram"):
+                _state["backend"] = setting
+            else:
+                try:
+                    _state["backend"] = "fulltext" if _fulltext_ready() else "trigram"
+                except Exception:  # noqa: BLE001 - fall back to the in-process index
+                    logger.exception("Checking for full-text indexes failed")
+                    _state["backend"] = "trigram"
+            _state["index_enabled"] = _state["backend"] == "trigram"
+        return _state["backend"]
+
+
+def _fulltext_condition(query: str) -> str:
+    return " AND ".join(f'"{token}*"' for token in tokenize(query))
+
+
+def _fulltext_search(db: Session, query: str, limit: int, entities: Sequence[str]) -> List[Dict[str, Any]]:
+    condition = _fulltext_condition(query)
+    if not condition:
+        return []
+    selects = []
+    for entity in SEARCH_ENTITIES:
+        if entity.name not in entities:
+            continue
+        table = entity.model.__tablename__
+        account_column = "t.id" if entity.name == "accounts" else "t.account_id"
+        selects.append(
+            f"SELECT '{entity.name}' AS entity, t.id AS id, {account_column} AS account_id, "
+            f"{entity.label_sql} AS label, ft.[RANK] AS score "
+            f"FROM CONTAINSTABLE({table}, ({', '.join(entity.fields)}), :condition, :limit) AS ft "
+            f"JOIN {table} AS t ON t.id = ft.[KEY] WHERE t.is_deleted = 0"
+        )
+    statement = text(
+        "SELECT TOP (:limit) * FROM (" + " UNION ALL ".join(f"({select})" for select in selects) + ") AS hits "
+        "ORDER BY score DESC, label"
+    )
+    rows = db.execute(statement, {"limit": limit, "condition": condition}).mappings()
+    return [
+        {
+            **row,
+            "id": str(row["id"]),
+            "account_id": str(row["account_id"]) if row["account_id"] else None,
+            "score": float(row["score"]),
+        }
+        for row in rows
+    ]
+
+
+def search(
+    db: Session,
+    query: str,
+    limit: int,
+    entities: Optional[Sequence[str]] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    entities = tuple(entities or ENTITY_NAMES)
+    backend = get_backend()
+    if backend == "fulltext":
+        return backend, _fulltext_search(db, query, limit, entities)
+    return backend, search_index.search(query, limit, entities)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context: Any) -> None:
+    if not _state["index_enabled"]:
+        return
+    pending = session.info.setdefault("search_pending", {})
+    for record in list(session.new) + list(session.dirty):
+        entity = ENTITIES_BY_MODEL.get(type(record))
+        if entity is not None:
+            pending[(entity.name, str(record.id))] = (entity, record)
+    for record in session.deleted:
+        entity = ENTITIES_BY_MODEL.get(type(record))
+        if entity is not None:
+            pending[(entity.name, str(record.id))] = (entity, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    pending = session.info.pop("search_pending", None)
+    if not pending:
+        return
+    for (name, record_id), (entity, record) in pending.items():
+        if record is None:
+            search_index.remove(name, record_id)
+        else:
+            search_index.add_record(entity, record)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("search_pending", None)
+
+
+# Newest updated_at indexed per entity; refreshes re-read from there. An
+# entity is missing until its warm-up finished, None when its table was empty.
+_watermarks: Dict[str, Optional[datetime]] = {}
+
+
+def _index_rows(entity: SearchEntity, query: Any, replace: bool) -> Tuple[int, Optional[datetime]]:
+    count = 0
+    newest: Optional[datetime] = None
+    for record in query.yield_per(5000):
+        search_index.add_record(entity, record, replace=replace)
+        count += 1
+        if record.updated_at is not None and (newest is None or record.updated_at > newest):
+            newest = record.updated_at
+    return count, newest
+
+
+def warm_search_index() -> None:
+    if get_backend() != "trigram":
+        return
+    db = SessionLocal()
+    try:
+        for entity in SEARCH_ENTITIES:
+            model = entity.model
+            query = db.query(model).filter(model.is_deleted == False)  # noqa: E712
+            # Records written since start-up are already newer than this snapshot.
+            count, newest = _index_rows(entity, query, replace=False)
+            _watermarks[entity.name] = newest
+            db.expunge_all()
+            logger.info("Indexed %s %s for search", count, entity.name)
+    except Exception:  # noqa: BLE001 - search falls back to partial results
+        logger.exception("Building the search index failed")
+    finally:
+        db.close()
+
+
+def refresh_search_index() -> int:
+    """Re-read rows whose ``updated_at`` passed the watermark, to pick up other processes' writes.
+
+    Writes of this process are indexed on commit already. The last
+    ``SEARCH_REFRESH_OVERLAP_SECONDS`` are read again on every pass, so rows
+    committed a little after their ``updated_at`` was taken are not missed;
+    soft-deleted rows are dropped from the index. Returns the rows read.
+    """
+    db = SessionLocal()
+    try:
+        total = 0
+        for entity in SEARCH_ENTITIES:
+            if entity.name not in _watermarks:
+                continue
+            model = entity.model
+            query = db.query(model)
+            since = _watermarks[entity.name]
+            if since is not None:
+                query = query.filter(model.updated_at >= since - timedelta(seconds=get_refresh_overlap_seconds()))
+            count, newest = _index_rows(entity, query, replace=True)
+            if newest is not None and (since is None or newest > since):
+                _watermarks[entity.name] = newest
+            db.expunge_all()
+            total += count
+        return total
+    finally:
+        db.close()
+
+
+def _maintain_search_index() -> None:
+    warm_search_index()
+    interval = get_refresh_seconds()
+    if get_backend() != "trigram" or interval <= 0:
+        return
+    while True:
+        time.sleep(interval)
+        try:
+            refresh_search_index()
+        except Exception:  # noqa: BLE001 - retried on the next pass
+            logger.exception("Refreshing the search index failed")
+
+
+def start_search_warmup() -> None:
+    """Pick the backend now, so writes are indexed from the first request, then build and refresh in the background."""
+    get_backend()
+    threading.Thread(target=_maintain_search_index, name="search-index", daemon=True).start()
+
+
+def index_stats() -> Dict[str, Any]:
+    return {"backend": _state["backend"], "documents": len(search_index)}
@@ -0,0 +1,205 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import SessionLocal
+from app.utils.disk_store import DiskStore
+
+logger = logging.getLogger("machine-mgmt.sync-cache")
+
+SYNCED_MODELS = (models.Account, models.Contact, models.Location, models.Machine)
+
+# Value of ``BOOMI_SYNC_CACHE_PATH`` that keeps the cache in each process.
+IN_PROCESS = ":memory:"
+
+# The shared file is trimmed back to ``max_entries`` after this many writes.
+DISK_TRIM_INTERVAL = 1000
+
+
+def get_max_entries() -> int:
+    return int(os.getenv("BOOMI_SYNC_CACHE_MAX_ENTRIES", "100000"))
+
+
+def get_disk_path() -> Optional[str]:
+    path = os.getenv("BOOMI_SYNC_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "machine-mgmt-sync-hashes.db")
+    return None if path == IN_PROCESS else path
+
+
+def warm_enabled() -> bool:
+    return os.getenv("BOOMI_SYNC_CACHE_WARM", "1") == "1"
+
+
+def entry_version(synced_at: Optional[datetime]) -> float:
+    """Order of an entry: the record's ``last_synced_at`` (naive values are UTC), or now."""
+    if synced_at is None:
+        return time.time()
+    if synced_at.tzinfo is None:
+        synced_at = synced_at.replace(tzinfo=timezone.utc)
+    return synced_at.timestamp()
+
+
+class SyncHashIndex:
+    """``external_id -> (id, sync_hash)`` for one synced table.
+
+    Lets ``crud.boomi_upsert`` recognise an unchanged payload without a
+    query. Entries are only ever written from our own successful writes (or
+    the startup warm-up) and are versioned by the record's
+    ``last_synced_at``, so a late or warm-up write never replaces a newer
+    hash. By default the shared file at ``BOOMI_SYNC_CACHE_PATH`` is the only
+    tier, so every worker on the host sees every other worker's writes; it is
+    trimmed to the ``max_entries`` most recently synced records. With
+    ``BOOMI_SYNC_CACHE_PATH=:memory:`` entries live in a bounded per-process
+    LRU instead, which is only correct while a single process writes Boomi data.
+    """
+
+    def __init__(self, table_name: str, max_entries: int, disk: Optional[DiskStore] = None):
+        self.table_name = table_name
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._disk_writes = 0
+
+    def _disk_key(self, external_id: str) -> str:
+        return f"{self.table_name}:{external_id}"
+
+    def _trim_disk(self) -> None:
+        evicted = self.disk.trim(self._disk_key(""), self.max_entries)
+        with self._lock:
+            self.evictions += evicted
+
+    def get(self, external_id: str) -> Optional[Tuple[str, str]]:
+        if self.disk is not None:
+            value = self.disk.get(self._disk_key(external_id))
+            with self._lock:
+                if value is None:
+                    self.misses += 1
+                    return None
+                self.hits += 1
+                self.disk_hits += 1
+            record_id, sync_hash = value.split(" ", 1)
+            return record_id, sync_hash
+        with self._lock:
+            entry = self._entries.get(external_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(external_id)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def _remember(self, external_id: str, record_id: str, sync_hash: str, version: float) -> None:
+        with self._lock:
+            current = self._entries.get(external_id)
+            if current is not None and current[2] > version:
+                return
+            self._entries[external_id] = (record_id, sync_hash, version)
+            self._entries.move_to_end(external_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(
+        self,
+        external_id: str,
+        record_id: Any,
+        sync_hash: Optional[str],
+        synced_at: Optional[datetime] = None,
+    ) -> None:
+        if not external_id:
+            return
+        if not sync_hash:
+            self.discard(external_id)
+            return
+        version = entry_version(synced_at)
+        if self.disk is not None:
+            self.disk.set_if_newer(self._disk_key(external_id), f"{record_id} {sync_hash}", version)
+            with self._lock:
+                self._disk_writes += 1
+                trim = self._disk_writes % DISK_TRIM_INTERVAL == 0
+            if trim:
+                self._trim_disk()
+        else:
+            self._remember(external_id, str(record_id), sync_hash, version)
+
+    def discard(self, external_id: str) -> None:
+        if self.disk is not None:
+            self.disk.delete(self._disk_key(external_id))
+            return
+        with self._lock:
+            self._entries.pop(external_id, None)
+
+    def warm(self, db: Session, model: Any) -> int:
+        rows = (
+            db.query(model.external_id, model.id, model.sync_hash, model.last_synced_at)
+            .filter(model.external_id.isnot(None), model.sync_hash.isnot(None))
+            .order_by(model.last_synced_at.desc())
+            .limit(self.max_entries)
+            .all()
+        )
+        for external_id, record_id, sync_hash, synced_at in reversed(rows):
+            # Rows without last_synced_at rank below any write made since.
+            self.put(external_id, record_id, sync_hash, synced_at or datetime(1970, 1, 1, tzinfo=timezone.utc))
+        if self.disk is not None:
+            self._trim_disk()
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        size = self.disk.count(self._disk_key("")) if self.disk is not None else len(self._entries)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def _build_indexes() -> Dict[str, SyncHashIndex]:
+    path = get_disk_path()
+    disk = DiskStore(path, table="sync_hashes") if path else None
+    return {model.__tablename__: SyncHashIndex(model.__tablename__, get_max_entries(), disk) for model in SYNCED_MODELS}
+
+
+SYNC_INDEXES = _build_indexes()
+
+
+def get_sync_index(model: Any) -> SyncHashIndex:
+    return SYNC_INDEXES[model.__tablename__]
+
+
+def warm_sync_indexes() -> None:
+    db = SessionLocal()
+    try:
+        for model in SYNCED_MODELS:
+            count = get_sync_index(model).warm(db, model)
+            logger.info("Warmed %s sync hashes for %s", count, model.__tablename__)
+    except Exception:  # noqa: BLE001 - the cache is an optimisation only
+        logger.exception("Warming the sync hash cache failed")
+    finally:
+        db.close()
+
+
+def start_warmup() -> None:
+    if warm_enabled():
+        threading.Thread(target=warm_sync_indexes, name="sync-cache-warmup", daemon=True).start()
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {name: index.stats() for name, index in SYNC_INDEXES.items()}
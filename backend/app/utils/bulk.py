@@ -0,0 +1,12 @@
+from typing import Any, Iterable, Iterator, List
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
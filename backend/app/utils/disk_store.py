@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+
+class DiskStore:
+    """Small string key/value store in a local SQLite file.
+
+    Several worker processes on the same host can point at the same file to
+    share entries; SQLite's WAL mode keeps concurrent readers cheap. Every
+    entry carries a numeric ``version`` for writers that must not replace a
+    newer value with an older one.
+    """
+
+    def __init__(self, path: str, table: str = "entries"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, version REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if "version" not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN version REAL NOT NULL DEFAULT 0")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", (key, value))
+
+    def set_if_newer(self, key: str, value: str, version: float) -> None:
+        """Store ``value`` unless the key already holds one with a higher ``version``."""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO {self.table} (key, value, version) VALUES (?, ?, ?) "
+                f"ON CONFLICT(key) DO UPDATE SET value = excluded.value, version = excluded.version "
+                f"WHERE excluded.version >= {self.table}.version",
+                (key, value, version),
+            )
+
+    def set_if(self, key: str, value: str, guard_key: str, expected: str) -> bool:
+        """Store ``value`` only while ``guard_key`` still holds ``expected`` (a missing key reads as ``"0"``).
+
+        A single statement, so the check and the write are atomic across processes.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) SELECT ?, ? "
+                f"WHERE COALESCE((SELECT value FROM {self.table} WHERE key = ?), '0') = ?",
+                (key, value, guard_key, expected),
+            )
+        return cursor.rowcount > 0
+
+    def increment(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO {self.table} (key, value) VALUES (?, '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (key,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _prefix_range(self, prefix: str) -> Tuple[str, Tuple[str, ...]]:
+        if not prefix:
+            return "1 = 1", ()
+        return "key >= ? AND key < ?", (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+    def count(self, prefix: str = "") -> int:
+        """Number of keys starting with ``prefix``."""
+        where, params = self._prefix_range(prefix)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {where}", params).fetchone()[0]
+
+    def trim(self, prefix: str, keep: int) -> int:
+        """Delete all but the ``keep`` highest-version keys starting with ``prefix``; returns how many went."""
+        where, params = self._prefix_range(prefix)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} WHERE {where} ORDER BY version DESC LIMIT -1 OFFSET ?)",
+                params + (keep,),
+            )
+        return cursor.rowcount
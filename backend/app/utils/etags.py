@@ -0,0 +1,50 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+ETAG_HEADER = "ETag"
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:24]}"'
+
+
+def entity_etag(record: Any) -> str:
+    """Weak ETag of one record: it changes whenever ``updated_at`` or ``sync_hash`` does."""
+    return make_etag(record.id, record.updated_at, getattr(record, "sync_hash", None))
+
+
+def list_etag(request: Request, *version: Any) -> str:
+    """Weak ETag of a list response from the version marker of the tables it reads.
+
+    The query string is part of the tag, so every filter/page has its own.
+    """
+    return make_etag(*version, sorted(request.query_params.multi_items()))
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against ``If-None-Match``, as RFC 9110 prescribes for GET."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _strip_weak(etag)
+    return any(_strip_weak(candidate) == wanted for candidate in header.split(","))
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag, "Cache-Control": CACHE_CONTROL})
@@ -1,8 +1,27 @@
 import hashlib
 import json
+from datetime import date, datetime
+from decimal import Decimal
 from typing import Any, Dict
 
+# Delivery and bookkeeping fields that do not describe the record itself.
+NON_CONTENT_FIELDS = frozenset({"last_modified", "external_source", "sync_hash", "last_synced_at"})
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    return str(value)
+
 
 def sha256_payload(payload: Dict[str, Any]) -> str:
-    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    """Hash the business content of an already normalized payload.
+
+    Delivery metadata such as ``last_modified`` is left out, so a resend of
+    identical data under a new timestamp produces the same hash.
+    """
+    content = {key: value for key, value in payload.items() if key not in NON_CONTENT_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=_canonical)
     return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,28 @@
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def parse_override_fields(raw: Optional[str]) -> List[str]:
+    """Column names in a ``manual_override_fields`` JSON list; anything else counts as no overrides."""
+    if not raw:
+        return []
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return []
+    return [name for name in data if isinstance(name, str)] if isinstance(data, list) else []
+
+
+@lru_cache(maxsize=None)
+def override_bits(columns: Tuple[str, ...]) -> Dict[str, int]:
+    """Bit of each overridable column; the position in ``columns`` is what gets stored."""
+    return {name: 1 << position for position, name in enumerate(columns)}
+
+
+def encode_override_mask(columns: Sequence[str], raw: Optional[str]) -> int:
+    bits = override_bits(tuple(columns))
+    mask = 0
+    for name in parse_override_fields(raw):
+        mask |= bits.get(name, 0)
+    return mask
@@ -0,0 +1,121 @@
+import base64
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def get_default_limit() -> int:
+    return int(os.getenv("LIST_DEFAULT_LIMIT", "200"))
+
+
+def get_max_limit() -> int:
+    return int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _coerce(column: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _after(sort_column: Any, id_column: Any, sort_value: Any, last_id: Any, descending: bool):
+    """Rows strictly after ``(sort_value, last_id)`` in ``ORDER BY sort, id``.
+
+    NULL sort keys are assumed to order first, as they do on SQL Server and
+    SQLite.
+    """
+    id_after = id_column < last_id if descending else id_column > last_id
+    if sort_value is None:
+        same_key = and_(sort_column.is_(None), id_after)
+        return same_key if descending else or_(same_key, sort_column.isnot(None))
+    key_after = sort_column < sort_value if descending else sort_column > sort_value
+    following = or_(key_after, and_(sort_column == sort_value, id_after))
+    if descending:
+        following = or_(following, sort_column.is_(None))
+    return following
+
+
+def paginate(
+    query: Query,
+    sort_column: Any,
+    id_column: Any,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """Keyset-paginate ``query`` on ``(sort_column, id_column)``.
+
+    Returns the page and an opaque cursor for the next page, or ``None`` on
+    the last page. Raises ``ValueError`` for a malformed cursor.
+    """
+    limit = min(limit or get_default_limit(), get_max_limit())
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        query = query.filter(_after(sort_column, id_column, _coerce(sort_column, sort_value), last_id, descending))
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, sort_column.key), str(getattr(last, id_column.key))])
+
+
+class CountCache:
+    """Short-lived cache of ``COUNT(*)`` results so paging does not rescan the table."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+            self._entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
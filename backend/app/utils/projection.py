@@ -0,0 +1,68 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> List[str]:
+    """Field names requested with ``?fields=a,b``, in schema order; all fields when empty.
+
+    Raises ``ValueError`` for names the schema does not expose.
+    """
+    available = list(schema.__fields__)
+    if not fields:
+        return available
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(available)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in available if name in requested]
+
+
+def columns_for(model: Any, names: Iterable[str], required: Sequence[Any] = ()) -> List[Any]:
+    """Mapped columns for ``names`` plus ``required`` ones (sort keys) not already present."""
+    columns = [getattr(model, name) for name in names]
+    keys = {column.key for column in columns}
+    return columns + [column for column in required if column.key not in keys]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def rows_to_dicts(
+    rows: Iterable[Any],
+    names: Sequence[str],
+    derived: Optional[Mapping[str, Callable[[Any], Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """Rows selected with ``columns_for(model, names, ...)``; trailing key columns are dropped.
+
+    ``derived`` maps field names the schema computes (rather than reads
+    as stored) to a function of the whole row, whose inputs must have been
+    selected as ``required`` columns.
+    """
+    items = [dict(zip(names, row)) for row in rows]
+    if derived:
+        compute = [(name, fn) for name, fn in derived.items() if name in names]
+        for item, row in zip(items, rows):
+            for name, fn in compute:
+                item[name] = fn(row)
+    return items
+
+
+def json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize plain rows with ``json.dumps``, bypassing response-model validation."""
+    body = json.dumps(content, default=_default, separators=(",", ":"))
+    return Response(content=body, media_type="application/json", headers=headers)
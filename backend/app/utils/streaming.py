@@ -0,0 +1,49 @@
+import os
+from typing import Callable, Iterator, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+from app.db import SessionLocal
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def get_export_batch_size() -> int:
+    return int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+def _stream_rows(build_query: Callable[[Session], Query], schema: Type[BaseModel], fmt: str) -> Iterator[bytes]:
+    """Serialize rows one by one while the database cursor is still being read.
+
+    The generator owns its session: request-scoped sessions are closed before
+    a streaming body is sent.
+    """
+    db = SessionLocal()
+    try:
+        rows = build_query(db).yield_per(get_export_batch_size())
+        if fmt == "ndjson":
+            for row in rows:
+                yield schema.from_orm(row).json().encode("utf-8") + b"\n"
+            return
+        separator = b"["
+        for row in rows:
+            yield separator + schema.from_orm(row).json().encode("utf-8")
+            separator = b",\n"
+        yield b"[]" if separator == b"[" else b"]"
+    finally:
+        db.close()
+
+
+def export_response(
+    build_query: Callable[[Session], Query],
+    schema: Type[BaseModel],
+    fmt: str,
+    filename: str,
+) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_rows(build_query, schema, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,140 @@
+"""Benchmark: set-based alert generation vs. the rules x machines Python loop it replaced.
+
+Runs against in-memory SQLite databases so it needs no SQL Server:
+
+    cd backend && python scripts/benchmark_alert_generation.py --machines 5000
+
+Both engines run on identically seeded databases for the same day, first on
+empty alert tables and then again to measure a re-run. "loop" is the
+original ``generate_alerts_for_today``: every eligible machine loaded as an
+ORM object per run, rules x machines compared in Python, one commit per
+alert and a rollback per duplicate. Sessions expire on commit, as they did
+then, so the loop reloads machines after every alert. "set-based" is
+``generate_alerts_for_today`` as it is now. The counts of both must agree.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app import models  # noqa: E402
+from app.services.alert_generation import alert_type_for_offset, generate_alerts_for_today  # noqa: E402
+from tests.sqlite_standin import adapt_metadata  # noqa: E402
+
+RULE_OFFSETS = (-90, -60, -30, -14, -7, -1, 0, 1, 7, 30, 60, 90)
+TODAY = date(2025, 6, 1)
+
+
+def _loop(db: Session, today: date) -> dict:
+    rules = db.query(models.AlertRule).filter(models.AlertRule.enabled == True).all()  # noqa: E712
+    machines = (
+        db.query(models.Machine)
+        .filter(models.Machine.warranty_end_date.isnot(None), models.Machine.is_deleted == False)  # noqa: E712
+        .all()
+    )
+    created = 0
+    skipped = 0
+    evaluated = 0
+    for rule in rules:
+        for machine in machines:
+            evaluated += 1
+            if machine.warranty_end_date + timedelta(days=rule.offset_days) != today:
+                continue
+            db.add(
+                models.Alert(
+                    machine_id=machine.id,
+                    alert_type=alert_type_for_offset(rule.offset_days),
+                    alert_date=today,
+                    due_date=machine.warranty_end_date,
+                    status="OPEN",
+                )
+            )
+            try:
+                db.commit()
+                created += 1
+            except IntegrityError:
+                db.rollback()
+                skipped += 1
+    return {"created": created, "skipped": skipped, "evaluated": evaluated}
+
+
+def _engine(machines: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    account_id = uuid.UUID(int=1)
+    created_at = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.Account.__table__),
+            [{"id": account_id, "account_number": "BENCH", "name": "Bench", "created_at": created_at}],
+        )
+        connection.execute(
+            insert(models.AlertRule.__table__),
+            [
+                {
+                    "id": uuid.UUID(int=offset + 1000),
+                    "name": f"{offset:+d} days",
+                    "trigger": "WARRANTY_END_DATE",
+                    "offset_days": offset,
+                }
+                for offset in RULE_OFFSETS
+            ],
+        )
+        connection.execute(
+            insert(models.Machine.__table__),
+            [
+                {
+                    "id": uuid.UUID(int=index + 10000),
+                    "account_id": account_id,
+                    "machine_name": f"Machine {index:07d}",
+                    # About 1 in 730 machines per rule lands on TODAY.
+                    "warranty_end_date": TODAY + timedelta(days=rng.randint(-365, 364)),
+                    "is_deleted": index % 50 == 0,
+                    "created_at": created_at,
+                }
+                for index in range(machines)
+            ],
+        )
+    return engine
+
+
+def _measure(label: str, engine, generate) -> dict:
+    with Session(engine) as db:
+        started = time.perf_counter()
+        result = generate(db)
+        elapsed = time.perf_counter() - started
+    counts = {key: result[key] for key in ("created", "skipped", "evaluated")}
+    print(f"{label:<22} {elapsed * 1000:>10.1f} ms  {counts}")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--machines", type=int, default=5000)
+    args = parser.parse_args()
+    adapt_metadata(models.Base.metadata)
+    loop_engine = _engine(args.machines)
+    set_engine = _engine(args.machines)
+    print(f"{args.machines} machines, {len(RULE_OFFSETS)} rules, {TODAY}")
+    for run in ("first run", "re-run"):
+        loop = _measure(f"loop, {run}", loop_engine, lambda db: _loop(db, TODAY))
+        set_based = _measure(f"set-based, {run}", set_engine, lambda db: generate_alerts_for_today(db, TODAY))
+        if loop != set_based:
+            sys.exit(f"Counts differ on the {run}: {loop} != {set_based}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Micro-benchmark: ORM + orm_mode list serialization vs. the projected-row fast path.
+
+Runs against an in-memory SQLite database so it needs no SQL Server:
+
+    cd backend && python scripts/benchmark_list_serialization.py --rows 20000
+
+Both paths read the same machines; "orm" hydrates ``models.Machine`` and
+serializes through ``schemas.Machine`` like a ``response_model`` route,
+"projected" is what the list routes now do.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.dialects import mssql  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.routers.machines import MACHINE_DERIVED_FIELDS  # noqa: E402
+from app.utils.projection import columns_for, json_response, parse_fields, rows_to_dicts  # noqa: E402
+
+
+@compiles(mssql.UNIQUEIDENTIFIER, "sqlite")
+def _uniqueidentifier(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@compiles(mssql.DATETIMEOFFSET, "sqlite")
+def _datetimeoffset(type_, compiler, **kw):
+    return "TIMESTAMP"
+
+
+@compiles(mssql.ROWVERSION, "sqlite")
+def _rowversion(type_, compiler, **kw):
+    return "BLOB"
+
+
+class MachineOut(schemas.Machine):
+    # UNIQUEIDENTIFIER columns load as UUID objects; let orm_mode accept them.
+    id: uuid.UUID
+    account_id: uuid.UUID
+    location_id: Optional[uuid.UUID] = None
+
+
+def _seed(engine, rows: int) -> None:
+    table = models.Machine.__table__
+    tables = [models.Account.__table__, models.Location.__table__, table]
+    for item in tables:
+        for column in item.columns:
+            column.server_default = None
+            column.nullable = True
+    models.Base.metadata.create_all(engine, tables=tables)
+    account_id = uuid.uuid4()
+    today = date.today()
+    created_at = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.Account.__table__),
+            [{"id": account_id, "account_number": "BENCH", "name": "Bench", "is_deleted": False}],
+        )
+        connection.execute(
+            insert(table),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "account_id": account_id,
+                    "machine_name": f"Machine {index:07d}",
+                    "machine_number": f"MX-{index:07d}",
+                    "status": "ACTIVE",
+                    "installation_date": today - timedelta(days=index % 900),
+                    "warranty_months": 24,
+                    "warranty_end_date": today + timedelta(days=index % 700),
+                    "is_deleted": False,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+                for index in range(rows)
+            ],
+        )
+
+
+def _orm(engine) -> int:
+    with Session(engine) as db:
+        machines = db.query(models.Machine).order_by(models.Machine.machine_name, models.Machine.id).all()
+        body = json.dumps(jsonable_encoder([MachineOut.from_orm(machine) for machine in machines]))
+    return len(body)
+
+
+def _projected(engine, fields=None) -> int:
+    names = parse_fields(fields, schemas.Machine)
+    order = (models.Machine.machine_name, models.Machine.id)
+    derived_inputs = (models.Machine.installation_date, models.Machine.warranty_months)
+    columns = columns_for(models.Machine, names, order + derived_inputs)
+    with Session(engine) as db:
+        rows = db.query(models.Machine).with_entities(*columns).order_by(*order).all()
+        body = json_response(rows_to_dicts(rows, names, MACHINE_DERIVED_FIELDS)).body
+    return len(body)
+
+
+def _measure(label: str, fn, rows: int, repeat: int) -> None:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<28} {rows / elapsed:>12,.0f} rows/s  ({elapsed * 1000:.1f} ms per list)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    _seed(engine, args.rows)
+    _measure("orm + orm_mode", lambda: _orm(engine), args.rows, args.repeat)
+    _measure("projected, all fields", lambda: _projected(engine), args.rows, args.repeat)
+    _measure(
+        "projected, 3 fields",
+        lambda: _projected(engine, "id,machine_name,warranty_end_date"),
+        args.rows,
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
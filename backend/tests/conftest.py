@@ -0,0 +1,47 @@
+"""Run the app against a throwaway SQLite file standing in for SQL Server.
+
+    cd backend && python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="machine-mgmt-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+# Every test starts from empty tables; a cached row would outlive them.
+os.environ["ENTITY_CACHE_ENABLED"] = "0"
+os.environ["BOOMI_SYNC_CACHE_PATH"] = os.path.join(_DB_DIR, "sync-hashes.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402
+from app.db import SessionLocal, engine  # noqa: E402
+from tests.sqlite_standin import adapt_metadata  # noqa: E402
+
+adapt_metadata(models.Base.metadata)
+
+
+@pytest.fixture(autouse=True)
+def schema():
+    models.Base.metadata.create_all(engine)
+    yield
+    models.Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    return TestClient(app)
@@ -0,0 +1,79 @@
+"""SQLite in place of SQL Server, for the tests and the benchmark scripts.
+
+The SQL Server column types are compiled to SQLite ones and the server
+defaults SQLite cannot express are swapped for equivalents, so the models
+create as they are.
+"""
+
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, DefaultClause, MetaData, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects import mssql
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(mssql.UNIQUEIDENTIFIER, "sqlite")
+def _uniqueidentifier(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@compiles(mssql.DATETIMEOFFSET, "sqlite")
+def _datetimeoffset(type_, compiler, **kw):
+    return "TIMESTAMP"
+
+
+@compiles(mssql.ROWVERSION, "sqlite")
+def _rowversion(type_, compiler, **kw):
+    return "BLOB"
+
+
+@compiles(BigInteger, "sqlite")
+def _biginteger(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns.
+    return "INTEGER"
+
+
+_bind_processor = mssql.UNIQUEIDENTIFIER.bind_processor
+
+
+def _bind_string_ids(self, dialect):
+    """Also bind ids in their string form on SQLite, as SQL Server does."""
+    process = _bind_processor(self, dialect)
+    if dialect.name != "sqlite" or process is None:
+        return process
+
+    def bind(value):
+        return process(uuid.UUID(value) if isinstance(value, str) else value)
+
+    return bind
+
+
+mssql.UNIQUEIDENTIFIER.bind_processor = _bind_string_ids
+
+
+@event.listens_for(Engine, "connect")
+def _sql_server_functions(dbapi_connection, connection_record):
+    # Used by the models' onupdate timestamps.
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(
+            "sysdatetimeoffset", 0, lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+        )
+
+
+def adapt_metadata(metadata: MetaData) -> None:
+    """Swap ``NEWID()``/``sysdatetimeoffset()`` defaults for SQLite ones; row versions stay empty."""
+    for table in metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, mssql.ROWVERSION):
+                column.nullable = True
+            default = column.server_default
+            if default is None or not hasattr(default, "arg"):
+                continue
+            sql = str(default.arg).lower()
+            if "newid" in sql:
+                column.server_default = DefaultClause(text("(lower(hex(randomblob(16))))"))
+            elif "sysdatetimeoffset" in sql:
+                column.server_default = DefaultClause(text("CURRENT_TIMESTAMP"))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from app import crud, models
+
+
+def test_overview_leaves_out_alerts_of_deleted_machines(db):
+    account = models.Account(account_number="A-1", name="Acme")
+    db.add(account)
+    db.flush()
+    active = models.Machine(account_id=account.id, machine_name="Active")
+    deleted = models.Machine(account_id=account.id, machine_name="Deleted", is_deleted=True)
+    db.add_all([active, deleted])
+    db.flush()
+    db.add_all(
+        [
+            models.Alert(machine_id=machine.id, alert_type="WARRANTY_END", alert_date=date(2024, 1, 1), status="OPEN")
+            for machine in (active, deleted)
+        ]
+    )
+    db.commit()
+
+    overview = crud.get_account_overview(db, str(account.id), 50)
+
+    assert overview["counts"] == {"contacts": 0, "locations": 0, "machines": 1, "open_alerts": 1}
+    assert [alert.machine_id for alert in overview["open_alerts"]] == [active.id]
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from app import models
+from app.services.alert_generation import generate_alerts_for_range
+
+
+def _seed(db):
+    account = models.Account(account_number="A-1", name="Acme")
+    db.add(account)
+    db.flush()
+    db.add_all(
+        [
+            models.AlertRule(name="30 days before", trigger="WARRANTY_END_DATE", offset_days=-30),
+            models.AlertRule(name="7 days before", trigger="WARRANTY_END_DATE", offset_days=-7),
+            models.AlertRule(name="On the day", trigger="WARRANTY_END_DATE", offset_days=0),
+            models.AlertRule(name="A week after", trigger="WARRANTY_END_DATE", offset_days=7),
+        ]
+    )
+    db.add_all(
+        models.Machine(account_id=account.id, machine_name=f"M{day}", warranty_end_date=date(2024, 3, 1) + timedelta(days=day))
+        for day in range(20)
+    )
+    db.add(models.Machine(account_id=account.id, machine_name="Deleted", warranty_end_date=date(2024, 3, 1), is_deleted=True))
+    db.commit()
+
+
+def test_generates_each_alert_once_across_batches(db):
+    _seed(db)
+
+    first = generate_alerts_for_range(db, date(2024, 2, 20), date(2024, 3, 10), batch_days=4)
+    again = generate_alerts_for_range(db, date(2024, 2, 20), date(2024, 3, 10), batch_days=7)
+
+    alerts = db.query(models.Alert.alert_type, models.Alert.alert_date, models.Alert.due_date).all()
+    # Warranties end 03-01..03-20. 30 days before falls before the window; 7 days
+    # before covers ends 03-01..03-17, on the day 03-01..03-10, a week after 03-01..03-03.
+    assert first["created"] == len(alerts) == 17 + 10 + 3
+    assert first["skipped"] == 0
+    assert (again["created"], again["skipped"]) == (0, len(alerts))
+    assert ("WARRANTY_EXPIRING", date(2024, 2, 23), date(2024, 3, 1)) in alerts
+    assert ("WARRANTY_EXPIRED", date(2024, 3, 10), date(2024, 3, 3)) in alerts
+    assert all(alert_date <= date(2024, 3, 10) for _, alert_date, _ in alerts)
@@ -0,0 +1,39 @@
+import uuid
+
+from app import crud, models
+from app.crud import BOOMI_UPSERTS
+from app.utils.hashing import sha256_payload
+
+
+def _outcomes(model) -> dict:
+    return {key[1]: value for _, _, key, value in BOOMI_UPSERTS.samples() if key[0] == model.__tablename__}
+
+
+def _items(*payloads):
+    return [(payload, sha256_payload(payload)) for payload in payloads]
+
+
+def _account(name):
+    return {"external_id": f"ACC-{uuid.uuid4().hex}", "account_number": name, "name": name}
+
+
+def test_counts_outcomes_when_every_record_is_skipped(db):
+    items = _items(_account("Acme"), _account("Globex"))
+    crud.boomi_bulk_upsert(db, models.Account, items)
+    before = _outcomes(models.Account)
+
+    results = crud.boomi_bulk_upsert(db, models.Account, items)
+
+    assert [result["status"] for result in results] == ["skipped", "skipped"]
+    assert _outcomes(models.Account).get("skipped", 0) == before.get("skipped", 0) + 2
+
+
+def test_replays_chunk_record_by_record_when_a_value_is_rejected(db):
+    good = _account("Initech")
+    # SQLite cannot bind a list; SQL Server rejects e.g. an over-long string the same way, with a DataError.
+    bad = dict(_account("Hooli"), name=["not", "a", "name"])
+
+    results = crud.boomi_bulk_upsert(db, models.Account, [(good, sha256_payload(good)), (bad, "bad-hash")])
+
+    assert [result["status"] for result in results] == ["created", "error"]
+    assert db.query(models.Account.external_id).filter(models.Account.name == "Initech").scalar() == good["external_id"]
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import update
+
+from app import models
+from app.services import changes
+
+
+class _Data:
+    """The feed mechanics do not depend on the payload schema."""
+
+    @staticmethod
+    def from_orm(row):
+        return {"id": str(row.id)}
+
+
+@pytest.fixture
+def feed(db, monkeypatch):
+    """Rows with hand-set row versions, read below a settable ``MIN_ACTIVE_ROWVERSION()``."""
+    monkeypatch.setattr(changes, "CHANGE_FEED", [(name, model, _Data) for name, model, _ in changes.CHANGE_FEED])
+    horizon = {"version": 2**63}
+    monkeypatch.setattr(changes, "_horizon", lambda db: changes._to_rowversion(horizon["version"]))
+
+    def write(record, version):
+        if record.id is None:
+            db.add(record)
+            db.flush()
+        db.commit()
+        table = type(record).__table__
+        db.execute(update(table).where(table.c.id == record.id).values(row_version=changes._to_rowversion(version)))
+        db.commit()
+        db.expire_all()
+        return str(record.id)
+
+    return write, horizon
+
+
+def _read(db, token, limit=10):
+    page = changes.get_changes(db, token, limit)
+    return [(item["entity"], item["id"], item["version"]) for item in page["items"]], page
+
+
+def test_changes_feed_is_refused_without_rowversion(client):
+    response = client.get("/changes/")
+
+    assert response.status_code == 501
+    assert "rowversion" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("token", ["abc", "-1", str(2**64)])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(ValueError):
+        changes.decode_token(token)
+
+
+def test_entities_are_merged_in_version_order_and_resume_from_the_token(db, feed):
+    write, _ = feed
+    account = models.Account(account_number="A-1", name="Acme")
+    account_id = write(account, 10)
+    machine_id = write(models.Machine(account_id=account.id, machine_name="M-1"), 11)
+    contact_id = write(models.Contact(account_id=account.id, display_name="Jane"), 12)
+    other_id = write(models.Account(account_number="A-2", name="Globex"), 13)
+
+    first, page = _read(db, None, limit=2)
+    assert first == [("accounts", account_id, 10), ("machines", machine_id, 11)]
+    assert (page["next_token"], page["has_more"]) == ("11", True)
+
+    second, page = _read(db, page["next_token"], limit=2)
+    assert second == [("contacts", contact_id, 12), ("accounts", other_id, 13)]
+    assert (page["next_token"], page["has_more"]) == ("13", False)
+
+    empty, page = _read(db, page["next_token"])
+    assert empty == []
+    assert page["next_token"] == "13"
+
+
+def test_deleted_rows_come_back_as_tombstones(db, feed):
+    write, _ = feed
+    account = models.Account(account_number="A-1", name="Acme")
+    write(account, 10)
+    account.is_deleted = True
+    write(account, 14)
+
+    page = changes.get_changes(db, "10", 10)
+
+    assert page["items"] == [
+        {"entity": "accounts", "id": str(account.id), "version": 14, "deleted": True, "data": None}
+    ]
+
+
+def test_versions_from_open_transactions_are_held_back(db, feed):
+    write, horizon = feed
+    committed = write(models.Account(account_number="A-1", name="Acme"), 10)
+    in_flight = write(models.Account(account_number="A-2", name="Globex"), 12)
+    horizon["version"] = 12
+
+    held, page = _read(db, None)
+    assert held == [("accounts", committed, 10)]
+    assert page["next_token"] == "10"
+
+    horizon["version"] = 20
+    released, _ = _read(db, page["next_token"])
+    assert released == [("accounts", in_flight, 12)]
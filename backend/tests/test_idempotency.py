@@ -0,0 +1,32 @@
+import pytest
+
+from app.services.idempotency import IdempotencyStore, StoredResponse, StoreFull
+
+RESPONSE = StoredResponse(200, [], b"{}", "fingerprint")
+
+
+def _key(number):
+    return ("POST", "/integrations/boomi/accounts:upsert", str(number))
+
+
+def test_full_store_evicts_the_oldest_stored_response_not_requests_in_flight():
+    store = IdempotencyStore(max_keys=3, ttl_seconds=60)
+    running, _ = store.begin(_key(1))
+    done, _ = store.begin(_key(2))
+    store.finish(_key(2), done, RESPONSE)
+    store.begin(_key(3))
+
+    store.begin(_key(4))
+
+    assert store.begin(_key(1)) == (running, False)
+    assert store.stats()["in_flight"] == 3
+    assert store.evictions == 1
+
+
+def test_store_full_of_requests_in_flight_rejects_new_keys():
+    store = IdempotencyStore(max_keys=2, ttl_seconds=60)
+    store.begin(_key(1))
+    store.begin(_key(2))
+
+    with pytest.raises(StoreFull):
+        store.begin(_key(3))
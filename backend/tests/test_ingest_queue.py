@@ -0,0 +1,71 @@
+import uuid
+
+from app import crud, models
+from app.services import ingest_queue
+from app.utils.hashing import sha256_payload
+
+
+def _account(db):
+    payload = {"external_id": f"ACC-{uuid.uuid4().hex}", "account_number": "1", "name": "Acme"}
+    crud.boomi_bulk_upsert(db, models.Account, [(payload, sha256_payload(payload))])
+    return payload["external_id"]
+
+
+def _contact(account_external_id, external_id=None):
+    return {
+        "external_id": external_id or f"CON-{uuid.uuid4().hex}",
+        "account_external_id": account_external_id,
+        "display_name": "Jane",
+    }
+
+
+def _enqueue(db, *payloads):
+    items = [(index, payload, sha256_payload(payload)) for index, payload in enumerate(payloads)]
+    ingest_queue.add_chunk(db, uuid.uuid4(), "contacts", items, [])
+    db.commit()
+
+
+def _drain(db):
+    processed = []
+    while True:
+        chunk = ingest_queue.claim_next_chunk(db, "test")
+        if chunk is None:
+            return processed
+        processed.append(chunk.id)
+        ingest_queue.process_chunk(db, chunk)
+        db.expunge_all()
+
+
+def _contacts(db):
+    return {external_id for (external_id,) in db.query(models.Contact.external_id)}
+
+
+def test_orphan_child_does_not_hold_up_newer_chunks(db):
+    account = _account(db)
+    orphan = _contact("ACC-not-sent-yet")
+    sibling = _contact(account)
+    newer = _contact(account)
+    _enqueue(db, orphan, sibling)
+    _enqueue(db, newer)
+
+    assert len(_drain(db)) == 2
+
+    assert _contacts(db) == {sibling["external_id"], newer["external_id"]}
+    chunks = db.query(models.IngestChunk).order_by(models.IngestChunk.id).all()
+    assert [chunk.status for chunk in chunks] == ["QUEUED", "SUCCEEDED"]
+    assert chunks[0].waiting_external_ids == f'["{orphan["external_id"]}"]'
+    assert ingest_queue.queued_records(db) == 2
+
+
+def test_newer_version_of_a_waiting_record_waits_behind_it(db):
+    account = _account(db)
+    orphan = _contact("ACC-not-sent-yet")
+    update = _contact(account, external_id=orphan["external_id"])
+    _enqueue(db, orphan)
+    _enqueue(db, update)
+
+    _drain(db)
+
+    assert _contacts(db) == set()
+    statuses = [status for (status,) in db.query(models.IngestChunk.status).order_by(models.IngestChunk.id)]
+    assert statuses == ["QUEUED", "QUEUED"]
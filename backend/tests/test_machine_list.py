@@ -0,0 +1,49 @@
+import uuid
+from datetime import date
+
+from fastapi.encoders import jsonable_encoder
+
+from app import models, schemas
+
+
+def _detail(machine: models.Machine) -> dict:
+    """What ``GET /machines/{id}`` serializes for ``machine``."""
+    values = {
+        column.key: str(value) if isinstance(value, uuid.UUID) else value
+        for column in models.Machine.__table__.columns
+        for value in [getattr(machine, column.key)]
+    }
+    return jsonable_encoder(schemas.Machine.parse_obj(values))
+
+
+def test_projected_list_matches_detail(client, db):
+    account = models.Account(account_number="A-1", name="Acme")
+    db.add(account)
+    db.flush()
+    machines = [
+        models.Machine(
+            account_id=account.id,
+            machine_name="Derived",
+            installation_date=date(2024, 1, 31),
+            warranty_months=1,
+        ),
+        models.Machine(account_id=account.id, machine_name="No warranty"),
+        models.Machine(
+            account_id=account.id,
+            machine_name="Stored",
+            installation_date=date(2024, 1, 15),
+            warranty_months=24,
+            warranty_end_date=date(2025, 6, 30),
+        ),
+    ]
+    db.add_all(machines)
+    db.commit()
+    details = [_detail(db.get(models.Machine, machine.id)) for machine in machines]
+
+    listed = client.get("/machines/")
+    sparse = client.get("/machines/", params={"fields": "id,warranty_end_date"})
+
+    assert listed.status_code == 200
+    assert listed.json() == details
+    assert [item["warranty_end_date"] for item in details] == ["2024-02-29", None, "2025-06-30"]
+    assert sparse.json() == [{"id": item["id"], "warranty_end_date": item["warranty_end_date"]} for item in details]
@@ -0,0 +1,83 @@
+"""The list and Boomi lookup queries are planned on their indexes, without a separate sort.
+
+Plans come from SQLite's ``EXPLAIN QUERY PLAN`` over the statements the
+crud functions actually send; the indexes are the ones declared in
+``app.models`` (and created by migration 0007 on SQL Server, filtered on
+live rows).
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app import crud, models
+from app.db import engine
+from app.utils.hashing import sha256_payload
+
+ACCOUNT_ID = uuid.uuid4()
+
+
+def _plans(call):
+    """``EXPLAIN QUERY PLAN`` details of every SELECT that ``call`` sends."""
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    with engine.connect() as connection:
+        cursor = connection.connection.cursor()
+        return [
+            [row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()]
+            for statement, parameters in selects
+        ]
+
+
+def _assert_uses(plan, index):
+    assert any(f"INDEX {index}" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.parametrize(
+    "list_rows, index",
+    [
+        (lambda db: crud.list_accounts(db, limit=10), "ix_accounts_active_name"),
+        (lambda db: crud.list_contacts(db, limit=10), "ix_contacts_active_last_name"),
+        (lambda db: crud.list_contacts(db, str(ACCOUNT_ID), limit=10), "ix_contacts_active_account_id_last_name"),
+        (lambda db: crud.list_locations(db, limit=10), "ix_locations_active_name"),
+        (lambda db: crud.list_locations(db, str(ACCOUNT_ID), limit=10), "ix_locations_active_account_id_name"),
+        (lambda db: crud.list_machines(db, limit=10), "ix_machines_active_machine_name"),
+        (lambda db: crud.list_machines(db, str(ACCOUNT_ID), limit=10), "ix_machines_active_account_id_machine_name"),
+    ],
+)
+def test_list_queries_use_their_index(db, list_rows, index):
+    (plan,) = _plans(lambda: list_rows(db))
+    _assert_uses(plan, index)
+
+
+@pytest.mark.parametrize("model", [models.Account, models.Contact, models.Location, models.Machine])
+def test_boomi_external_id_lookups_use_their_index(db, model):
+    account = crud.create_account(db, {"account_number": "A-1", "name": "Acme"})
+    single, bulk = ({"external_id": f"EXT-{uuid.uuid4().hex}"} for _ in range(2))
+    for payload in (single, bulk):
+        payload.update(
+            {
+                models.Account: {"account_number": payload["external_id"], "name": "Boomi"},
+                models.Contact: {"account_id": account.id},
+                models.Location: {"account_id": account.id, "location_code": payload["external_id"]},
+                models.Machine: {"account_id": account.id, "machine_name": payload["external_id"]},
+            }[model]
+        )
+    index = f"ix_{model.__tablename__}_external_id"
+
+    (single_plan,) = _plans(lambda: crud.boomi_upsert(db, model, single, sha256_payload(single)))
+    (bulk_plan,) = _plans(lambda: crud.boomi_bulk_upsert(db, model, [(bulk, sha256_payload(bulk))]))
+
+    _assert_uses(single_plan, index)
+    _assert_uses(bulk_plan, index)
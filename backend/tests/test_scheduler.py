@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from app.db import SessionLocal
+from app.services import jobs
+from app.services.scheduler import SCHEDULER_LOCK, Scheduler, acquire_lease
+
+SLOW_JOB = "test_slow_job"
+
+
+@pytest.fixture
+def slow_job():
+    seen = {}
+
+    def run(db, params):
+        time.sleep(1.5)
+        other = SessionLocal()
+        try:
+            seen["taken_over"] = acquire_lease(other, SCHEDULER_LOCK, "other-worker", 1)
+        finally:
+            other.close()
+        return {}
+
+    jobs.JOBS[SLOW_JOB] = run
+    yield seen
+    del jobs.JOBS[SLOW_JOB]
+
+
+def test_lease_is_renewed_while_a_job_outlives_it(db, slow_job):
+    scheduler = Scheduler()
+    scheduler.lease_seconds = 1
+    jobs.enqueue_job(db, SLOW_JOB)
+
+    scheduler.tick()
+
+    assert slow_job == {"taken_over": False}
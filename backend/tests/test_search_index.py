@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from app import models
+from app.db import engine
+from app.services import search_index
+
+
+def _found(name):
+    return [hit["id"] for hit in search_index.search_index.search(name, 10, ["accounts"])]
+
+
+def test_refresh_picks_up_writes_of_other_processes(db):
+    search_index.warm_search_index()
+    name = f"Zephyr{uuid.uuid4().hex[:8]}"
+    account_id = uuid.uuid4()
+    written_at = datetime.utcnow() + timedelta(seconds=1)
+    # Core statements on their own connection fire no session events, like a write in another worker.
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.Account.__table__).values(
+                id=account_id, account_number="Z-1", name=name, updated_at=written_at
+            )
+        )
+    assert _found(name) == []
+
+    search_index.refresh_search_index()
+    assert _found(name) == [str(account_id)]
+
+    with engine.begin() as connection:
+        connection.execute(
+            update(models.Account.__table__)
+            .where(models.Account.id == account_id)
+            .values(is_deleted=True, updated_at=written_at + timedelta(seconds=1))
+        )
+    search_index.refresh_search_index()
+    assert _found(name) == []
+
+
+def test_commits_are_indexed_from_startup_on(db, monkeypatch):
+    monkeypatch.setattr(search_index, "_state", {"backend": None, "index_enabled": False})
+    monkeypatch.setattr(search_index, "_maintain_search_index", lambda: None)
+    search_index.start_search_warmup()
+    name = f"Quokka{uuid.uuid4().hex[:8]}"
+    account = models.Account(account_number="Q-1", name=name)
+    db.add(account)
+    db.commit()
+    assert _found(name) == [str(account.id)]
+
+
+def test_exact_match_wins_among_many_candidates():
+    index = search_index.TrigramIndex()
+    for number in range(3000):
+        label = f"Muller Maschinenbau {number}"
+        index.add("accounts", f"other-{number}", None, label, [label])
+    index.add("accounts", "exact", None, "Muller", ["Muller"])
+
+    hits = index.search("muller", 3)
+
+    assert [hit["id"] for hit in hits] == ["exact", "other-0", "other-1"]
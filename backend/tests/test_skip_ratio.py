@@ -0,0 +1,107 @@
+"""Skip ratio of a nightly Boomi resend, before and after content-based hashing.
+
+The corpus is one initial sync of accounts and machines followed by a
+resend in which most records are unchanged apart from how they are
+delivered: a new ``last_modified``, none at all, values spelled
+differently, or a derived warranty end date sent explicitly. Only ``CHANGED_SHARE`` of the records carry a real
+change, so everything else should be skipped.
+"""
+
+import hashlib
+import json
+import random
+import uuid
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from app.routers.integrations_boomi import _process_chunk
+
+RECORDS = 400
+CHANGED_SHARE = 0.05
+
+
+def _legacy_hash(payload):
+    # sha256_payload before content hashing: the raw filtered payload, last_modified included.
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _legacy_skipped(payload, stored_hash):
+    return bool(payload.get("last_modified")) and stored_hash == _legacy_hash(payload)
+
+
+def _corpus():
+    rng = random.Random(7)
+    prefix = uuid.uuid4().hex[:8]
+    accounts = [
+        {
+            "external_id": f"{prefix}-A{index}",
+            "account_number": f"A{index:05d}",
+            "name": f"Account {index}",
+            "is_solvable": True,
+            "last_modified": "2024-05-01T22:00:00Z",
+        }
+        for index in range(RECORDS // 4)
+    ]
+    machines = []
+    for index in range(RECORDS - len(accounts)):
+        installed = date(2022, 1, 1) + timedelta(days=rng.randrange(700))
+        machines.append(
+            {
+                "external_id": f"{prefix}-M{index}",
+                "account_external_id": rng.choice(accounts)["external_id"],
+                "machine_name": f"Machine {index}",
+                "machine_number": f"MX-{index:05d}",
+                "status": "ACTIVE",
+                "installation_date": installed.isoformat(),
+                "warranty_months": 24,
+                "last_modified": "2024-05-01T22:00:00Z",
+            }
+        )
+    return rng, accounts, machines
+
+
+def _resend(rng, record):
+    """The record as the next nightly sync delivers it, and whether its content changed."""
+    resent = dict(record, last_modified="2024-05-02T22:00:00Z")
+    roll = rng.random()
+    if roll < CHANGED_SHARE:
+        resent["name" if "name" in resent else "status"] = "Changed"
+        return resent, True
+    if roll < 0.25:
+        del resent["last_modified"]
+    elif roll < 0.40 and "installation_date" in resent:
+        installed = date.fromisoformat(resent["installation_date"])
+        resent["warranty_end_date"] = (installed + relativedelta(months=24)).isoformat()
+        resent["warranty_months"] = str(resent["warranty_months"])
+    elif roll < 0.40:
+        resent["is_solvable"] = "true"
+    return resent, False
+
+
+def _sync(db, entity, records):
+    results = _process_chunk(db, entity, list(enumerate(records)))
+    assert not [result for result in results if result.status == "error"]
+    return [result.status for result in results]
+
+
+def test_resend_skip_ratio_before_and_after(db):
+    rng, accounts, machines = _corpus()
+    legacy_hashes = {record["external_id"]: _legacy_hash(record) for record in accounts + machines}
+    _sync(db, "accounts", accounts)
+    _sync(db, "machines", machines)
+
+    resent_accounts, changed_accounts = zip(*(_resend(rng, record) for record in accounts))
+    resent_machines, changed_machines = zip(*(_resend(rng, record) for record in machines))
+    statuses = _sync(db, "accounts", list(resent_accounts)) + _sync(db, "machines", list(resent_machines))
+    changed = list(changed_accounts + changed_machines)
+    resent = resent_accounts + resent_machines
+
+    before = sum(_legacy_skipped(record, legacy_hashes[record["external_id"]]) for record in resent) / RECORDS
+    after = statuses.count("skipped") / RECORDS
+    print(f"skip ratio before {before:.1%}, after {after:.1%} ({sum(changed)} of {RECORDS} records changed)")
+    assert before == 0
+    assert after == 1 - sum(changed) / RECORDS
+    assert after > 0.9
+    assert [status == "updated" for status in statuses] == changed
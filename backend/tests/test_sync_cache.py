@@ -0,0 +1,37 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.services import sync_cache
+from app.services.sync_cache import SyncHashIndex
+from app.utils.disk_store import DiskStore
+
+
+def _store(tmp_path):
+    return DiskStore(os.path.join(tmp_path, "sync.db"), table="sync_hashes")
+
+
+def test_shared_file_is_the_default_tier(monkeypatch):
+    monkeypatch.delenv("BOOMI_SYNC_CACHE_PATH")
+    assert sync_cache.get_disk_path().endswith("machine-mgmt-sync-hashes.db")
+
+    monkeypatch.setenv("BOOMI_SYNC_CACHE_PATH", sync_cache.IN_PROCESS)
+    assert sync_cache.get_disk_path() is None
+
+
+def test_disk_tier_is_trimmed_to_the_most_recently_synced(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_cache, "DISK_TRIM_INTERVAL", 5)
+    store = _store(tmp_path)
+    index = SyncHashIndex("accounts", max_entries=3, disk=store)
+    other = SyncHashIndex("contacts", max_entries=3, disk=store)
+    other.put("CON-1", uuid.uuid4(), "hash")
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    for number in range(5):
+        index.put(f"ACC-{number}", uuid.uuid4(), "hash", start + timedelta(minutes=number))
+
+    assert index.stats()["size"] == 3
+    assert index.stats()["evictions"] == 2
+    assert index.get("ACC-0") is None
+    assert index.get("ACC-4") is not None
+    assert other.stats()["size"] == 1
@@ -0,0 +1,69 @@
+"""Every create/update is one statement and its server defaults come back with it."""
+
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import crud, models
+from app.db import engine
+from app.utils.hashing import sha256_payload
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _read_back(record):
+    # Reading server-generated values must not need another SELECT.
+    return record.id, record.created_at, record.updated_at, record.is_deleted
+
+
+def test_create_and_update_are_single_statements(db):
+    with count_statements() as statements:
+        account = crud.create_account(db, {"account_number": "A-1", "name": "Acme"})
+        _read_back(account)
+    assert len(statements) == 1 and statements[0].startswith("INSERT")
+
+    with count_statements() as statements:
+        machine = crud.create_machine(db, {"account_id": account.id, "machine_name": "Press"})
+        _read_back(machine)
+    assert len(statements) == 1 and statements[0].startswith("INSERT")
+
+    for update, record, changes in (
+        (crud.update_account, account, {"name": "Acme Corp"}),
+        (crud.update_machine, machine, {"status": "ACTIVE"}),
+    ):
+        # A request loads the row before it changes it; commits expire what else the session holds.
+        db.refresh(record)
+        with count_statements() as statements:
+            update(db, record, changes)
+            _read_back(record)
+        assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+
+
+def test_boomi_upsert_is_lookup_plus_one_write(db):
+    payload = {"external_id": f"ACC-{uuid.uuid4().hex}", "account_number": "B-1", "name": "Boomi"}
+
+    with count_statements() as statements:
+        crud.boomi_upsert(db, models.Account, payload, sha256_payload(payload))
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "INSERT"]
+
+    changed = dict(payload, name="Boomi GmbH")
+    with count_statements() as statements:
+        crud.boomi_upsert(db, models.Account, changed, sha256_payload(changed))
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "UPDATE"]
+
+    with count_statements() as statements:
+        _, skipped = crud.boomi_upsert(db, models.Account, changed, sha256_payload(changed))
+    assert skipped and statements == []
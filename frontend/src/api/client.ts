@@ -1,6 +1,6 @@
 const BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
-async function request<T>(path: string, options?: RequestInit): Promise<T> {
+async function send(path: string, options?: RequestInit): Promise<Response> {
   const res = await fetch(`${BASE_URL}${path}`, {
     headers: { "Content-Type": "application/json" },
     ...options
@@ -9,9 +9,25 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
     const message = await res.text();
     throw new Error(message || "Request failed");
   }
+  return res;
+}
+
+async function request<T>(path: string, options?: RequestInit): Promise<T> {
+  const res = await send(path, options);
   return res.json() as Promise<T>;
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor?: string | null;
+}
+
+async function requestPage<T>(path: string): Promise<Page<T>> {
+  const res = await send(path);
+  const items = (await res.json()) as T[];
+  return { items, next_cursor: res.headers.get("X-Next-Cursor") };
+}
+
 export interface Account {
   id: string;
   account_number: string;
@@ -54,14 +70,52 @@ export interface Alert {
   assigned_to?: string;
 }
 
+export interface AlertFilters {
+  status?: string;
+  account_id?: string;
+  machine_id?: string;
+  alert_type?: string;
+  assigned_to?: string;
+  due_before?: string;
+  due_after?: string;
+  snoozed?: boolean;
+}
+
+export interface AlertsInboxResponse {
+  items: Alert[];
+  total: number;
+  next_cursor?: string | null;
+}
+
+export interface AccountOverview {
+  account: Account;
+  contacts: Contact[];
+  locations: Location[];
+  machines: Machine[];
+  open_alerts: Alert[];
+  counts: { contacts: number; locations: number; machines: number; open_alerts: number };
+}
+
 export const api = {
-  getAccounts: (search?: string) =>
-    request<Account[]>(`/accounts/?${search ? `search=${encodeURIComponent(search)}` : ""}`),
+  getAccounts: (search?: string, cursor?: string | null) => {
+    const params = new URLSearchParams();
+    if (search) params.set("search", search);
+    if (cursor) params.set("cursor", cursor);
+    return requestPage<Account>(`/accounts/?${params.toString()}`);
+  },
   getAccount: (id: string) => request<Account>(`/accounts/${id}`),
+  getAccountOverview: (id: string) => request<AccountOverview>(`/accounts/${id}/overview`),
   getContacts: (accountId: string) => request<Contact[]>(`/contacts/?account_id=${accountId}`),
   getLocations: (accountId: string) => request<Location[]>(`/locations/?account_id=${accountId}`),
   getMachines: (accountId: string) => request<Machine[]>(`/machines/?account_id=${accountId}`),
-  getAlerts: (status?: string) => request<Alert[]>(`/alerts/?${status ? `status=${status}` : ""}`),
+  getAlerts: (filters: AlertFilters = {}, cursor?: string | null) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== undefined && value !== "") params.set(key, String(value));
+    });
+    if (cursor) params.set("cursor", cursor);
+    return request<AlertsInboxResponse>(`/alerts/?${params.toString()}`);
+  },
   updateAlert: (id: string, payload: Partial<Alert>) =>
     request<Alert>(`/alerts/${id}`, { method: "PATCH", body: JSON.stringify(payload) })
 };
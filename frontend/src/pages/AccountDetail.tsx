@@ -2,10 +2,17 @@ import { useEffect, useState } from "react";
 import { useParams } from "react-router-dom";
 import DataGrid from "../components/DataGrid";
 import Tabs from "../components/Tabs";
-import { Account, api, Contact, Location, Machine, Alert } from "../api/client";
+import { Account, AccountOverview, api, Contact, Location, Machine, Alert } from "../api/client";
 
 const tabs = ["Details", "Contacts", "Locations", "Machines", "Alerts"];
 
+const SectionTotal = ({ shown, total }: { shown: number; total: number }) =>
+  shown < total ? (
+    <p>
+      Showing {shown} of {total}
+    </p>
+  ) : null;
+
 const AccountDetail = () => {
   const { id } = useParams();
   const [account, setAccount] = useState<Account | null>(null);
@@ -14,14 +21,18 @@ const AccountDetail = () => {
   const [locations, setLocations] = useState<Location[]>([]);
   const [machines, setMachines] = useState<Machine[]>([]);
   const [alerts, setAlerts] = useState<Alert[]>([]);
+  const [counts, setCounts] = useState<AccountOverview["counts"] | null>(null);
 
   useEffect(() => {
     if (!id) return;
-    api.getAccount(id).then(setAccount);
-    api.getContacts(id).then(setContacts);
-    api.getLocations(id).then(setLocations);
-    api.getMachines(id).then(setMachines);
-    api.getAlerts().then((data) => setAlerts(data.filter((alert) => alert.status === "OPEN")));
+    api.getAccountOverview(id).then((overview) => {
+      setAccount(overview.account);
+      setContacts(overview.contacts);
+      setLocations(overview.locations);
+      setMachines(overview.machines);
+      setAlerts(overview.open_alerts);
+      setCounts(overview.counts);
+    });
   }, [id]);
 
   if (!account) {
@@ -63,6 +74,7 @@ const AccountDetail = () => {
             ]}
             rows={contacts}
           />
+          {counts && <SectionTotal shown={contacts.length} total={counts.contacts} />}
         </div>
       )}
       {activeTab === "Locations" && (
@@ -75,6 +87,7 @@ const AccountDetail = () => {
             ]}
             rows={locations}
           />
+          {counts && <SectionTotal shown={locations.length} total={counts.locations} />}
         </div>
       )}
       {activeTab === "Machines" && (
@@ -88,6 +101,7 @@ const AccountDetail = () => {
             ]}
             rows={machines}
           />
+          {counts && <SectionTotal shown={machines.length} total={counts.machines} />}
         </div>
       )}
       {activeTab === "Alerts" && (
@@ -101,6 +115,7 @@ const AccountDetail = () => {
             ]}
             rows={alerts}
           />
+          {counts && <SectionTotal shown={alerts.length} total={counts.open_alerts} />}
         </div>
       )}
     </div>
@@ -7,17 +7,28 @@ const AccountsList = () => {
   const [accounts, setAccounts] = useState<Account[]>([]);
   const [search, setSearch] = useState("");
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadedTerm, setLoadedTerm] = useState<string | undefined>(undefined);
 
   const load = async (term?: string) => {
     setLoading(true);
     try {
-      const data = await api.getAccounts(term);
-      setAccounts(data);
+      const page = await api.getAccounts(term);
+      setAccounts(page.items);
+      setNextCursor(page.next_cursor || null);
+      setLoadedTerm(term);
     } finally {
       setLoading(false);
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const page = await api.getAccounts(loadedTerm, nextCursor);
+    setAccounts((current) => [...current, ...page.items]);
+    setNextCursor(page.next_cursor || null);
+  };
+
   useEffect(() => {
     load();
   }, []);
@@ -53,6 +64,11 @@ const AccountsList = () => {
           rows={accounts}
         />
       )}
+      {!loading && nextCursor && (
+        <button className="button secondary" onClick={loadMore} style={{ marginTop: 16 }}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
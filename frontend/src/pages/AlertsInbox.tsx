@@ -4,10 +4,22 @@ import { Alert, api } from "../api/client";
 
 const AlertsInbox = () => {
   const [alerts, setAlerts] = useState<Alert[]>([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   const load = async () => {
-    const data = await api.getAlerts("OPEN");
-    setAlerts(data);
+    const data = await api.getAlerts({ status: "OPEN" });
+    setAlerts(data.items);
+    setTotal(data.total);
+    setNextCursor(data.next_cursor || null);
+  };
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const data = await api.getAlerts({ status: "OPEN" }, nextCursor);
+    setAlerts((current) => [...current, ...data.items]);
+    setTotal(data.total);
+    setNextCursor(data.next_cursor || null);
   };
 
   useEffect(() => {
@@ -34,6 +46,9 @@ const AlertsInbox = () => {
   return (
     <div className="card">
       <h2>Alerts Inbox</h2>
+      <p>
+        Showing {alerts.length} of {total} open alerts
+      </p>
       <DataGrid
         columns={[
           { header: "Type", accessor: (row) => row.alert_type },
@@ -59,6 +74,11 @@ const AlertsInbox = () => {
         ]}
         rows={alerts}
       />
+      {nextCursor && (
+        <button className="button secondary" onClick={loadMore} style={{ marginTop: 16 }}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };